@@ -0,0 +1,104 @@
+"""Benchmark concurrent tool calls against a slow stub LabKey server.
+
+Starts a local HTTP server that answers every request with a small
+selectRows-shaped JSON payload after an artificial delay, then calls
+get_run_failures N times serially and N times concurrently via
+asyncio.gather. With blocking I/O routed through run_blocking, the
+concurrent wall time should approach ceil(N / LABKEY_MCP_PER_SERVER_LIMIT)
+times the per-request delay instead of N times it.
+
+Usage:
+    python bench_concurrency.py [--calls 12] [--delay 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tools import nightly
+from tools.common import PER_SERVER_LIMIT
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    delay = 0.5
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        time.sleep(self.delay)
+        body = json.dumps({
+            "rows": [{"testname": "TestStub", "stacktrace": "at Stub()", "pass": 0}],
+            "rowCount": 1,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ToolCollector:
+    """Minimal stand-in for FastMCP that just collects decorated tools."""
+
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self):
+        def decorator(func):
+            self.tools[func.__name__] = func
+            return func
+        return decorator
+
+
+async def _run(get_run_failures, server: str, calls: int):
+    start = time.perf_counter()
+    for run_id in range(calls):
+        await get_run_failures(run_id, server=server)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(get_run_failures(run_id, server=server) for run_id in range(calls)))
+    concurrent = time.perf_counter() - start
+    return serial, concurrent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=12)
+    parser.add_argument("--delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    _StubHandler.delay = args.delay
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    server = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    collector = _ToolCollector()
+    nightly.register_tools(collector)
+
+    print(f"Stub server: {server} (delay {args.delay:.2f}s, per-server limit {PER_SERVER_LIMIT})")
+    try:
+        serial, concurrent = asyncio.run(
+            _run(collector.tools["get_run_failures"], server, args.calls)
+        )
+    finally:
+        httpd.shutdown()
+
+    print(f"  {args.calls} calls serial:     {serial:.2f}s")
+    print(f"  {args.calls} calls concurrent: {concurrent:.2f}s")
+    if concurrent > 0:
+        print(f"  Speedup: {serial / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark run-metric aggregation on a synthetic run table.
+
+Fills a scratch copy of the local run metrics store with one run per
+computer per day (5 years x 50 computers by default, ~91k runs), then times
+the old day-granularity path (select every row, bucket and average in Python
+dicts) against the SQL aggregation save_run_metrics_csv now uses, with and
+without rolling statistics, plus per-computer z-scores for run granularity.
+The daily means from both paths are compared before timing is reported.
+
+Usage:
+    python bench_run_metrics.py [--years 5] [--computers 50] [--repeat 3]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from tools import metrics_store
+
+SERVER_KEY = "https://bench.example"
+FOLDER = "/home/development/Nightly x64"
+METRICS = list(metrics_store.METRICS)
+
+
+def _fill(conn, years: int, computers: int) -> tuple[str, str, int]:
+    """Insert synthetic runs; returns (start_date, end_date, run count)."""
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    days = years * 365
+    records = []
+    run_id = 0
+    for day in range(days):
+        date = start + timedelta(days=day)
+        for computer in range(computers):
+            run_id += 1
+            posttime = date + timedelta(hours=21, minutes=computer)
+            records.append((
+                SERVER_KEY, FOLDER, run_id, f"BENCH-{computer:02d}",
+                posttime.strftime("%Y-%m-%d %H:%M:%S"),
+                540 + rng.gauss(0, 10), "Windows",
+                8000 + day + rng.randint(-50, 50),
+                2000 + computer * 10 + rng.gauss(0, 40),
+                rng.choice((0, 0, 0, 1)), rng.choice((0, 0, 0, 0, 1)),
+                run_id, None, 0, None, None,
+            ))
+    columns = ", ".join(["server", "folder"] + metrics_store.RUN_COLUMNS)
+    placeholders = ", ".join("?" * (len(metrics_store.RUN_COLUMNS) + 2))
+    with conn:
+        conn.executemany(f"INSERT INTO runs ({columns}) VALUES ({placeholders})", records)
+    end = start + timedelta(days=days - 1)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), len(records)
+
+
+def _python_daily(conn, start_date: str, end_date: str) -> list[dict]:
+    """The previous implementation: every row as a dict, then grouped in Python."""
+    cursor = conn.execute(
+        f"SELECT {', '.join(metrics_store.RUN_COLUMNS)} FROM runs "
+        "WHERE server = ? AND folder = ? AND posttime >= ? AND posttime < ? ORDER BY posttime",
+        (SERVER_KEY, FOLDER, start_date, metrics_store._next_day(end_date)),
+    )
+    rows = [dict(row) for row in cursor]
+
+    daily_data = defaultdict(list)
+    for row in rows:
+        posttime = str(row.get("posttime", ""))[:10]
+        if posttime:
+            daily_data[posttime].append({
+                metric: row.get(source, 0) or 0
+                for metric, (source, _, _) in metrics_store.METRICS.items()
+            })
+
+    result = []
+    for date in sorted(daily_data.keys()):
+        runs = daily_data[date]
+        count = len(runs)
+        out = {"date": date, "run_count": count}
+        for metric, (_, col, decimals) in metrics_store.METRICS.items():
+            out[f"mean_{col}"] = round(sum(r[metric] for r in runs) / count, decimals)
+        result.append(out)
+    return result
+
+
+def _best(repeat: int, func, *args, **kwargs):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--computers", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with closing(metrics_store.connect(Path(tmp) / metrics_store.STORE_FILE)) as conn:
+            start = time.perf_counter()
+            start_date, end_date, count = _fill(conn, args.years, args.computers)
+            print(f"Synthetic store: {count} runs, {args.computers} computers, "
+                  f"{start_date} to {end_date} ({time.perf_counter() - start:.1f}s to build)")
+
+            python_time, python_rows = _best(args.repeat, _python_daily, conn, start_date, end_date)
+            sql_time, sql_rows = _best(
+                args.repeat, metrics_store.daily_metric_rows,
+                conn, SERVER_KEY, FOLDER, start_date, end_date, METRICS, rolling=False,
+            )
+            rolling_time, rolling_rows = _best(
+                args.repeat, metrics_store.daily_metric_rows,
+                conn, SERVER_KEY, FOLDER, start_date, end_date, METRICS, rolling=True,
+            )
+            zscore_time, zscore_rows = _best(
+                args.repeat, metrics_store.run_metric_rows,
+                conn, SERVER_KEY, FOLDER, start_date, end_date, METRICS, zscores=True,
+            )
+
+    mismatches = sum(1 for a, b in zip(python_rows, sql_rows) if a != b)
+    if len(python_rows) != len(sql_rows) or mismatches:
+        print(f"  WARNING: daily means differ ({mismatches} rows, "
+              f"{len(python_rows)} vs {len(sql_rows)} days)")
+
+    print(f"  Day means, Python dicts:     {python_time:.3f}s ({len(python_rows)} days)")
+    print(f"  Day means, SQL GROUP BY:     {sql_time:.3f}s")
+    print(f"  + 7/30-day rolling stats:    {rolling_time:.3f}s ({len(rolling_rows[0])} columns)")
+    print(f"  Run rows + z-scores:         {zscore_time:.3f}s ({len(zscore_rows)} rows)")
+    if sql_time > 0:
+        print(f"  Speedup (day means): {python_time / sql_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
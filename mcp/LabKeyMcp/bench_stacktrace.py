@@ -0,0 +1,216 @@
+"""Benchmark stack-trace normalization throughput (traces/sec).
+
+Times the previous normalizer (FRAME_PATTERN, then every noise pattern and
+prefix tried one at a time per frame, no caching) against the current one:
+cold (empty caches, per-frame memoization only), the batch API over the same
+corpus, and warm (every trace already in the whole-trace cache). Fingerprints
+and normalized text from both implementations are compared before timing is
+reported.
+
+The corpus is either real exception data or synthetic traces. --corpus takes
+a JSON list of trace strings or of rows with a "stacktrace" or
+"FormattedBody" field (e.g. saved select_rows output from the exception
+board or testfails). Without it, traces are generated from a pool of frames
+in several locales, with async noise, WinForms entry points and lambdas, and
+--distinct sets the fraction of traces that are unique, as repeats of one
+bug are common in real data.
+
+Usage:
+    python bench_stacktrace.py [--traces 5000] [--distinct 0.3] [--repeat 3]
+    python bench_stacktrace.py --corpus exceptions.json
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import time
+
+from tools import stacktrace
+from tools.exceptions import _parse_exception_body
+
+LOCALES = [
+    # (at, in, line, weight)
+    ("at", "in", "line", 80),
+    ("bei", "in", "Zeile", 5),
+    ("場所", "場所", "行", 5),
+    ("在", "位置", "行号", 5),
+    ("à", "dans", "ligne", 5),
+]
+ROOTS = [
+    "C:\\proj\\skyline_25_1\\pwiz_tools",
+    "D:\\Nightly\\trunk\\pwiz\\pwiz_tools",
+    "C:\\Users\\dev\\src\\pwiz\\pwiz_tools",
+]
+AREAS = ["Skyline.Model", "Skyline.Model.Results", "Skyline.Controls.Graphs", "Skyline.EditUI",
+         "Skyline.Util", "Common.SystemUtil", "Skyline.Model.DocSettings", "Skyline.FileUI"]
+FRAMEWORK_FRAMES = [
+    "System.Threading.ExecutionContext.RunInternal(ExecutionContext executionContext, ContextCallback callback, Object state, Boolean preserveSyncCtx)",
+    "System.Runtime.CompilerServices.AsyncMethodBuilderCore.Start[TStateMachine](TStateMachine& stateMachine)",
+    "System.Windows.Forms.Control.WndProc(Message& m)",
+    "System.Windows.Forms.NativeWindow.Callback(IntPtr hWnd, Int32 msg, IntPtr wparam, IntPtr lparam)",
+    "System.Windows.Forms.Button.OnClick(EventArgs e)",
+    "System.Windows.Forms.ToolStripItem.RaiseEvent(Object key, EventArgs e)",
+    "System.Linq.Enumerable.WhereSelectListIterator`2.MoveNext()",
+    "System.Collections.Generic.List`1.ForEach(Action`1 action)",
+]
+
+
+def _frame_pool(rng: random.Random, size: int) -> list[tuple[str, str]]:
+    """(method, file) pairs for project code, including lambdas and async state machines."""
+    pool = []
+    for i in range(size):
+        area = rng.choice(AREAS)
+        cls = f"Class{i % 400}"
+        method = f"Method{i}"
+        shape = rng.random()
+        if shape < 0.15:
+            method = f"<>c__DisplayClass{i % 9}_0.<{method}>b__{i % 3}"
+        elif shape < 0.25:
+            method = f"<{method}Async>d__{i % 12}.MoveNext"
+        elif shape < 0.35:
+            method = f"<{method}>b__{i % 4}"
+        file = f"{area.replace('.', chr(92))}\\{cls}.cs"
+        pool.append((f"pwiz.{area}.{cls}.{method}", file))
+    return pool
+
+
+def _synthetic_corpus(count: int, distinct: float, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    pool = _frame_pool(rng, 3000)
+    weights = [w for *_, w in LOCALES]
+    unique = []
+    for _ in range(max(1, int(count * distinct))):
+        at, in_, line, _ = rng.choices(LOCALES, weights)[0]
+        root = rng.choice(ROOTS)
+        lines = [f"System.{rng.choice(['NullReference', 'InvalidOperation', 'IndexOutOfRange'])}Exception: message"]
+        for method, file in rng.sample(pool, rng.randint(4, 25)):
+            lines.append(f"   {at} {method}() {in_} {root}\\{file}:{line} {rng.randint(1, 3000)}")
+            if rng.random() < 0.2:
+                lines.append(f"   {at} {rng.choice(FRAMEWORK_FRAMES)}")
+        if rng.random() < 0.3:
+            lines.append("Exception caught at:")
+            lines.extend(f"   {at} {f}" for f in rng.sample(FRAMEWORK_FRAMES, 3))
+        unique.append("\n".join(lines))
+    return [unique[i % len(unique)] if i < len(unique) else rng.choice(unique) for i in range(count)]
+
+
+def _load_corpus(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("rows", [])
+    traces = []
+    for item in data:
+        if isinstance(item, str):
+            traces.append(item)
+        elif item.get("stacktrace") is not None:
+            traces.append(item["stacktrace"])
+        elif item.get("FormattedBody"):
+            traces.append(_parse_exception_body(item["FormattedBody"])["stack_trace"])
+    return traces
+
+
+def _legacy_normalize(raw_trace: str, max_signature_frames: int = 5) -> tuple[str, str]:
+    """The normalizer before memoization: (fingerprint, normalized text)."""
+    if not raw_trace or not raw_trace.strip():
+        return hashlib.sha256(b'').hexdigest()[:16], ''
+    trace_to_parse = stacktrace.EXCEPTION_CAUGHT_PATTERN.split(raw_trace)[0]
+    parsed_frames = []
+    project_frame_count = 0
+    for match in stacktrace.FRAME_PATTERN.finditer(trace_to_parse):
+        method = match.group('method').strip()
+        file_path = match.group('file')
+        if any(re.search(pattern, method) for pattern in stacktrace.ASYNC_NOISE_PATTERNS):
+            continue
+        if any(method.startswith(prefix) for prefix in stacktrace.FRAMEWORK_PREFIXES):
+            continue
+        normalized = stacktrace.CLOSURE_CLASS_PATTERN.sub('.', method)
+        normalized = stacktrace.LAMBDA_PATTERN.sub(r'\1', normalized)
+        normalized = re.sub(r'<(\w+)>d__\d+\.MoveNext', r'\1', normalized)
+        normalized = re.sub(r'\.\.+', '.', normalized).strip('.')
+        if normalized:
+            is_entry = any(method.startswith(p) for p in stacktrace.CONDITIONAL_ENTRY_POINT_PREFIXES)
+            parsed_frames.append((normalized, file_path, is_entry))
+            if method.startswith(stacktrace.PROJECT_NAMESPACE):
+                project_frame_count += 1
+    filter_entry_points = project_frame_count >= stacktrace.MIN_PROJECT_FRAMES_FOR_ENTRY_POINT_FILTERING
+    frames = []
+    signature = []
+    for normalized, file_path, is_entry in parsed_frames:
+        if filter_entry_points and is_entry:
+            continue
+        normalized_file = None
+        if file_path:
+            path = file_path.replace('\\', '/')
+            anchor = path.lower().find(stacktrace.PROJECT_PATH_ANCHOR.lower())
+            normalized_file = path[anchor:] if anchor != -1 else None
+        frames.append(f"{normalized} [{normalized_file}]" if normalized_file else normalized)
+        if len(signature) < max_signature_frames:
+            signature.append('.'.join(normalized.split('.')[-2:]))
+    fingerprint = hashlib.sha256('|'.join(signature).encode('utf-8')).hexdigest()[:16]
+    return fingerprint, '\n'.join(frames)
+
+
+def _best(repeat: int, func, *args, before=None):
+    best = None
+    result = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="JSON list of traces or exception/testfails rows")
+    parser.add_argument("--traces", type=int, default=5000)
+    parser.add_argument("--distinct", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    traces = _load_corpus(args.corpus) if args.corpus else _synthetic_corpus(args.traces, args.distinct)
+    distinct = len(set(traces))
+    print(f"Corpus: {len(traces)} traces ({distinct} distinct), "
+          f"{sum(t.count(chr(10)) + 1 for t in traces) / max(len(traces), 1):.0f} lines avg"
+          + (f" from {args.corpus}" if args.corpus else " (synthetic)"))
+
+    legacy_time, legacy = _best(args.repeat, lambda: [_legacy_normalize(t) for t in traces])
+    cold_time, cold = _best(
+        args.repeat, lambda: [stacktrace.normalize_stack_trace(t) for t in traces],
+        before=stacktrace.clear_caches,
+    )
+    batch_time, _ = _best(args.repeat, stacktrace.normalize_stack_traces, traces, before=stacktrace.clear_caches)
+    frames_only_time, _ = _best(
+        args.repeat, lambda: [stacktrace._normalize_uncached(t, 5, False) for t in traces],
+    )
+    warm_time, _ = _best(args.repeat, stacktrace.normalize_stack_traces, traces)
+    stats = stacktrace.get_cache_stats()
+
+    mismatches = sum(
+        1 for (fp, text), norm in zip(legacy, cold)
+        if fp != norm.fingerprint or text != norm.normalized
+    )
+    if mismatches:
+        print(f"  WARNING: {mismatches} traces normalize differently from the previous implementation")
+
+    def rate(seconds):
+        return f"{len(traces) / seconds:>10,.0f} traces/s ({seconds:.3f}s)"
+
+    print(f"  Previous (no caching):         {rate(legacy_time)}")
+    print(f"  Frame caches only (warm):      {rate(frames_only_time)}")
+    print(f"  normalize_stack_trace (cold):  {rate(cold_time)}")
+    print(f"  normalize_stack_traces (cold): {rate(batch_time)}")
+    print(f"  normalize_stack_traces (warm): {rate(warm_time)}")
+    print(f"  Frame cache: {stats['frame_entries']} methods, "
+          f"{stats['frame_hits'] / max(stats['frame_hits'] + stats['frame_misses'], 1):.0%} hit rate")
+    print(f"  Speedup (cold batch): {legacy_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
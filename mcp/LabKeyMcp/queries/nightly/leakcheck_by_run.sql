@@ -0,0 +1,30 @@
+-- Query: leakcheck_by_run
+-- Container: /home/development/Nightly x64 (and other test folders)
+-- Schema: testresults
+-- Description: Pass-1 (leak detection) iteration counts and time per test per run
+--
+-- Parameters:
+--   StartDate (TIMESTAMP) - Start date (e.g., 2026-01-01)
+--   EndDate (TIMESTAMP) - End date (e.g., 2026-01-31)
+--
+-- Used by: save_leakcheck_stats() (via the local run metrics store)
+--
+-- Per-run breakdown of leakcheck_stats. Rows for a posted run never change, so
+-- the MCP server stores them locally and only fetches runs newer than its
+-- posttime high-water mark; leakcheck_stats columns are then aggregated
+-- locally: SUM(iterations), COUNT(runs), SUM(duration_sec).
+
+PARAMETERS (StartDate TIMESTAMP, EndDate TIMESTAMP)
+
+SELECT
+    p.testrunid,
+    t.posttime,
+    p.testname,
+    COUNT(*) AS iterations,
+    SUM(p.duration) AS duration_sec
+FROM testpasses p
+JOIN testruns t ON p.testrunid = t.id
+WHERE p.pass = 1
+  AND CAST(t.posttime AS DATE) >= StartDate
+  AND CAST(t.posttime AS DATE) <= EndDate
+GROUP BY p.testrunid, t.posttime, p.testname
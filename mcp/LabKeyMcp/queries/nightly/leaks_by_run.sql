@@ -0,0 +1,42 @@
+-- Query: leaks_by_run
+-- Container: /home/development/Nightly x64 (and other test folders)
+-- Schema: testresults
+-- Description: Leaked bytes and handles per test per run in a date range
+--
+-- Parameters:
+--   StartDate (TIMESTAMP) - Start date (e.g., 2026-01-01)
+--   EndDate (TIMESTAMP) - End date (e.g., 2026-01-31)
+--
+-- Used by: save_leak_trends() (via the local run metrics store)
+--
+-- One row per (run, test) combining memoryleaks and handleleaks, so a whole
+-- window of leaks for every test arrives in one paged pull instead of one
+-- leaks_history call per test. Rows for a posted run never change, so the
+-- MCP server stores them locally and only fetches runs newer than its
+-- posttime high-water mark. Computer and git hash come from the locally
+-- stored testruns_detail rows.
+
+PARAMETERS (StartDate TIMESTAMP, EndDate TIMESTAMP)
+
+SELECT
+    l.testrunid,
+    l.posttime,
+    l.testname,
+    SUM(l.bytes) AS leak_bytes,
+    SUM(l.handles) AS leak_handles
+FROM (
+    SELECT m.testrunid, t.posttime, m.testname, m.bytes, NULL AS handles
+    FROM memoryleaks m
+    JOIN testruns t ON m.testrunid = t.id
+    WHERE CAST(t.posttime AS DATE) >= StartDate
+      AND CAST(t.posttime AS DATE) <= EndDate
+
+    UNION ALL
+
+    SELECT h.testrunid, t.posttime, h.testname, NULL AS bytes, h.handles
+    FROM handleleaks h
+    JOIN testruns t ON h.testrunid = t.id
+    WHERE CAST(t.posttime AS DATE) >= StartDate
+      AND CAST(t.posttime AS DATE) <= EndDate
+) l
+GROUP BY l.testrunid, l.posttime, l.testname
@@ -0,0 +1,29 @@
+-- Query: test_durations_by_run
+-- Container: /home/development/Nightly x64 (and other test folders)
+-- Schema: testresults
+-- Description: Average duration and pass count per test per run in a date range
+--
+-- Parameters:
+--   StartDate (TIMESTAMP) - Start date (e.g., 2026-01-01)
+--   EndDate (TIMESTAMP) - End date (e.g., 2026-01-31)
+--
+-- Used by: save_duration_regressions() (via the local run metrics store)
+--
+-- One row per (run, test): the test x run duration matrix for a whole
+-- window in one paged pull, instead of one compare_run_timings call per run
+-- pair. Rows for a posted run never change, so the MCP server stores them
+-- locally and only fetches runs newer than its posttime high-water mark.
+
+PARAMETERS (StartDate TIMESTAMP, EndDate TIMESTAMP)
+
+SELECT
+    p.testrunid,
+    t.posttime,
+    p.testname,
+    COUNT(*) AS passes,
+    AVG(p.duration) AS avg_duration
+FROM testpasses p
+JOIN testruns t ON p.testrunid = t.id
+WHERE CAST(t.posttime AS DATE) >= StartDate
+  AND CAST(t.posttime AS DATE) <= EndDate
+GROUP BY p.testrunid, t.posttime, p.testname
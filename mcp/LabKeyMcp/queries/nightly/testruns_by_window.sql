@@ -0,0 +1,39 @@
+-- Query: testruns_by_window
+-- Container: /home/development/Nightly x64 (and other test folders)
+-- Schema: testresults
+-- Description: Extended test run information within a timestamp window
+--
+-- Parameters:
+--   WindowStart (TIMESTAMP) - Start of window (e.g., 2025-12-04 08:01:00)
+--   WindowEnd (TIMESTAMP) - End of window (e.g., 2025-12-05 08:00:00)
+--
+-- Used by: get_daily_test_summary()
+--
+-- Same columns as testruns_detail, but filtered to the exact nightly window
+-- on the server (8:01 AM the day before to 8:00 AM the report date), so no
+-- out-of-window rows are transferred or filtered client-side.
+
+PARAMETERS (WindowStart TIMESTAMP, WindowEnd TIMESTAMP)
+
+SELECT
+    t.id AS run_id,
+    u.username AS computer,
+    t.posttime,
+    t.duration,
+    t.os,
+    t.passedtests,
+    t.averagemem,
+    t.failedtests,
+    t.leakedtests,
+    t.revision,
+    t.githash,
+    t.flagged,
+    h.testname AS hung_test,
+    h.pass AS hung_pass,
+    h.language AS hung_language
+FROM testruns t
+JOIN "user" u ON t.userid = u.id
+LEFT OUTER JOIN hangs h ON t.id = h.testrunid
+WHERE t.posttime >= WindowStart
+  AND t.posttime <= WindowEnd
+ORDER BY t.posttime DESC
@@ -15,9 +15,17 @@ Modules:
 - patterns: Pattern detection for daily reports
 - computers: Computer status management (deactivate/reactivate)
 - nightly_history: Historical tracking for failures, leaks, hangs
+- logindex: Local inverted index for searching logs across runs
+- tracing: Per-call HTTP/tool tracing + get_server_metrics
 
 Internal utilities (no MCP tools):
 - stacktrace: Stack trace normalization for pattern matching
+- cache: Disk-backed cache for immutable query results
+- metrics_store: Local SQLite store of per-run metrics with incremental sync
+- runlog: Streaming, sectioned run log retrieval with a local offsets cache
+- leaktrend: Array-backed leak growth and first-appearance analysis
+- traceindex: MinHash/LSH lookup of near-duplicate exception fingerprints
+- exception_store: Local SQLite exception history with a JSON export
 """
 
 from . import common
@@ -31,14 +39,25 @@ from . import issues
 from . import patterns
 from . import computers
 from . import nightly_history
+from . import logindex
 from . import stacktrace  # Internal utility, no MCP tools
+from . import cache  # Internal utility, no MCP tools
+from . import metrics_store  # Internal utility, no MCP tools
+from . import runlog  # Internal utility, no MCP tools
+from . import leaktrend  # Internal utility, no MCP tools
+from . import traceindex  # Internal utility, no MCP tools
+from . import exception_store  # Internal utility, no MCP tools
+from . import tracing
 
 
 def register_all_tools(mcp):
     """Register all tools from all modules.
 
     Order: PRIMARY tools first, then DRILL-DOWN, then limited discovery.
+    Every tool registered after instrument_tools() is traced.
     """
+    tracing.instrument_tools(mcp)
+
     # PRIMARY tools first (aggregate reports)
     nightly.register_tools(mcp)      # get_daily_test_summary
     exceptions.register_tools(mcp)   # save_exceptions_report
@@ -52,6 +71,8 @@ def register_all_tools(mcp):
     announcements.register_tools(mcp)  # post_announcement
     attachments.register_tools(mcp)
     computers.register_tools(mcp)    # deactivate_computer, reactivate_computer, etc.
+    logindex.register_tools(mcp)     # build_log_index, search_run_logs
 
     # Limited discovery (list_queries only - guides toward schema docs)
     common.register_tools(mcp)
+    tracing.register_tools(mcp)      # get_server_metrics
@@ -16,6 +16,7 @@ import labkey
 from .common import (
     get_labkey_session,
     get_server_context,
+    run_blocking,
     _server_url,
     DEFAULT_SERVER,
 )
@@ -47,7 +48,7 @@ def register_tools(mcp):
 
             # Step 2: Establish authenticated session with CSRF token
             logger.info(f"Establishing session for announcement in {container_path}")
-            session, csrf_token = get_labkey_session(server)
+            session, csrf_token = await run_blocking(server, get_labkey_session, server)
 
             # Step 3: Normalize line endings
             normalized_body = body.replace("\r\n", "\n").replace("\r", "\n")
@@ -77,8 +78,8 @@ def register_tools(mcp):
 
             # Step 6: POST the form
             logger.info(f"Posting announcement: {title}")
-            status_code, response_text = session.post_form(
-                post_url, payload, headers=headers
+            status_code, response_text = await run_blocking(
+                server, session.post_form, post_url, payload, headers=headers
             )
 
             # Step 7: Check for errors
@@ -93,7 +94,9 @@ def register_tools(mcp):
             row_id = None
             try:
                 server_context = get_server_context(server, container_path)
-                result = labkey.query.select_rows(
+                result = await run_blocking(
+                    server,
+                    labkey.query.select_rows,
                     server_context=server_context,
                     schema_name="announcement",
                     query_name="Announcement",
@@ -6,14 +6,14 @@ from support board posts and wiki pages on skyline.ms.
 
 import logging
 import urllib.error
-import urllib.request
 from pathlib import Path
 
 import labkey
 
 from .common import (
     get_server_context,
-    get_netrc_credentials,
+    run_blocking,
+    make_authenticated_request,
     get_tmp_dir,
     _server_url,
     DEFAULT_SERVER,
@@ -37,7 +37,9 @@ def register_tools(mcp):
             server_context = get_server_context(server, container_path)
 
             # Query documents_metadata (custom query that excludes binary document column)
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name="corex",
                 query_name="documents_metadata",
@@ -91,11 +93,7 @@ def register_tools(mcp):
         container_path: str = DEFAULT_SUPPORT_CONTAINER,
     ) -> str:
         """[D] Download attachment. Text returns content; binary saves to ai/.tmp/. → support.md"""
-        import base64
-
         try:
-            login, password = get_netrc_credentials(server)
-
             # Build download URL
             # For support: announcements-download.view
             # For wiki: wiki-download.view (uses different parameter names)
@@ -104,15 +102,11 @@ def register_tools(mcp):
             else:
                 download_url = f"{_server_url(server)}{container_path}/wiki-download.view?entityId={parent_entity_id}&name={filename}"
 
-            # Create authenticated request
-            request = urllib.request.Request(download_url)
-            credentials = base64.b64encode(f"{login}:{password}".encode()).decode()
-            request.add_header("Authorization", f"Basic {credentials}")
-
             logger.info(f"Downloading attachment: {filename}")
 
-            with urllib.request.urlopen(request, timeout=60) as response:
-                content = response.read()
+            content = await run_blocking(
+                server, make_authenticated_request, server, download_url, timeout=60
+            )
 
             # Determine if text or binary based on extension
             text_extensions = {'.bat', '.py', '.txt', '.csv', '.xml', '.json', '.md', '.log', '.tsv', '.ini', '.cfg', '.yaml', '.yml', '.html', '.htm', '.css', '.js', '.sh', '.ps1', '.r', '.sql'}
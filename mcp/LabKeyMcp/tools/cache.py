@@ -0,0 +1,329 @@
+"""Disk-backed response cache for immutable LabKey results.
+
+This module provides an internal cache for query results and page fetches
+that can no longer change. NOT exposed as MCP tools - used internally by
+other modules (nightly.py).
+
+Historical nightly data is append-only: once the 8AM window that contains
+a run has closed, the run's row, its testfails, its log and its XML are
+fixed. Re-running a report for a past date should not re-download them.
+
+Entries live under ai/.tmp/cache/ as one file per response, named by a
+SHA256 of (server, container, schema, query, filters, parameters, sort,
+columns, max_rows), or of the URL for page fetches. Whether a response may be
+cached, and for how long, is decided per query by QUERY_RULES. The cache is
+bounded by LABKEY_MCP_CACHE_MB; least recently used files (by mtime) are
+evicted first. Set LABKEY_MCP_CACHE=0 to bypass it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import labkey
+
+from . import tracing
+from .common import (
+    earliest_server_time,
+    get_server_context,
+    get_tmp_dir,
+    make_authenticated_request,
+    run_blocking,
+    select_all_rows,
+    _server_url,
+)
+
+logger = logging.getLogger("labkey_mcp")
+
+CACHE_ENABLED = os.environ.get("LABKEY_MCP_CACHE", "1") != "0"
+MAX_CACHE_BYTES = int(os.environ.get("LABKEY_MCP_CACHE_MB", "512")) * 1024 * 1024
+
+# Cache lifetimes in seconds
+IMMUTABLE = float("inf")
+
+_lock = threading.Lock()
+_total_bytes = None  # Lazily computed from disk, then tracked on store/evict
+_stats = {"hits": 0, "misses": 0, "uncacheable": 0, "stores": 0, "evictions": 0}
+
+
+# =============================================================================
+# Immutability Rules
+# =============================================================================
+
+def current_window_start(now: datetime = None) -> datetime:
+    """Start of the nightly window that may still be open (most recent 8:00 AM).
+
+    ``now`` is a naive server-local time; by default earliest_server_time(),
+    so a client east of the server never treats a window still open on the
+    server as closed.
+    """
+    now = now or earliest_server_time()
+    boundary = now.replace(hour=8, minute=0, second=0, microsecond=0)
+    return boundary if now >= boundary else boundary - timedelta(days=1)
+
+
+def _window_is_closed(end_value) -> bool:
+    """True if a date range ending at ``end_value`` lies before the open window.
+
+    Accepts "YYYY-MM-DD" (inclusive whole day, as testruns_detail uses) or
+    "YYYY-MM-DD HH:MM:SS" (exact end, as the *_by_date queries use).
+    """
+    if not end_value:
+        return False
+    text = str(end_value)
+    try:
+        if len(text) <= 10:
+            end = datetime.strptime(text, "%Y-%m-%d") + timedelta(days=1)
+        else:
+            end = datetime.strptime(text[:19], "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return False
+    return end <= current_window_start()
+
+
+def _closed_window_rule(parameters: dict, filters: list) -> Optional[float]:
+    """Date-windowed queries are final once the window is in the past."""
+    parameters = parameters or {}
+    end_value = parameters.get("WindowEnd") or parameters.get("EndDate")
+    return IMMUTABLE if _window_is_closed(end_value) else None
+
+
+def _single_run_rule(parameters: dict, filters: list) -> Optional[float]:
+    """Rows of specific posted runs (testrunid eq or in) never change."""
+    for name, _ in filters:
+        if name.lower().startswith("query.testrunid~"):
+            return IMMUTABLE
+    return None
+
+
+# query_name -> rule(parameters, filters) returning a max age in seconds,
+# or None if the response must not be cached.
+QUERY_RULES = {
+    "testfails": _single_run_rule,
+    "testruns_detail": _closed_window_rule,
+    "testruns_by_window": _closed_window_rule,
+    "failures_by_date": _closed_window_rule,
+    "leaks_by_date": _closed_window_rule,
+    "failures_with_traces_by_date": _closed_window_rule,
+}
+
+# LabKey views whose output for a given runId is fixed once the run is posted.
+# testresults-viewLog.view is streamed and cached per section by runlog.py.
+IMMUTABLE_VIEWS = ("testresults-viewXml.view",)
+
+
+# =============================================================================
+# Disk Storage
+# =============================================================================
+
+def get_cache_dir() -> Path:
+    """Get the ai/.tmp/cache directory (created if needed)."""
+    cache_dir = get_tmp_dir() / "cache"
+    cache_dir.mkdir(exist_ok=True)
+    return cache_dir
+
+
+def get_cache_stats() -> dict:
+    """Return hit/miss/store/eviction counters and current cache size."""
+    with _lock:
+        stats = dict(_stats)
+        stats["bytes"] = _total_bytes if _total_bytes is not None else _scan_size()
+    stats["max_bytes"] = MAX_CACHE_BYTES
+    stats["enabled"] = CACHE_ENABLED
+    return stats
+
+
+def _scan_size() -> int:
+    return sum(p.stat().st_size for p in get_cache_dir().glob("*.cache") if p.is_file())
+
+
+def _make_key(parts: dict) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _read(key: str, max_age: float) -> Optional[bytes]:
+    path = get_cache_dir() / f"{key}.cache"
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    # Immutable entries use mtime for LRU order; TTL entries keep it as write time
+    if max_age != IMMUTABLE and time.time() - stat.st_mtime > max_age:
+        return None
+    try:
+        data = path.read_bytes()
+        if max_age == IMMUTABLE:
+            os.utime(path)
+        return data
+    except OSError:
+        return None
+
+
+def _write(key: str, data: bytes):
+    global _total_bytes
+    cache_dir = get_cache_dir()
+    path = cache_dir / f"{key}.cache"
+    tmp_path = cache_dir / f"{key}.{threading.get_ident()}.tmp"
+    try:
+        old_size = path.stat().st_size if path.exists() else 0
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write cache entry {key}: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return
+
+    with _lock:
+        if _total_bytes is None:
+            _total_bytes = _scan_size()
+        else:
+            _total_bytes += len(data) - old_size
+        _stats["stores"] += 1
+        if _total_bytes > MAX_CACHE_BYTES:
+            _evict_locked(cache_dir)
+
+
+def _evict_locked(cache_dir: Path):
+    """Delete least recently used entries until under 90% of the bound."""
+    global _total_bytes
+    entries = []
+    for path in cache_dir.glob("*.cache"):
+        try:
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            continue
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    target = MAX_CACHE_BYTES * 0.9
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            path.unlink()
+            total -= size
+            _stats["evictions"] += 1
+        except OSError:
+            continue
+    _total_bytes = total
+
+
+def _count(key: str):
+    with _lock:
+        _stats[key] += 1
+
+
+# =============================================================================
+# Cached Fetchers
+# =============================================================================
+
+def _filter_key(filter_array: list) -> list:
+    """Stable (url parameter name, value) pairs for labkey QueryFilters."""
+    pairs = []
+    for f in filter_array or []:
+        try:
+            pairs.append((f.get_url_parameter_name(), str(f.get_url_parameter_value())))
+        except AttributeError:
+            pairs.append((repr(f), ""))
+    return sorted(pairs)
+
+
+async def cached_select_rows(
+    server: str,
+    container_path: str,
+    schema_name: str,
+    query_name: str,
+    **kwargs,
+) -> dict:
+    """labkey.query.select_rows with the disk cache in front of it.
+
+    Args:
+        server: LabKey server hostname or URL
+        container_path: Container path
+        schema_name: Schema name
+        query_name: Query name; its QUERY_RULES entry decides cacheability
+        **kwargs: Passed through to select_rows (filter_array, parameters,
+            max_rows, sort, columns, ...). Without ``max_rows`` every row is
+            fetched in pages via select_all_rows.
+
+    Returns:
+        The select_rows result dict
+    """
+    filters = _filter_key(kwargs.get("filter_array"))
+    rule = QUERY_RULES.get(query_name)
+    max_age = rule(kwargs.get("parameters"), filters) if rule and CACHE_ENABLED else None
+
+    key = None
+    if max_age is not None:
+        key = _make_key({
+            "server": _server_url(server).lower(),
+            "container": container_path,
+            "schema": schema_name,
+            "query": query_name,
+            "filters": filters,
+            "parameters": kwargs.get("parameters") or {},
+            "sort": kwargs.get("sort"),
+            "columns": kwargs.get("columns"),
+            "max_rows": kwargs.get("max_rows"),
+        })
+        start = time.perf_counter()
+        data = _read(key, max_age)
+        if data is not None:
+            _count("hits")
+            tracing.record_cache(query_name, True, (time.perf_counter() - start) * 1000, len(data))
+            return json.loads(data)
+        _count("misses")
+        tracing.record_cache(query_name, False)
+    else:
+        _count("uncacheable")
+
+    if kwargs.get("max_rows") is None:
+        kwargs.pop("max_rows", None)
+        result = await select_all_rows(server, container_path, schema_name, query_name, **kwargs)
+    else:
+        result = await run_blocking(
+            server,
+            labkey.query.select_rows,
+            server_context=get_server_context(server, container_path),
+            schema_name=schema_name,
+            query_name=query_name,
+            **kwargs,
+        )
+
+    if key is not None and result is not None:
+        _write(key, json.dumps(result).encode("utf-8"))
+    return result
+
+
+async def cached_fetch(server: str, url: str, timeout: int = 120) -> bytes:
+    """make_authenticated_request (GET) with the disk cache in front of it.
+
+    Only views listed in IMMUTABLE_VIEWS are cached; anything else is fetched
+    directly.
+    """
+    cacheable = CACHE_ENABLED and any(view in url for view in IMMUTABLE_VIEWS)
+    key = None
+    if cacheable:
+        key = _make_key({"url": url})
+        view = next(view for view in IMMUTABLE_VIEWS if view in url)
+        start = time.perf_counter()
+        data = _read(key, IMMUTABLE)
+        if data is not None:
+            _count("hits")
+            tracing.record_cache(view, True, (time.perf_counter() - start) * 1000, len(data))
+            return data
+        _count("misses")
+        tracing.record_cache(view, False)
+    else:
+        _count("uncacheable")
+
+    data = await run_blocking(server, make_authenticated_request, server, url, timeout=timeout)
+    if key is not None:
+        _write(key, data)
+    return data
@@ -3,26 +3,42 @@
 This module contains:
 - Constants for default server configuration
 - Shared helper functions (credentials, HTTP requests)
+- Blocking I/O executor (run_blocking) so async tools never stall the event loop
+- Pooled keep-alive HTTP client (http_open) shared by every raw HTTP code path
 - LabKeySession class for authenticated POST requests with CSRF support
 - WAF encoding/decoding for content fields
 - WebDAV file operations (list, upload, download)
 - Limited discovery (list_queries only - for proposing schema documentation)
 """
 
+import asyncio
+import contextvars
+import functools
 import json
 import logging
 import os
 import base64
+import http.client
 import http.cookiejar
+import io
 import netrc
+import re
+import sys
+import threading
+import time
 import urllib.error
 import urllib.request
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from urllib.parse import quote, unquote, urlencode
+from urllib.parse import quote, unquote, urlencode, urljoin, urlsplit
 
 import labkey
 from labkey.query import ServerContext
 
+from . import tracing
+
 logger = logging.getLogger("labkey_mcp")
 
 # =============================================================================
@@ -79,31 +95,570 @@ ISSUES_SCHEMA = "issues"
 DEFAULT_ISSUES_CONTAINER = "/home/issues"
 
 
+# =============================================================================
+# Blocking I/O Executor
+# =============================================================================
+
+# labkey.query.select_rows and urllib are synchronous. Async tools hand every
+# blocking call to run_blocking() so one slow query never freezes the stdio
+# server and independent tool calls overlap instead of queueing.
+# LABKEY_MCP_MAX_WORKERS bounds the shared thread pool;
+# LABKEY_MCP_PER_SERVER_LIMIT bounds concurrent requests to any one server.
+MAX_WORKERS = int(os.environ.get("LABKEY_MCP_MAX_WORKERS", "16"))
+PER_SERVER_LIMIT = int(os.environ.get("LABKEY_MCP_PER_SERVER_LIMIT", "6"))
+
+_executor = None
+_executor_lock = threading.Lock()
+# event loop -> {server_url: asyncio.Semaphore}; asyncio primitives are
+# bound to the loop that first waits on them, so keep one set per loop.
+_server_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool used for blocking LabKey I/O."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS,
+                thread_name_prefix="labkey-io",
+            )
+        return _executor
+
+
+def _get_server_semaphore(server: str) -> asyncio.Semaphore:
+    """Get the per-server concurrency limiter for the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphores = _server_semaphores.setdefault(loop, {})
+    key = _server_url(server).lower()
+    semaphore = semaphores.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(PER_SERVER_LIMIT)
+        semaphores[key] = semaphore
+    return semaphore
+
+
+async def run_blocking(server: str, func, /, *args, **kwargs):
+    """Run a blocking call on the shared executor without stalling the event loop.
+
+    At most PER_SERVER_LIMIT calls against ``server`` run at once; further
+    calls wait here (not in a worker thread) so other servers' calls and
+    local work keep flowing.
+
+    Args:
+        server: Server URL or hostname the call talks to (limit key)
+        func: Blocking callable, e.g. ``labkey.query.select_rows``
+        *args, **kwargs: Passed through to ``func``
+
+    Returns:
+        Whatever ``func`` returns; exceptions propagate unchanged.
+    """
+    # Copy the caller's context so tracing attributes the call to its tool
+    context = contextvars.copy_context()
+    async with _get_server_semaphore(server):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_executor(), functools.partial(context.run, func, *args, **kwargs)
+        )
+
+
+# =============================================================================
+# Pooled HTTP Client
+# =============================================================================
+
+# Every raw HTTP code path (discovery, page fetches, attachments, WebDAV,
+# LabKeySession) goes through http_open(), which keeps idle keep-alive
+# connections per (scheme, host). A daily report then pays for one TLS
+# handshake per worker thread instead of one per request. Proxies configured
+# for urlopen (HTTP(S)_PROXY / NO_PROXY, or the system settings on Windows
+# and macOS) are honored: HTTPS goes through a CONNECT tunnel, HTTP is sent
+# to the proxy with the absolute URL.
+# LABKEY_MCP_POOL_IDLE caps the idle connections kept per host.
+POOL_MAX_IDLE = int(os.environ.get("LABKEY_MCP_POOL_IDLE", str(PER_SERVER_LIMIT)))
+_MAX_REDIRECTS = 5
+# Socket read/write block size; also the chunk size for streamed file bodies
+HTTP_BLOCK_SIZE = 64 * 1024
+_USER_AGENT = f"Python-urllib/{sys.version_info.major}.{sys.version_info.minor}"
+
+# Errors that mean a reused keep-alive connection was closed by the server
+# while it sat idle. The request is retried once on a fresh connection.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+# Methods safe to resend when the connection dies after the request went
+# out; anything else is resent only if it failed while still being sent
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PROPFIND"})
+
+
+@functools.lru_cache(maxsize=None)
+def _proxy_for(scheme: str, netloc: str):
+    """(proxy host:port, Proxy-Authorization or None) for a host, or None if direct."""
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(netloc):
+        return None
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    parts = urlsplit(proxy)
+    auth = None
+    if parts.username:
+        credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+        auth = "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return parts.netloc.rpartition("@")[2], auth
+
+
+class _HttpPool:
+    """Thread-safe pool of idle keep-alive connections keyed by (scheme, host)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}  # (scheme, netloc) -> [HTTPConnection]
+        self.stats = {
+            "requests": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "stale_retries": 0,
+            "bytes_sent": 0,
+            "bytes_received": 0,
+            "sdk_requests": 0,
+            "sdk_bytes_received": 0,
+            "session_logins": 0,
+            "session_reuses": 0,
+            "session_refreshes": 0,
+            "netrc_lookups": 0,
+            "netrc_parses": 0,
+            "netrc_stat_checks": 0,
+        }
+
+    def count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def acquire(self, scheme: str, netloc: str, timeout: float) -> tuple:
+        """Return (connection, reused) for a host, preferring an idle connection."""
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            self.count("connections_reused")
+            return conn, True
+
+        conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        self.count("connections_opened")
+        proxy = _proxy_for(scheme, netloc)
+        if proxy is None:
+            return conn_class(netloc, timeout=timeout, blocksize=HTTP_BLOCK_SIZE), False
+        proxy_netloc, proxy_auth = proxy
+        conn = conn_class(proxy_netloc, timeout=timeout, blocksize=HTTP_BLOCK_SIZE)
+        if scheme == "https":
+            conn.set_tunnel(netloc, headers={"Proxy-Authorization": proxy_auth} if proxy_auth else None)
+        return conn, False
+
+    def release(self, scheme: str, netloc: str, conn):
+        """Return a connection to the idle list, or close it if the list is full."""
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < POOL_MAX_IDLE:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def snapshot(self) -> dict:
+        """Copy of the counters plus idle connections per host."""
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot["idle_connections"] = {
+                f"{scheme}://{netloc}": len(conns)
+                for (scheme, netloc), conns in self._idle.items()
+                if conns
+            }
+        return snapshot
+
+
+_http_pool = _HttpPool()
+
+
+def get_http_stats() -> dict:
+    """Return pooled HTTP client counters (requests, connections, bytes)."""
+    return _http_pool.snapshot()
+
+
+class _CountingReader:
+    """File wrapper that counts bytes http.client streams out of a body file."""
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        _http_pool.count("bytes_sent", len(data))
+        self.count += len(data)
+        return data
+
+    def seek(self, *args):
+        self.count = 0
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+
+class PooledResponse:
+    """Response from http_open(); hands its connection back to the pool on close.
+
+    Supports the subset of the urlopen() response API the tools use:
+    ``status``, ``reason``, ``headers``, ``info()``, ``getheader()``,
+    ``read()`` and use as a context manager. The connection is only reused
+    if the body was read to the end. Closing records the exchange with
+    tracing (latency covers sending the request through the last body read).
+    """
+
+    def __init__(self, url: str, raw: http.client.HTTPResponse, release,
+                 method: str = "GET", started: float = None, bytes_sent: int = 0):
+        self.url = url
+        self._raw = raw
+        self._release = release
+        self._method = method
+        self._started = started if started is not None else time.perf_counter()
+        self._bytes_sent = bytes_sent
+        self._bytes_received = 0
+        self.status = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers
+
+    def info(self):
+        return self.headers
+
+    def getheader(self, name: str, default=None):
+        return self._raw.getheader(name, default)
+
+    def read(self, amt: int = None) -> bytes:
+        data = self._raw.read() if amt is None else self._raw.read(amt)
+        _http_pool.count("bytes_received", len(data))
+        self._bytes_received += len(data)
+        return data
+
+    def close(self):
+        if self._release is None:
+            return
+        release, self._release = self._release, None
+        reusable = self._raw.isclosed() and not self._raw.will_close
+        self._raw.close()
+        release(reusable)
+        tracing.record_http(
+            self._method, self.url, self.status,
+            (time.perf_counter() - self._started) * 1000,
+            self._bytes_received, self._bytes_sent,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _body_start(data):
+    """Position a file body can be rewound to, or None if it cannot be replayed."""
+    if hasattr(data, "read") and hasattr(data, "seek") and hasattr(data, "tell"):
+        return data.tell()
+    return None
+
+
+def _send_pooled(url: str, method: str, data, headers: dict, timeout: float, cookie_jar) -> PooledResponse:
+    """Send one request (no redirect handling) over a pooled connection."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+
+    headers = dict(headers)
+    headers.setdefault("User-Agent", _USER_AGENT)
+    proxy = _proxy_for(scheme, parts.netloc)
+    if proxy is not None and scheme == "http":
+        # Plain HTTP through a proxy: request line carries the absolute URL
+        path = url.split("#", 1)[0]
+        if proxy[1]:
+            headers["Proxy-Authorization"] = proxy[1]
+    cookie_request = None
+    if cookie_jar is not None:
+        cookie_request = urllib.request.Request(url, method=method)
+        cookie_jar.add_cookie_header(cookie_request)
+        cookie = cookie_request.get_header("Cookie")
+        if cookie:
+            headers["Cookie"] = cookie
+
+    # File bodies are streamed in HTTP_BLOCK_SIZE chunks; they can only be
+    # replayed after a stale-connection failure if they are seekable.
+    body_start = _body_start(data)
+    if hasattr(data, "read"):
+        data = _CountingReader(data)
+    replayable = data is None or isinstance(data, (bytes, bytearray)) or body_start is not None
+    started = time.perf_counter()
+    while True:
+        conn, reused = _http_pool.acquire(scheme, parts.netloc, timeout)
+        sent = False
+        try:
+            conn.request(method, path, body=data, headers=headers)
+            sent = True
+            raw = conn.getresponse()
+            break
+        except _STALE_CONNECTION_ERRORS as e:
+            conn.close()
+            # Once sent, a non-idempotent request may already have been acted on
+            if reused and replayable and (not sent or method in _IDEMPOTENT_METHODS):
+                _http_pool.count("stale_retries")
+                if body_start is not None:
+                    data.seek(body_start)
+                continue
+            tracing.record_http(method, url, None, (time.perf_counter() - started) * 1000,
+                                error=type(e).__name__)
+            raise
+        except BaseException as e:
+            conn.close()
+            tracing.record_http(method, url, None, (time.perf_counter() - started) * 1000,
+                                error=type(e).__name__)
+            raise
+
+    _http_pool.count("requests")
+    bytes_sent = 0
+    if isinstance(data, (bytes, bytearray)):
+        bytes_sent = len(data)
+        _http_pool.count("bytes_sent", bytes_sent)
+    elif isinstance(data, _CountingReader):
+        bytes_sent = data.count
+    if cookie_jar is not None:
+        cookie_jar.extract_cookies(raw, cookie_request)
+
+    def release(reusable: bool):
+        if reusable:
+            _http_pool.release(scheme, parts.netloc, conn)
+        else:
+            conn.close()
+
+    return PooledResponse(url, raw, release, method, started, bytes_sent)
+
+
+def http_open(
+    url: str,
+    method: str = "GET",
+    data=None,
+    headers: dict = None,
+    timeout: float = 30,
+    cookie_jar: http.cookiejar.CookieJar = None,
+) -> PooledResponse:
+    """Open a URL over a pooled keep-alive connection.
+
+    Drop-in for ``urllib.request.urlopen``: follows redirects (POST becomes
+    GET on 301/302/303), raises ``urllib.error.HTTPError`` for 4xx/5xx so
+    existing ``except`` clauses keep working, and stores/sends cookies when
+    given a cookie jar.
+
+    Args:
+        url: Full URL to request
+        method: HTTP method (GET, POST, PROPFIND, PUT, ...)
+        data: Optional request body (bytes or a binary file object)
+        headers: Optional request headers
+        timeout: Socket timeout in seconds
+        cookie_jar: Optional CookieJar for session cookies
+
+    Returns:
+        PooledResponse; use it as a context manager so the connection is
+        returned to the pool.
+    """
+    headers = dict(headers or {})
+    body_start = _body_start(data)
+    for _ in range(_MAX_REDIRECTS + 1):
+        response = _send_pooled(url, method, data, headers, timeout, cookie_jar)
+        location = response.getheader("Location")
+        if response.status in (301, 302, 303, 307, 308) and location:
+            redirect_url = urljoin(url, location)
+            if response.status == 303 or (response.status in (301, 302) and method not in ("GET", "HEAD")):
+                method, data = "GET", None
+                headers.pop("Content-Type", None)
+                headers.pop("Content-Length", None)
+            elif hasattr(data, "read"):
+                # 307/308 resend the body; a stream that cannot rewind is not followed
+                if body_start is None:
+                    body = response.read()
+                    response.close()
+                    raise urllib.error.HTTPError(url, response.status, "Redirect would resend an unrewindable body",
+                                                 response.headers, io.BytesIO(body))
+                data.seek(body_start)
+            response.read()
+            response.close()
+            if urlsplit(redirect_url).netloc != urlsplit(url).netloc:
+                headers.pop("Authorization", None)
+            url = redirect_url
+            continue
+
+        if response.status >= 400:
+            body = response.read()
+            response.close()
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(body))
+        return response
+
+    raise urllib.error.HTTPError(url, response.status, "Too many redirects", response.headers, None)
+
+
+class _NetrcAuth:
+    """requests auth hook that supplies memoized netrc credentials.
+
+    Setting ``session.auth`` stops requests from re-parsing ~/.netrc on every
+    SDK call (it only falls back to netrc when no auth is configured).
+    """
+
+    def __init__(self, server: str):
+        self.server = server
+
+    def __call__(self, request):
+        try:
+            request.headers["Authorization"] = get_basic_auth_header(self.server)
+        except Exception:
+            pass  # No netrc entry: send unauthenticated, as requests would
+        return request
+
+
+def _count_sdk_response(response, *args, **kwargs):
+    """requests response hook: fold LabKey SDK traffic into the HTTP stats."""
+    received = len(response.content or b"")
+    _http_pool.count("sdk_requests")
+    _http_pool.count("sdk_bytes_received", received)
+    body = response.request.body
+    tracing.record_http(
+        response.request.method, response.url, response.status_code,
+        response.elapsed.total_seconds() * 1000, received,
+        len(body) if isinstance(body, (bytes, str)) else 0,
+    )
+
+
 # =============================================================================
 # Shared Helper Functions
 # =============================================================================
 
+# Query dates are the server's local time, which the client does not know.
+# Whether a day or an 8AM window has ended is judged by the clock of the
+# westernmost time zone (UTC-12), so it has ended on every server; for
+# skyline.ms (US Pacific) that is 4-5 hours late.
+EARLIEST_UTC_OFFSET = timedelta(hours=-12)
+
+
+def earliest_server_time(moment: datetime = None) -> datetime:
+    """``moment`` (default now; naive = client local time) as naive UTC-12 local time."""
+    moment = moment or datetime.now()
+    return (moment.astimezone(timezone.utc) + EARLIEST_UTC_OFFSET).replace(tzinfo=None)
+
+
+def resolve_relative_date(start_date: str, end_date: str = None) -> tuple[str, str]:
+    """Expand a relative start date ("1y", "6m", "30d") to YYYY-MM-DD; end defaults to today."""
+    today = datetime.now()
+    end_date = end_date or today.strftime("%Y-%m-%d")
+    units = {"y": 365, "m": 30, "d": 1}
+    if start_date[-1:] in units and start_date[:-1].isdigit():
+        start_date = (today - timedelta(days=int(start_date[:-1]) * units[start_date[-1]])).strftime("%Y-%m-%d")
+    return start_date, end_date
+
+
+_server_contexts = {}  # (scheme, host, container_path) -> ServerContext
+_server_contexts_lock = threading.Lock()
+
+
 def get_server_context(server: str, container_path: str) -> ServerContext:
-    """Create a LabKey server context for API calls.
+    """Get the cached LabKey server context for API calls.
 
     Accepts ``server`` as a URL or bare hostname; the scheme determines
-    ``use_ssl`` (bare hostnames default to https).
+    ``use_ssl`` (bare hostnames default to https). Contexts are cached per
+    server and container so SDK queries share HTTP connections.
 
     Authentication is handled automatically via netrc file in standard locations:
     - ~/.netrc (Unix/Windows)
     - ~/_netrc (Windows)
     """
     scheme, host = _split_server(server)
-    return ServerContext(
-        host,
-        container_path,
-        use_ssl=(scheme == "https"),
-    )
+    key = (scheme, host.lower(), container_path)
+    with _server_contexts_lock:
+        context = _server_contexts.get(key)
+        if context is None:
+            context = ServerContext(
+                host,
+                container_path,
+                use_ssl=(scheme == "https"),
+            )
+            # The SDK talks through a requests.Session; reusing the context
+            # reuses that session's keep-alive connection pool.
+            session = getattr(context, "_session", None)
+            if session is not None:
+                session.auth = _NetrcAuth(server)
+                session.hooks["response"].append(_count_sdk_response)
+            _server_contexts[key] = context
+    return context
+
+
+# Parsed netrc entries keyed by host. The netrc files are re-stat'ed at most
+# once per _NETRC_STAT_INTERVAL seconds; a changed mtime/size drops the cache.
+_NETRC_STAT_INTERVAL = 2.0
+_netrc_lock = threading.Lock()
+_netrc_signature = None
+_netrc_checked_at = 0.0
+_netrc_hosts = {}  # host -> (login, password), or None if not in any netrc file
+
+
+def _netrc_paths() -> list[Path]:
+    home = Path.home()
+    return [home / ".netrc", home / "_netrc"]
+
+
+def _read_netrc_entry(host: str):
+    """Parse the netrc files for one host. Returns (login, password) or None."""
+    _http_pool.count("netrc_parses")
+    for netrc_path in _netrc_paths():
+        if netrc_path.exists():
+            try:
+                nrc = netrc.netrc(str(netrc_path))
+                auth = nrc.authenticators(host)
+                if auth:
+                    login, _, password = auth
+                    return login, password
+            except Exception:
+                continue
+    return None
+
+
+def _check_netrc_signature():
+    """Drop cached entries if a netrc file changed. Caller holds _netrc_lock."""
+    global _netrc_signature, _netrc_checked_at
+    now = time.monotonic()
+    if now - _netrc_checked_at < _NETRC_STAT_INTERVAL and _netrc_signature is not None:
+        return
+    _netrc_checked_at = now
+    _http_pool.count("netrc_stat_checks")
+
+    signature = []
+    for netrc_path in _netrc_paths():
+        try:
+            stat = netrc_path.stat()
+            signature.append((str(netrc_path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((str(netrc_path), None, None))
+    signature = tuple(signature)
+    if signature != _netrc_signature:
+        _netrc_signature = signature
+        _netrc_hosts.clear()
 
 
 def get_netrc_credentials(server: str) -> tuple[str, str]:
     """Get credentials from netrc file.
 
+    Parsed entries are memoized per host and invalidated when a netrc file's
+    mtime or size changes, so repeated calls do not re-read the file.
+
     Args:
         server: Server URL or hostname (optionally with ``:port``). Any
             ``scheme://`` prefix and ``:port`` suffix are stripped before
@@ -117,25 +672,31 @@ def get_netrc_credentials(server: str) -> tuple[str, str]:
     Raises:
         Exception: If no credentials found for server
     """
-    home = Path.home()
-    netrc_paths = [home / ".netrc", home / "_netrc"]
     _, host_with_port = _split_server(server)
     host = host_with_port.split(":", 1)[0]
 
-    for netrc_path in netrc_paths:
-        if netrc_path.exists():
-            try:
-                nrc = netrc.netrc(str(netrc_path))
-                auth = nrc.authenticators(host)
-                if auth:
-                    login, _, password = auth
-                    return login, password
-            except Exception:
-                continue
+    _http_pool.count("netrc_lookups")
+    with _netrc_lock:
+        _check_netrc_signature()
+        if host in _netrc_hosts:
+            entry = _netrc_hosts[host]
+        else:
+            entry = _read_netrc_entry(host)
+            _netrc_hosts[host] = entry
+
+    if entry:
+        return entry
 
     raise Exception(f"No credentials found for {host} in netrc")
 
 
+def get_basic_auth_header(server: str) -> str:
+    """Build the ``Authorization: Basic`` header value from netrc credentials."""
+    login, password = get_netrc_credentials(server)
+    credentials = base64.b64encode(f"{login}:{password}".encode()).decode()
+    return f"Basic {credentials}"
+
+
 def make_authenticated_request(
     server: str,
     url: str,
@@ -157,17 +718,11 @@ def make_authenticated_request(
     Returns:
         Response body as bytes
     """
-    login, password = get_netrc_credentials(server)
-
-    request = urllib.request.Request(url, data=data, method=method)
-    credentials = base64.b64encode(f"{login}:{password}".encode()).decode()
-    request.add_header("Authorization", f"Basic {credentials}")
-
+    request_headers = {"Authorization": get_basic_auth_header(server)}
     if headers:
-        for key, value in headers.items():
-            request.add_header(key, value)
+        request_headers.update(headers)
 
-    with urllib.request.urlopen(request, timeout=timeout) as response:
+    with http_open(url, method=method, data=data, headers=request_headers, timeout=timeout) as response:
         return response.read()
 
 
@@ -230,9 +785,11 @@ def get_daily_history_dir() -> Path:
     """Get the ai/.tmp/daily/history directory for persistent state files.
 
     Contains accumulated state that cannot be regenerated from the LabKey
-    database: exception-history.json (with filed issues, recorded fixes),
+    database: exception-history.sqlite (with filed issues, recorded fixes;
+    see exception_store.py) and its exception-history.json export,
     nightly-history.json (with fix annotations), computer-status.json
-    (with deactivation records and alarms).
+    (with deactivation records and alarms). Also holds run-metrics.sqlite,
+    a regenerable local mirror of per-run metrics (see metrics_store.py).
 
     Returns:
         Path to ai/.tmp/daily/history directory (created if needed)
@@ -259,11 +816,18 @@ def get_daily_summaries_dir() -> Path:
 # Authenticated Session with CSRF Support
 # =============================================================================
 
+# Cached sessions refresh their CSRF token after this many seconds, or
+# immediately when the server answers 401/403.
+CSRF_TTL_SECONDS = int(os.environ.get("LABKEY_MCP_CSRF_TTL", "1800"))
+
+
 class LabKeySession:
     """A simple session class for making authenticated LabKey requests with CSRF support.
 
     Following the pattern from ReportErrorDlg.cs:313-342.
-    Uses urllib and http.cookiejar to maintain session cookies.
+    Uses the pooled HTTP client and http.cookiejar to maintain session cookies.
+    Sessions are cached per server by get_labkey_session(); a 401/403 response
+    re-establishes the session and retries the request once.
     """
 
     def __init__(self, server: str, login: str, password: str):
@@ -271,12 +835,11 @@ class LabKeySession:
         self.login = login
         self.password = password
         self.csrf_token = None
+        self.established_at = 0.0
+        self._refresh_lock = threading.Lock()
 
         # Set up cookie jar for session management
         self.cookie_jar = http.cookiejar.CookieJar()
-        self.opener = urllib.request.build_opener(
-            urllib.request.HTTPCookieProcessor(self.cookie_jar)
-        )
 
         # Add basic auth header
         credentials = base64.b64encode(f"{login}:{password}".encode()).decode()
@@ -285,64 +848,101 @@ class LabKeySession:
     def _establish_session(self):
         """GET to establish session and get CSRF token."""
         url = f"{_server_url(self.server)}/project/home/begin.view?"
-        request = urllib.request.Request(url)
-        request.add_header("Authorization", self.auth_header)
-
-        with self.opener.open(request, timeout=30) as response:
-            # Extract CSRF token from cookies
-            for cookie in self.cookie_jar:
-                if cookie.name == "X-LABKEY-CSRF":
-                    self.csrf_token = cookie.value
-                    break
+
+        with self._open(url, include_csrf=False) as response:
+            response.read()
+
+        # Extract CSRF token from cookies
+        for cookie in self.cookie_jar:
+            if cookie.name == "X-LABKEY-CSRF":
+                self.csrf_token = cookie.value
+                break
 
         if not self.csrf_token:
             raise Exception("CSRF token not found in session cookies")
+        self.established_at = time.monotonic()
+        _http_pool.count("session_logins")
+
+    def is_stale(self) -> bool:
+        """True if the CSRF token is missing or older than CSRF_TTL_SECONDS."""
+        return not self.csrf_token or time.monotonic() - self.established_at > CSRF_TTL_SECONDS
+
+    def refresh(self, stale_token: str = None):
+        """Drop cookies, re-read credentials and fetch a new CSRF token.
+
+        Args:
+            stale_token: Token the caller saw fail (None for a new session).
+                If another thread has already replaced it, the refresh is
+                skipped.
+        """
+        with self._refresh_lock:
+            if self.csrf_token and self.csrf_token != stale_token:
+                return
+            self.login, self.password = get_netrc_credentials(self.server)
+            credentials = base64.b64encode(f"{self.login}:{self.password}".encode()).decode()
+            self.auth_header = f"Basic {credentials}"
+            self.cookie_jar.clear()
+            self.csrf_token = None
+            self._establish_session()
+
+    def _open(
+        self,
+        url: str,
+        method: str = "GET",
+        data=None,
+        headers: dict = None,
+        include_csrf: bool = True,
+    ) -> PooledResponse:
+        """Send a request with auth, CSRF header and session cookies.
+
+        ``data`` may be a callable returning the body bytes, so a body that
+        embeds the CSRF token can be rebuilt after a 401/403 refresh.
+        """
+        for attempt in range(2):
+            token = self.csrf_token
+            request_headers = {"Authorization": self.auth_header}
+            if include_csrf and token:
+                request_headers["X-LABKEY-CSRF"] = token
+            if headers:
+                request_headers.update(headers)
+            try:
+                return http_open(
+                    url,
+                    method=method,
+                    data=data() if callable(data) else data,
+                    headers=request_headers,
+                    timeout=30,
+                    cookie_jar=self.cookie_jar,
+                )
+            except urllib.error.HTTPError as e:
+                if attempt or not include_csrf or e.code not in (401, 403):
+                    raise
+                logger.info(f"HTTP {e.code} from {self.server}; refreshing LabKey session")
+                _http_pool.count("session_refreshes")
+                self.refresh(stale_token=token)
 
     def get(self, url: str, params: dict = None, headers: dict = None) -> dict:
         """Make a GET request with session cookies."""
         if params:
             url = f"{url}?{urlencode(params)}"
 
-        request = urllib.request.Request(url)
-        request.add_header("Authorization", self.auth_header)
-        if self.csrf_token:
-            request.add_header("X-LABKEY-CSRF", self.csrf_token)
-        if headers:
-            for key, value in headers.items():
-                request.add_header(key, value)
-
-        with self.opener.open(request, timeout=30) as response:
+        with self._open(url, headers=headers) as response:
             return json.loads(response.read().decode())
 
     def get_html(self, url: str, headers: dict = None) -> str:
         """Make a GET request and return raw HTML response."""
-        request = urllib.request.Request(url)
-        request.add_header("Authorization", self.auth_header)
-        if self.csrf_token:
-            request.add_header("X-LABKEY-CSRF", self.csrf_token)
-        if headers:
-            for key, value in headers.items():
-                request.add_header(key, value)
-
-        with self.opener.open(request, timeout=30) as response:
+        with self._open(url, headers=headers) as response:
             return response.read().decode("utf-8")
 
     def post_json(self, url: str, data: dict, headers: dict = None) -> tuple:
         """Make a POST request with JSON body. Returns (status_code, response_data)."""
-        request = urllib.request.Request(url, method="POST")
-        request.add_header("Authorization", self.auth_header)
-        request.add_header("Content-Type", "application/json")
-        if self.csrf_token:
-            request.add_header("X-LABKEY-CSRF", self.csrf_token)
+        request_headers = {"Content-Type": "application/json"}
         if headers:
-            for key, value in headers.items():
-                request.add_header(key, value)
-
+            request_headers.update(headers)
         json_data = json.dumps(data).encode("utf-8")
-        request.data = json_data
 
         try:
-            with self.opener.open(request, timeout=30) as response:
+            with self._open(url, "POST", json_data, request_headers) as response:
                 return response.status, json.loads(response.read().decode())
         except urllib.error.HTTPError as e:
             # If the error body is itself JSON (LabKey's standard error response),
@@ -360,48 +960,186 @@ class LabKeySession:
 
     def post_form(self, url: str, data: dict, headers: dict = None) -> tuple:
         """Make a POST request with form-encoded body. Returns (status_code, response_text)."""
-        request = urllib.request.Request(url, method="POST")
-        request.add_header("Authorization", self.auth_header)
-        request.add_header("Content-Type", "application/x-www-form-urlencoded")
-        if self.csrf_token:
-            request.add_header("X-LABKEY-CSRF", self.csrf_token)
+        request_headers = {"Content-Type": "application/x-www-form-urlencoded"}
         if headers:
-            for key, value in headers.items():
-                request.add_header(key, value)
-
-        form_data = urlencode(data).encode("utf-8")
-        request.data = form_data
+            request_headers.update(headers)
+        def form_data() -> bytes:
+            # Forms carry the CSRF token as a field too; keep it current
+            fields = dict(data)
+            if "X-LABKEY-CSRF" in fields and self.csrf_token:
+                fields["X-LABKEY-CSRF"] = self.csrf_token
+            return urlencode(fields).encode("utf-8")
 
         try:
-            with self.opener.open(request, timeout=30) as response:
+            with self._open(url, "POST", form_data, request_headers) as response:
                 return response.status, response.read().decode("utf-8", errors="replace")
         except urllib.error.HTTPError as e:
             return e.code, e.read().decode("utf-8", errors="replace")[:500]
 
 
+_labkey_sessions = {}  # server URL -> LabKeySession
+_labkey_sessions_lock = threading.Lock()
+
+
 def get_labkey_session(server: str) -> tuple:
-    """Create an authenticated session with CSRF token for LabKey POST requests.
+    """Get the cached authenticated session with CSRF token for LabKey POST requests.
 
     Following the pattern from ReportErrorDlg.cs:313-342:
     1. GET to /project/home/begin.view? to establish session
     2. Extract X-LABKEY-CSRF cookie
     3. Return session with CSRF token for use in POST requests
 
+    The session is reused across tool calls and only re-established after
+    CSRF_TTL_SECONDS or when the server rejects it with 401/403.
+
     Args:
         server: LabKey server hostname
 
     Returns:
         Tuple of (LabKeySession, csrf_token)
     """
-    login, password = get_netrc_credentials(server)
-
-    # Create session and establish CSRF token
-    session = LabKeySession(server, login, password)
-    session._establish_session()
+    key = _server_url(server).lower()
+    with _labkey_sessions_lock:
+        session = _labkey_sessions.get(key)
+        if session is None:
+            login, password = get_netrc_credentials(server)
+            session = LabKeySession(server, login, password)
+            _labkey_sessions[key] = session
+
+    if session.is_stale():
+        session.refresh(stale_token=session.csrf_token)
+    else:
+        _http_pool.count("session_reuses")
 
     return session, session.csrf_token
 
 
+# =============================================================================
+# Paged Query Iteration
+# =============================================================================
+
+# Rows per select_rows page. Large pulls are split into pages of this size
+# instead of one capped request, so nothing is silently truncated and at most
+# two pages (current + prefetched) are held in memory.
+SELECT_PAGE_SIZE = int(os.environ.get("LABKEY_MCP_PAGE_SIZE", "5000"))
+
+
+async def aiter_select_pages(
+    server: str,
+    container_path: str,
+    schema_name: str,
+    query_name: str,
+    page_size: int = None,
+    max_rows: int = None,
+    prefetch: bool = True,
+    **kwargs,
+):
+    """Fetch a query in offset/limit pages, yielding each page's rows as a list.
+
+    While the caller processes one page, the next is already being fetched
+    on the run_blocking executor (``prefetch``). Paging stops at a short
+    page, at the server's ``rowCount``, or at ``max_rows``.
+
+    A query that needs more than one page must pass a ``sort`` whose columns
+    are unique per row. The SQL ORDER BY is not reliable across LIMIT/OFFSET
+    requests, and rows tied on the sort can be skipped or repeated at a page
+    boundary. Without a sort, ValueError is raised before a second page is
+    requested.
+
+    Args:
+        server: LabKey server hostname
+        container_path: Container path
+        schema_name: Schema name
+        query_name: Query name
+        page_size: Rows per request (default LABKEY_MCP_PAGE_SIZE)
+        max_rows: Optional overall cap (None = all rows)
+        prefetch: Fetch the next page while the current one is consumed
+        **kwargs: Passed through to select_rows (filter_array, parameters,
+            sort, columns, ...)
+
+    Yields:
+        List of row dicts per page
+    """
+    page_size = page_size or SELECT_PAGE_SIZE
+    server_context = get_server_context(server, container_path)
+
+    def fetch(offset: int):
+        limit = page_size if max_rows is None else min(page_size, max_rows - offset)
+        task = asyncio.ensure_future(run_blocking(
+            server,
+            labkey.query.select_rows,
+            server_context=server_context,
+            schema_name=schema_name,
+            query_name=query_name,
+            max_rows=limit,
+            offset=offset,
+            **kwargs,
+        ))
+        return task, limit
+
+    offset = 0
+    pending = fetch(0)
+    try:
+        while pending is not None:
+            task, limit = pending
+            pending = None
+            result = await task
+            rows = result.get("rows", []) if result else []
+            total = result.get("rowCount") if result else None
+            next_offset = offset + len(rows)
+            more = (
+                len(rows) == limit
+                and (total is None or next_offset < total)
+                and (max_rows is None or next_offset < max_rows)
+            )
+            if more and not kwargs.get("sort"):
+                raise ValueError(
+                    f"{schema_name}.{query_name} returned more than one page ({page_size} rows); "
+                    f"paging needs a unique sort"
+                )
+            if more and prefetch:
+                pending = fetch(next_offset)
+            if rows:
+                yield rows
+            if more and not prefetch:
+                pending = fetch(next_offset)
+            offset = next_offset
+    finally:
+        if pending is not None:
+            pending[0].cancel()
+
+
+async def aiter_select_rows(
+    server: str,
+    container_path: str,
+    schema_name: str,
+    query_name: str,
+    **kwargs,
+):
+    """Row-at-a-time view of aiter_select_pages (same arguments)."""
+    async for rows in aiter_select_pages(server, container_path, schema_name, query_name, **kwargs):
+        for row in rows:
+            yield row
+
+
+async def select_all_rows(
+    server: str,
+    container_path: str,
+    schema_name: str,
+    query_name: str,
+    **kwargs,
+) -> dict:
+    """Paged drop-in for select_rows when a caller needs every row at once.
+
+    Returns:
+        Dict shaped like a select_rows result: {"rows": [...], "rowCount": n}
+    """
+    rows = []
+    async for page in aiter_select_pages(server, container_path, schema_name, query_name, **kwargs):
+        rows.extend(page)
+    return {"rows": rows, "rowCount": len(rows)}
+
+
 # =============================================================================
 # WAF Encoding/Decoding
 # =============================================================================
@@ -478,6 +1216,70 @@ def build_webdav_url(server: str, container_path: str, subfolder: str = "", file
     return "/".join(parts)
 
 
+_DAV = "{DAV:}"
+
+
+def _propfind(server: str, url: str, timeout: int = 30) -> tuple[dict, list[dict]]:
+    """PROPFIND one collection (Depth: 1) and parse the multistatus incrementally.
+
+    The response is parsed with ``iterparse`` straight off the socket and each
+    ``<response>`` element is discarded once read, so large folders never
+    build a full DOM in memory.
+
+    Args:
+        server: LabKey server hostname
+        url: Collection URL (must end with "/")
+        timeout: Request timeout in seconds
+
+    Returns:
+        Tuple of (self_entry, children). Each entry is a dict with name, href,
+        size, modified, etag and is_directory. self_entry describes the
+        collection itself and may be empty.
+    """
+    import xml.etree.ElementTree as ET
+
+    headers = {
+        "Authorization": get_basic_auth_header(server),
+        "Depth": "1",
+        "Content-Type": "application/xml",
+    }
+    self_path = unquote(urlsplit(url).path).rstrip("/")
+    self_entry = {}
+    children = []
+
+    with http_open(url, method="PROPFIND", headers=headers, timeout=timeout) as response:
+        for _, elem in ET.iterparse(response, events=("end",)):
+            if elem.tag != f"{_DAV}response":
+                continue
+
+            href_text = elem.findtext(f"{_DAV}href") or ""
+            prop = elem.find(f"{_DAV}propstat/{_DAV}prop")
+            if not href_text or prop is None:
+                elem.clear()
+                continue
+
+            resourcetype = prop.find(f"{_DAV}resourcetype")
+            size_text = prop.findtext(f"{_DAV}getcontentlength")
+            href_path = unquote(urlsplit(href_text).path).rstrip("/")
+            entry = {
+                "name": href_path.split("/")[-1],
+                "href": href_text,
+                "size": int(size_text) if size_text else 0,
+                "modified": prop.findtext(f"{_DAV}getlastmodified") or "",
+                "etag": prop.findtext(f"{_DAV}getetag") or "",
+                "is_directory": resourcetype is not None and resourcetype.find(f"{_DAV}collection") is not None,
+            }
+            elem.clear()
+
+            # Skip the directory itself (first entry)
+            if href_path == self_path:
+                self_entry = entry
+            elif entry["name"]:
+                children.append(entry)
+
+    return self_entry, children
+
+
 def list_files_webdav(
     server: str,
     container_path: str,
@@ -495,8 +1297,6 @@ def list_files_webdav(
     Returns:
         Dict with 'success', 'files' (list of dicts with name, size, modified), and optionally 'error'
     """
-    import xml.etree.ElementTree as ET
-
     url = build_webdav_url(server, container_path, subfolder)
     if not url.endswith("/"):
         url += "/"
@@ -504,83 +1304,207 @@ def list_files_webdav(
     logger.info(f"Listing files at {url}")
 
     try:
-        login, password = get_netrc_credentials(server)
-        credentials = base64.b64encode(f"{login}:{password}".encode()).decode()
+        _, entries = _propfind(server, url, timeout)
+
+        files = [
+            {
+                "name": e["name"],
+                "size": e["size"],
+                "modified": e["modified"],
+                "is_directory": e["is_directory"],
+            }
+            for e in entries
+        ]
+
+        # Sort: directories first, then by name
+        files.sort(key=lambda x: (not x["is_directory"], x["name"].lower()))
+
+        return {
+            "success": True,
+            "url": url.replace("%40", "@"),
+            "files": files,
+        }
+
+    except urllib.error.HTTPError as e:
+        logger.error(f"List failed: HTTP {e.code} {e.reason}")
+        return {"success": False, "error": f"HTTP {e.code}: {e.reason}"}
+    except Exception as e:
+        logger.error(f"List failed: {e}", exc_info=True)
+        return {"success": False, "error": str(e)}
 
-        # PROPFIND request with Depth: 1 to list immediate children
-        request = urllib.request.Request(url, method="PROPFIND")
-        request.add_header("Authorization", f"Basic {credentials}")
-        request.add_header("Depth", "1")
-        request.add_header("Content-Type", "application/xml")
 
-        with urllib.request.urlopen(request, timeout=timeout) as response:
-            xml_content = response.read().decode("utf-8")
+# Per-folder listings from the last recursive walk, keyed by folder URL.
+# A folder whose ETag/last-modified (as reported by its parent) is unchanged
+# is served from here together with its whole subtree, without a PROPFIND.
+WEBDAV_LISTING_CACHE_FILE = "webdav-listings.json"
+WEBDAV_LIST_WORKERS = int(os.environ.get("LABKEY_MCP_WEBDAV_WORKERS", "8"))
+_webdav_listing_lock = threading.Lock()
 
-        # Parse WebDAV XML response
-        # Namespace handling for DAV:
-        ns = {"d": "DAV:"}
-        root = ET.fromstring(xml_content)
 
-        files = []
-        for response_elem in root.findall("d:response", ns):
-            href = response_elem.find("d:href", ns)
-            if href is None:
-                continue
+def _load_webdav_listings() -> dict:
+    path = get_tmp_dir() / "cache" / WEBDAV_LISTING_CACHE_FILE
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning(f"Ignoring unreadable {path}")
+    return {}
 
-            href_text = href.text or ""
-            # Skip the directory itself (first entry)
-            if href_text.rstrip("/") == url.replace(_server_url(server), "").rstrip("/"):
-                continue
 
-            # Extract filename from href
-            filename = href_text.rstrip("/").split("/")[-1]
-            if not filename:
-                continue
+def _save_webdav_listings(listings: dict):
+    cache_dir = get_tmp_dir() / "cache"
+    cache_dir.mkdir(exist_ok=True)
+    path = cache_dir / WEBDAV_LISTING_CACHE_FILE
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(listings), encoding="utf-8")
+    os.replace(tmp_path, path)
 
-            # Get properties
-            propstat = response_elem.find("d:propstat", ns)
-            if propstat is None:
-                continue
 
-            prop = propstat.find("d:prop", ns)
-            if prop is None:
-                continue
+def list_files_webdav_recursive(
+    server: str,
+    container_path: str,
+    subfolder: str = "",
+    max_depth: int = None,
+    use_cache: bool = True,
+    max_workers: int = None,
+    timeout: int = 30,
+) -> dict:
+    """Recursively list a LabKey file repository with parallel PROPFINDs.
 
-            # Check if it's a collection (directory)
-            resourcetype = prop.find("d:resourcetype", ns)
-            is_dir = resourcetype is not None and resourcetype.find("d:collection", ns) is not None
+    Subfolders are listed concurrently on a dedicated pool of ``max_workers``
+    threads (separate from the run_blocking executor, which this function is
+    normally running on). With ``use_cache``, a subfolder whose ETag and
+    last-modified match the previous walk is not re-listed; its cached
+    subtree is reused instead.
 
-            # Get size and modified date
-            size_elem = prop.find("d:getcontentlength", ns)
-            size = int(size_elem.text) if size_elem is not None and size_elem.text else 0
+    Note that WebDAV servers generally update a collection's last-modified
+    only when its direct children change. Pass ``use_cache=False`` to force
+    a full walk after deep edits.
 
-            modified_elem = prop.find("d:getlastmodified", ns)
-            modified = modified_elem.text if modified_elem is not None else ""
+    Args:
+        server: LabKey server hostname
+        container_path: Container path (e.g., "/home/software/Skyline/daily")
+        subfolder: Optional subfolder within @files to start from
+        max_depth: Maximum folder depth below the start (None = unlimited)
+        use_cache: Skip unchanged subtrees using the previous walk's listings
+        max_workers: Concurrent PROPFINDs (default LABKEY_MCP_WEBDAV_WORKERS)
+        timeout: Per-request timeout in seconds
 
-            files.append({
-                "name": filename,
-                "size": size,
-                "modified": modified,
-                "is_directory": is_dir,
-            })
+    Returns:
+        Dict with 'success', 'url', 'files' (dicts with path relative to the
+        start, name, size, modified, etag, is_directory), 'folders_listed',
+        'folders_cached', 'elapsed', and optionally 'error'
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    root_url = build_webdav_url(server, container_path, subfolder)
+    if not root_url.endswith("/"):
+        root_url += "/"
+
+    logger.info(f"Recursively listing files at {root_url}")
+    start = time.monotonic()
+
+    with _webdav_listing_lock:
+        previous = _load_webdav_listings() if use_cache else {}
+    listings = {}  # folder url -> {"signature": [...], "entries": [...]}
+    files = []
+    folders_listed = 0
+    folders_cached = 0
+
+    def child_url(folder_url: str, entry: dict) -> str:
+        return f"{folder_url}{quote(entry['name'])}/"
+
+    def record(folder_url: str, rel_path: str, depth: int, signature: list, entries: list, pending: list):
+        listings[folder_url] = {"signature": signature, "entries": entries}
+        for entry in entries:
+            path = f"{rel_path}{entry['name']}"
+            files.append({**entry, "path": path})
+            if entry["is_directory"] and (max_depth is None or depth < max_depth):
+                pending.append((child_url(folder_url, entry), f"{path}/", depth + 1,
+                                [entry["etag"], entry["modified"]]))
 
-        # Sort: directories first, then by name
-        files.sort(key=lambda x: (not x["is_directory"], x["name"].lower()))
+    try:
+        workers = max_workers or WEBDAV_LIST_WORKERS
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="webdav-list") as pool:
+            # (folder url, relative path, depth, signature from parent listing)
+            pending = [(root_url, "", 0, None)]
+            running = {}
+            while pending or running:
+                while pending:
+                    folder_url, rel_path, depth, signature = pending.pop()
+                    cached = previous.get(folder_url)
+                    if signature and any(signature) and cached and cached.get("signature") == signature:
+                        folders_cached += 1
+                        record(folder_url, rel_path, depth, signature, cached["entries"], pending)
+                        continue
+                    future = pool.submit(_propfind, server, folder_url, timeout)
+                    running[future] = (folder_url, rel_path, depth, signature)
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder_url, rel_path, depth, signature = running.pop(future)
+                    self_entry, entries = future.result()
+                    folders_listed += 1
+                    if signature is None:
+                        signature = [self_entry.get("etag", ""), self_entry.get("modified", "")]
+                    entries = [{k: e[k] for k in ("name", "size", "modified", "etag", "is_directory")} for e in entries]
+                    record(folder_url, rel_path, depth, signature, entries, pending)
+
+        if use_cache:
+            with _webdav_listing_lock:
+                merged = _load_webdav_listings()
+                merged.update(listings)
+                _save_webdav_listings(merged)
+
+        files.sort(key=lambda x: x["path"].lower())
 
         return {
             "success": True,
-            "url": url.replace("%40", "@"),
+            "url": root_url.replace("%40", "@"),
             "files": files,
+            "folders_listed": folders_listed,
+            "folders_cached": folders_cached,
+            "elapsed": time.monotonic() - start,
         }
 
     except urllib.error.HTTPError as e:
-        logger.error(f"List failed: HTTP {e.code} {e.reason}")
+        logger.error(f"Recursive list failed: HTTP {e.code} {e.reason}")
         return {"success": False, "error": f"HTTP {e.code}: {e.reason}"}
     except Exception as e:
-        logger.error(f"List failed: {e}", exc_info=True)
+        logger.error(f"Recursive list failed: {e}", exc_info=True)
         return {"success": False, "error": str(e)}
 
 
+# Chunk size for streaming file transfers to and from disk
+TRANSFER_CHUNK_SIZE = 1024 * 1024
+
+
+def _throughput(num_bytes: int, elapsed: float) -> float:
+    """Transfer rate in MB/s."""
+    return num_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+
+
+def _content_range(value) -> tuple:
+    """(first byte, total length) from a Content-Range header; None for unknown parts."""
+    match = re.match(r"bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)", value or "")
+    if not match:
+        return None, None
+    first, total = match.groups()
+    return (int(first) if first else None), (int(total) if total != "*" else None)
+
+
+def _write_part_validator(meta_path: Path, response):
+    """Remember the ETag (or Last-Modified) of the version a .part is downloading."""
+    etag = response.getheader("ETag") or ""
+    validator = etag if etag and not etag.startswith("W/") else response.getheader("Last-Modified")
+    if validator:
+        meta_path.write_text(validator, encoding="utf-8")
+    else:
+        meta_path.unlink(missing_ok=True)
+
+
 def download_file_webdav(
     server: str,
     container_path: str,
@@ -591,44 +1515,100 @@ def download_file_webdav(
 ) -> dict:
     """Download a file from a LabKey container's file repository via WebDAV.
 
+    The body is streamed to ``<local_path>.part`` in TRANSFER_CHUNK_SIZE
+    chunks and renamed when complete, so memory stays flat for any file size.
+    If a ``.part`` file is left over from an interrupted download, the
+    transfer resumes from its end with an HTTP Range request. The remote
+    file's ETag (or Last-Modified) is kept in ``<local_path>.part.meta`` and
+    sent as If-Range, so a ``.part`` from an older version of the file is
+    discarded instead of having the new version's tail appended.
+
     Args:
         server: LabKey server hostname
         container_path: Container path (e.g., "/home/software/Skyline/daily")
         filename: Name of file to download
         subfolder: Optional subfolder within @files
         local_path: Local path to save file (defaults to ai/.tmp/)
-        timeout: Download timeout in seconds
+        timeout: Socket timeout in seconds (applies per read, not to the whole file)
 
     Returns:
-        Dict with 'success', 'local_path', 'size', and optionally 'error'
+        Dict with 'success', 'local_path', 'size', 'resumed_from', 'elapsed',
+        'mb_per_sec', and optionally 'error'
     """
     url = build_webdav_url(server, container_path, subfolder, filename)
 
+    # Determine local path
+    if local_path:
+        save_path = Path(local_path)
+    else:
+        save_path = get_tmp_dir() / filename
+    part_path = save_path.with_name(save_path.name + ".part")
+    meta_path = save_path.with_name(save_path.name + ".part.meta")
+
     logger.info(f"Downloading {url}")
 
     try:
-        login, password = get_netrc_credentials(server)
-        credentials = base64.b64encode(f"{login}:{password}".encode()).decode()
-
-        request = urllib.request.Request(url, method="GET")
-        request.add_header("Authorization", f"Basic {credentials}")
-
-        with urllib.request.urlopen(request, timeout=timeout) as response:
-            content = response.read()
-
-        # Determine local path
-        if local_path:
-            save_path = Path(local_path)
+        start = time.monotonic()
+        # A .part that turns out not to match the remote file is deleted and
+        # the download restarted once from the beginning
+        for attempt in range(2):
+            headers = {"Authorization": get_basic_auth_header(server)}
+            resume_from = part_path.stat().st_size if part_path.exists() else 0
+            validator = meta_path.read_text(encoding="utf-8").strip() if resume_from and meta_path.exists() else ""
+            if resume_from and validator:
+                headers["Range"] = f"bytes={resume_from}-"
+                headers["If-Range"] = validator
+                logger.info(f"Resuming {filename} from byte {resume_from:,}")
+            elif resume_from:
+                # No validator: cannot tell which version the .part holds
+                resume_from = 0
+
+            transferred = 0
+            matches = True
+            try:
+                with http_open(url, headers=headers, timeout=timeout) as response:
+                    if response.status == 206:
+                        matches = _content_range(response.getheader("Content-Range"))[0] == resume_from
+                    else:
+                        # Full body (Range ignored, or the file changed): start over
+                        resume_from = 0
+                        _write_part_validator(meta_path, response)
+                    if matches:
+                        with open(part_path, "ab" if resume_from else "wb") as f:
+                            while True:
+                                chunk = response.read(TRANSFER_CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                f.write(chunk)
+                                transferred += len(chunk)
+            except urllib.error.HTTPError as e:
+                # 416: the .part file may already hold the whole file
+                if e.code != 416 or not resume_from:
+                    raise
+                matches = _content_range(e.headers.get("Content-Range"))[1] == resume_from
+            if matches:
+                break
+            logger.warning(f"Discarding {part_path.name}: it does not match the remote file")
+            part_path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
         else:
-            save_path = get_tmp_dir() / filename
+            raise RuntimeError("Server response did not match the requested byte range")
+        elapsed = time.monotonic() - start
 
-        save_path.write_bytes(content)
+        os.replace(part_path, save_path)
+        meta_path.unlink(missing_ok=True)
+        size = save_path.stat().st_size
+        mb_per_sec = _throughput(transferred, elapsed)
+        logger.info(f"Downloaded {transferred:,} bytes in {elapsed:.1f}s ({mb_per_sec:.1f} MB/s)")
 
         return {
             "success": True,
             "url": url.replace("%40", "@"),
             "local_path": str(save_path),
-            "size": len(content),
+            "size": size,
+            "resumed_from": resume_from,
+            "elapsed": elapsed,
+            "mb_per_sec": mb_per_sec,
         }
 
     except urllib.error.HTTPError as e:
@@ -657,8 +1637,12 @@ def upload_file_webdav(
         remote_filename: Optional remote filename (defaults to local filename)
         timeout: Upload timeout in seconds (default 300 for large files)
 
+    The file is streamed from disk in HTTP_BLOCK_SIZE chunks rather than read
+    into memory, so installers of any size upload with flat memory use.
+
     Returns:
-        Dict with 'success', 'url', 'size', and optionally 'error'
+        Dict with 'success', 'url', 'size', 'elapsed', 'mb_per_sec', and
+        optionally 'error'
     """
     local_path = Path(local_file_path)
     if not local_path.exists():
@@ -672,28 +1656,29 @@ def upload_file_webdav(
     logger.info(f"Uploading {local_path.name} ({file_size:,} bytes) to {url}")
 
     try:
-        login, password = get_netrc_credentials(server)
-        credentials = base64.b64encode(f"{login}:{password}".encode()).decode()
-
-        # Read file content
-        with open(local_path, "rb") as f:
-            file_data = f.read()
-
         # Create PUT request
-        request = urllib.request.Request(url, data=file_data, method="PUT")
-        request.add_header("Authorization", f"Basic {credentials}")
-        request.add_header("Content-Type", "application/octet-stream")
-        request.add_header("Content-Length", str(file_size))
+        headers = {
+            "Authorization": get_basic_auth_header(server),
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(file_size),
+        }
 
-        with urllib.request.urlopen(request, timeout=timeout) as response:
-            status = response.status
-            logger.info(f"Upload complete: HTTP {status}")
+        start = time.monotonic()
+        with open(local_path, "rb") as f:
+            with http_open(url, method="PUT", data=f, headers=headers, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        elapsed = time.monotonic() - start
+        mb_per_sec = _throughput(file_size, elapsed)
+        logger.info(f"Upload complete: HTTP {status} in {elapsed:.1f}s ({mb_per_sec:.1f} MB/s)")
 
         return {
             "success": True,
             "url": url.replace("%40", "@"),  # Return human-readable URL
             "size": file_size,
             "status": status,
+            "elapsed": elapsed,
+            "mb_per_sec": mb_per_sec,
         }
 
     except urllib.error.HTTPError as e:
@@ -714,6 +1699,147 @@ def upload_file_webdav(
         return {"success": False, "error": str(e)}
 
 
+SYNC_MANIFEST_FILE = ".labkey-sync-manifest.json"
+SYNC_WORKERS = int(os.environ.get("LABKEY_MCP_SYNC_WORKERS", "4"))
+
+
+def _default_sync_dir(container_path: str, subfolder: str) -> Path:
+    slug = f"{container_path}/{subfolder}".strip("/").replace(" ", "_")
+    return get_tmp_dir() / "sync" / slug
+
+
+def sync_files_webdav(
+    server: str,
+    container_path: str,
+    subfolder: str = "",
+    local_dir: str = None,
+    max_workers: int = None,
+    timeout: int = 300,
+) -> dict:
+    """Mirror a LabKey file repository folder to a local directory.
+
+    Lists the whole remote tree with list_files_webdav_recursive (without
+    its subtree cache), then downloads
+    only files whose size or modified time differ from the manifest written
+    by the previous sync (or that are missing locally), using ``max_workers``
+    concurrent streams. When nothing changed, a repeat sync is listing-only.
+    Local files that no longer exist remotely are reported, never deleted.
+
+    Args:
+        server: LabKey server hostname
+        container_path: Container path (e.g., "/home/software/Skyline/daily")
+        subfolder: Optional subfolder within @files to mirror
+        local_dir: Local target directory (defaults to ai/.tmp/sync/{container}/{subfolder})
+        max_workers: Concurrent downloads (default LABKEY_MCP_SYNC_WORKERS)
+        timeout: Per-download socket timeout in seconds
+
+    Returns:
+        Dict with 'success', 'url', 'local_dir', 'downloaded', 'skipped',
+        'failed' (list of (path, error)), 'orphans', 'bytes', 'elapsed',
+        'mb_per_sec', and optionally 'error'
+    """
+    target = Path(local_dir) if local_dir else _default_sync_dir(container_path, subfolder)
+    target.mkdir(parents=True, exist_ok=True)
+    manifest_path = target / SYNC_MANIFEST_FILE
+    start = time.monotonic()
+
+    # Every folder is re-listed: the subtree cache would miss files changed
+    # two or more levels below a folder whose own timestamp did not change
+    listing = list_files_webdav_recursive(server, container_path, subfolder, use_cache=False)
+    if not listing["success"]:
+        return listing
+
+    manifest = {}
+    if manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8")).get("files", {})
+        except (OSError, ValueError):
+            logger.warning(f"Ignoring unreadable {manifest_path}")
+
+    remote_files = {f["path"]: f for f in listing["files"] if not f["is_directory"]}
+    to_download = []
+    skipped = 0
+    for path, remote in remote_files.items():
+        local_path = target / path
+        known = manifest.get(path)
+        if (
+            known
+            and known.get("size") == remote["size"]
+            and known.get("modified") == remote["modified"]
+            and local_path.exists()
+            and local_path.stat().st_size == remote["size"]
+        ):
+            skipped += 1
+        else:
+            to_download.append(remote)
+
+    logger.info(f"Sync {listing['url']} -> {target}: {len(to_download)} to download, {skipped} unchanged")
+
+    def fetch(remote: dict) -> dict:
+        rel_dir, _, filename = remote["path"].rpartition("/")
+        local_path = target / remote["path"]
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        remote_subfolder = "/".join(p for p in (subfolder.strip("/"), rel_dir) if p)
+        return download_file_webdav(
+            server=server,
+            container_path=container_path,
+            filename=filename,
+            subfolder=remote_subfolder,
+            local_path=str(local_path),
+            timeout=timeout,
+        )
+
+    downloaded = 0
+    transferred = 0
+    failed = []
+    new_manifest = {p: e for p, e in manifest.items() if p in remote_files}
+    if to_download:
+        workers = max_workers or SYNC_WORKERS
+        # Dedicated pool: this function itself runs on the run_blocking executor
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="webdav-sync") as pool:
+            for remote, result in zip(to_download, pool.map(fetch, to_download)):
+                if result["success"]:
+                    downloaded += 1
+                    transferred += result["size"] - result["resumed_from"]
+                    new_manifest[remote["path"]] = {
+                        "size": remote["size"],
+                        "modified": remote["modified"],
+                        "etag": remote["etag"],
+                    }
+                else:
+                    failed.append((remote["path"], result.get("error", "Unknown error")))
+                    new_manifest.pop(remote["path"], None)
+
+    orphans = sorted(
+        str(p.relative_to(target)).replace("\\", "/")
+        for p in target.rglob("*")
+        if p.is_file()
+        and p.name != SYNC_MANIFEST_FILE
+        and not p.name.endswith((".part", ".part.meta"))
+        and str(p.relative_to(target)).replace("\\", "/") not in remote_files
+    )
+
+    manifest_path.write_text(json.dumps({
+        "source": listing["url"],
+        "synced_at": datetime.now().isoformat(timespec="seconds"),
+        "files": new_manifest,
+    }, indent=2), encoding="utf-8")
+
+    elapsed = time.monotonic() - start
+    return {
+        "success": not failed,
+        "url": listing["url"],
+        "local_dir": str(target),
+        "downloaded": downloaded,
+        "skipped": skipped,
+        "failed": failed,
+        "orphans": orphans,
+        "bytes": transferred,
+        "elapsed": elapsed,
+        "mb_per_sec": _throughput(transferred, elapsed),
+    }
+
+
 # =============================================================================
 # Limited Discovery Tools
 # =============================================================================
@@ -732,6 +1858,55 @@ def register_tools(mcp):
         """[?] Report the LabKey server this MCP is configured to hit (verifies dev vs prod)."""
         return _server_url(DEFAULT_SERVER)
 
+    @mcp.tool()
+    async def get_http_diagnostics() -> str:
+        """[?] Connection pool and response cache stats (requests, reuse, bytes, cache hits)."""
+        stats = get_http_stats()
+        requests_sent = stats["requests"]
+        reuse_rate = stats["connections_reused"] / requests_sent * 100 if requests_sent else 0.0
+        lines = [
+            "HTTP client diagnostics (since server start):",
+            "",
+            f"  requests: {requests_sent}",
+            f"  connections_opened: {stats['connections_opened']}",
+            f"  connections_reused: {stats['connections_reused']} ({reuse_rate:.0f}% of requests)",
+            f"  stale_retries: {stats['stale_retries']}",
+            f"  bytes_sent: {stats['bytes_sent']:,}",
+            f"  bytes_received: {stats['bytes_received']:,}",
+            f"  sdk_requests: {stats['sdk_requests']}",
+            f"  sdk_bytes_received: {stats['sdk_bytes_received']:,}",
+            f"  session_logins: {stats['session_logins']} (CSRF TTL {CSRF_TTL_SECONDS}s)",
+            f"  session_reuses: {stats['session_reuses']}",
+            f"  session_refreshes: {stats['session_refreshes']} (after 401/403)",
+            f"  netrc_lookups: {stats['netrc_lookups']}",
+            f"  netrc_parses: {stats['netrc_parses']} (file reads; should stay near one per host)",
+            f"  netrc_stat_checks: {stats['netrc_stat_checks']}",
+            f"  pool_max_idle_per_host: {POOL_MAX_IDLE}",
+        ]
+        idle = stats["idle_connections"]
+        if idle:
+            lines.append("  idle_connections:")
+            for host, count in sorted(idle.items()):
+                lines.append(f"    {host}: {count}")
+
+        # Imported here: cache builds on this module
+        from .cache import get_cache_stats
+
+        cache = get_cache_stats()
+        lookups = cache["hits"] + cache["misses"]
+        hit_rate = cache["hits"] / lookups * 100 if lookups else 0.0
+        lines.extend([
+            "",
+            f"Response cache (ai/.tmp/cache/, {'enabled' if cache['enabled'] else 'disabled'}):",
+            f"  hits: {cache['hits']} ({hit_rate:.0f}% of cacheable lookups)",
+            f"  misses: {cache['misses']}",
+            f"  uncacheable: {cache['uncacheable']}",
+            f"  stores: {cache['stores']}",
+            f"  evictions: {cache['evictions']}",
+            f"  size: {cache['bytes'] / 1048576:.1f} MB of {cache['max_bytes'] / 1048576:.0f} MB",
+        ])
+        return "\n".join(lines)
+
     @mcp.tool()
     async def list_queries(
         schema_name: str,
@@ -740,7 +1915,9 @@ def register_tools(mcp):
     ) -> str:
         """[?] See available tables/queries. → development-guide.md"""
         try:
-            result = discovery_request(
+            result = await run_blocking(
+                server,
+                discovery_request,
                 server,
                 container_path,
                 "query-getQueries.api",
@@ -792,7 +1969,9 @@ def register_tools(mcp):
                 url = f"{url}?{urlencode(params)}"
 
             logger.info(f"Fetching page: {url}")
-            response_bytes = make_authenticated_request(server, url, timeout=60)
+            response_bytes = await run_blocking(
+                server, make_authenticated_request, server, url, timeout=60
+            )
             html_content = response_bytes.decode('utf-8', errors='replace')
 
             # Save to file to avoid overwhelming context
@@ -832,10 +2011,18 @@ def register_tools(mcp):
         container_path: str,
         subfolder: str = "",
         server: str = DEFAULT_SERVER,
+        recursive: bool = False,
+        max_depth: int = None,
+        use_cache: bool = True,
     ) -> str:
-        """[D] List files in container via WebDAV. → files.md"""
+        """[D] List files in container via WebDAV. recursive=True walks subfolders in parallel. → files.md"""
         try:
-            result = list_files_webdav(
+            if recursive:
+                return await _list_files_recursive(container_path, subfolder, server, max_depth, use_cache)
+
+            result = await run_blocking(
+                server,
+                list_files_webdav,
                 server=server,
                 container_path=container_path,
                 subfolder=subfolder,
@@ -861,6 +2048,96 @@ def register_tools(mcp):
             logger.error(f"Error listing files: {e}", exc_info=True)
             return f"Error listing files: {e}"
 
+    async def _list_files_recursive(
+        container_path: str,
+        subfolder: str,
+        server: str,
+        max_depth: int,
+        use_cache: bool,
+    ) -> str:
+        result = await run_blocking(
+            server,
+            list_files_webdav_recursive,
+            server=server,
+            container_path=container_path,
+            subfolder=subfolder,
+            max_depth=max_depth,
+            use_cache=use_cache,
+        )
+        if not result["success"]:
+            return f"List failed: {result.get('error', 'Unknown error')}"
+
+        files = result["files"]
+        total_bytes = sum(f["size"] for f in files if not f["is_directory"])
+        folder_count = sum(1 for f in files if f["is_directory"])
+        entry_lines = []
+        for f in files:
+            if f["is_directory"]:
+                entry_lines.append(f"  [DIR] {f['path']}/")
+            else:
+                entry_lines.append(f"  {f['path']} ({f['size'] / (1024 * 1024):.1f} MB)")
+
+        # Save full tree to file; large trees would overwhelm context
+        slug = f"{container_path}/{subfolder}".strip("/").replace("/", "_").replace(" ", "_")
+        tree_file = get_tmp_dir() / f"webdav-tree-{slug}.txt"
+        tree_file.write_text("\n".join([f"Files under {result['url']}:", ""] + entry_lines), encoding="utf-8")
+
+        lines = [
+            f"Files under {result['url']}: {len(files) - folder_count} files "
+            f"({total_bytes / (1024 * 1024):.1f} MB) in {folder_count} folders",
+            f"Folders listed: {result['folders_listed']}, unchanged (cached): {result['folders_cached']}, "
+            f"elapsed: {result['elapsed']:.1f}s",
+            f"Full tree saved to: {tree_file}",
+            "",
+        ]
+        lines.extend(entry_lines[:100])
+        if len(entry_lines) > 100:
+            lines.append(f"  ... {len(entry_lines) - 100} more (see {tree_file.name})")
+        return "\n".join(lines)
+
+    @mcp.tool()
+    async def sync_files(
+        container_path: str,
+        subfolder: str = "",
+        local_dir: str = None,
+        max_workers: int = None,
+        server: str = DEFAULT_SERVER,
+    ) -> str:
+        """[D] Mirror a container folder to local disk; downloads only changed files. → files.md"""
+        try:
+            result = await run_blocking(
+                server,
+                sync_files_webdav,
+                server=server,
+                container_path=container_path,
+                subfolder=subfolder,
+                local_dir=local_dir,
+                max_workers=max_workers,
+            )
+            if "downloaded" not in result:
+                return f"Sync failed: {result.get('error', 'Unknown error')}"
+
+            lines = [
+                f"Synced {result['url']} -> {result['local_dir']}",
+                f"  downloaded: {result['downloaded']} ({result['bytes'] / (1024 * 1024):.1f} MB, "
+                f"{result['mb_per_sec']:.1f} MB/s)",
+                f"  unchanged: {result['skipped']}",
+                f"  elapsed: {result['elapsed']:.1f}s",
+            ]
+            if result["failed"]:
+                lines.append(f"  failed: {len(result['failed'])}")
+                for path, error in result["failed"][:20]:
+                    lines.append(f"    {path}: {error}")
+            if result["orphans"]:
+                lines.append(f"  local-only (not deleted): {len(result['orphans'])}")
+                for path in result["orphans"][:20]:
+                    lines.append(f"    {path}")
+            return "\n".join(lines)
+
+        except Exception as e:
+            logger.error(f"Error syncing files: {e}", exc_info=True)
+            return f"Error syncing files: {e}"
+
     @mcp.tool()
     async def download_file(
         filename: str,
@@ -871,7 +2148,9 @@ def register_tools(mcp):
     ) -> str:
         """[D] Download file from container via WebDAV. Saves to ai/.tmp/. → files.md"""
         try:
-            result = download_file_webdav(
+            result = await run_blocking(
+                server,
+                download_file_webdav,
                 server=server,
                 container_path=container_path,
                 filename=filename,
@@ -881,7 +2160,13 @@ def register_tools(mcp):
 
             if result["success"]:
                 size_mb = result["size"] / (1024 * 1024)
-                return f"Downloaded {result['url']} ({size_mb:.1f} MB) to {result['local_path']}"
+                message = (
+                    f"Downloaded {result['url']} ({size_mb:.1f} MB) to {result['local_path']} "
+                    f"in {result['elapsed']:.1f}s ({result['mb_per_sec']:.1f} MB/s)"
+                )
+                if result["resumed_from"]:
+                    message += f", resumed from byte {result['resumed_from']:,}"
+                return message
             else:
                 return f"Download failed: {result.get('error', 'Unknown error')}"
 
@@ -899,7 +2184,9 @@ def register_tools(mcp):
     ) -> str:
         """[D] Upload file to container via WebDAV. → files.md"""
         try:
-            result = upload_file_webdav(
+            result = await run_blocking(
+                server,
+                upload_file_webdav,
                 server=server,
                 container_path=container_path,
                 local_file_path=local_file_path,
@@ -909,7 +2196,10 @@ def register_tools(mcp):
 
             if result["success"]:
                 size_mb = result["size"] / (1024 * 1024)
-                return f"Uploaded successfully: {result['url']} ({size_mb:.1f} MB)"
+                return (
+                    f"Uploaded successfully: {result['url']} ({size_mb:.1f} MB) "
+                    f"in {result['elapsed']:.1f}s ({result['mb_per_sec']:.1f} MB/s)"
+                )
             else:
                 error_msg = f"Upload failed: {result.get('error', 'Unknown error')}"
                 if "details" in result:
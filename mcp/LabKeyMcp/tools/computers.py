@@ -16,6 +16,7 @@ Use cases:
 - Hardware maintenance, OS upgrades, etc.
 """
 
+import asyncio
 import json
 import logging
 from datetime import date
@@ -25,8 +26,10 @@ from urllib.parse import quote
 
 import labkey
 
+from . import metrics_store
 from .common import (
     get_server_context,
+    run_blocking,
     get_daily_history_dir,
     get_labkey_session,
     _server_url,
@@ -189,7 +192,9 @@ def register_tools(mcp):
         """Deactivate computer from nightly expectations. → nightly-tests.md"""
         try:
             # Step 1: Get userId from computer name
-            user_id = _get_user_id(computer_name, server, container_path)
+            user_id = await run_blocking(
+                server, _get_user_id, computer_name, server, container_path
+            )
             if not user_id:
                 return (
                     f"Computer '{computer_name}' not found in {container_path}.\n"
@@ -197,12 +202,18 @@ def register_tools(mcp):
                 )
 
             # Step 2: Call setUserActive to deactivate
-            success, message = _set_computer_active(
-                user_id, active=False, server=server, container_path=container_path
+            success, message = await run_blocking(
+                server,
+                _set_computer_active,
+                user_id,
+                active=False,
+                server=server,
+                container_path=container_path,
             )
 
             if not success:
                 return f"Failed to deactivate {computer_name}: {message}"
+            await asyncio.to_thread(metrics_store.invalidate_trained_baselines, server, container_path)
 
             # Step 3: Record in local history with alarm
             history = _load_status_history()
@@ -264,7 +275,9 @@ def register_tools(mcp):
         """Reactivate computer for nightly expectations. → nightly-tests.md"""
         try:
             # Step 1: Get userId from computer name
-            user_id = _get_user_id(computer_name, server, container_path)
+            user_id = await run_blocking(
+                server, _get_user_id, computer_name, server, container_path
+            )
             if not user_id:
                 return (
                     f"Computer '{computer_name}' not found in {container_path}.\n"
@@ -272,12 +285,18 @@ def register_tools(mcp):
                 )
 
             # Step 2: Call setUserActive to reactivate
-            success, message = _set_computer_active(
-                user_id, active=True, server=server, container_path=container_path
+            success, message = await run_blocking(
+                server,
+                _set_computer_active,
+                user_id,
+                active=True,
+                server=server,
+                container_path=container_path,
             )
 
             if not success:
                 return f"Failed to reactivate {computer_name}: {message}"
+            await asyncio.to_thread(metrics_store.invalidate_trained_baselines, server, container_path)
 
             # Step 3: Update local history
             history = _load_status_history()
@@ -316,7 +335,9 @@ def register_tools(mcp):
             server_context = get_server_context(server, container_path)
 
             # Query all_computers which joins user and userdata with LEFT OUTER JOIN
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=TESTRESULTS_SCHEMA,
                 query_name="all_computers",
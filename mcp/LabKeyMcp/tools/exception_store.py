@@ -0,0 +1,562 @@
+"""Local SQLite store of exception history (fingerprints, reports, fixes).
+
+NOT exposed as MCP tools - used internally by exceptions.py.
+
+The history used to be one exception-history.json file, parsed in full and
+rewritten with indent=2 on every report and on every one-field annotation.
+Here each fingerprint is a row in ``exceptions`` and each report a row in
+``reports`` (keyed by fingerprint, unique on the post's RowId), so:
+- record_exception_issue / record_exception_fix update one row
+- query_exception_history ranks fingerprints in SQL and reads reports only
+  for the ones it shows
+- the daily report inserts its reports and ages out old fingerprints in one
+  transaction, without clobbering an annotation recorded meanwhile
+- re-running a report for the same day does not duplicate its reports
+- each fingerprint's report statistics (totals, unique users, emails,
+  versions) are kept in ``entry_stats`` and updated as reports are added,
+  so ranking costs one row per fingerprint rather than a scan of every
+  report ever stored
+
+The database runs in WAL mode so reads never wait on a writer.
+
+exception-history.json is still written (atomically) as a compatibility
+export with the same v2 layout, after each backfill and when a daily report
+asks for it (export_json reads every stored report). On first use an
+existing JSON file is imported, so deleting the database falls back to the
+last export and loses reports and annotations added since. Unlike
+run-metrics.sqlite this holds state that cannot be re-fetched (filed issues,
+recorded fixes), so keep it.
+"""
+
+import json
+import logging
+import os
+from bisect import insort
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+from .common import get_daily_history_dir
+
+logger = logging.getLogger("labkey_mcp")
+
+STORE_FILE = "exception-history.sqlite"
+EXPORT_FILE = "exception-history.json"
+# Bump when entry_stats gains a column or changes meaning; connect() then
+# rebuilds it from the reports table (tracked in PRAGMA user_version)
+STATS_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS exceptions (
+    fingerprint TEXT PRIMARY KEY,
+    signature TEXT,
+    frames TEXT,
+    exception_type TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    fix TEXT,
+    issue TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS exceptions_by_last_seen ON exceptions (last_seen);
+
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL REFERENCES exceptions (fingerprint) ON DELETE CASCADE,
+    row_id INTEGER,
+    date TEXT,
+    version TEXT,
+    installation_id TEXT,
+    email TEXT,
+    comment TEXT,
+    reply TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS reports_by_fingerprint ON reports (fingerprint, id);
+CREATE UNIQUE INDEX IF NOT EXISTS reports_by_row_id ON reports (row_id);
+CREATE INDEX IF NOT EXISTS reports_by_installation ON reports (fingerprint, installation_id);
+
+CREATE TABLE IF NOT EXISTS entry_stats (
+    fingerprint TEXT PRIMARY KEY REFERENCES exceptions (fingerprint) ON DELETE CASCADE,
+    total_reports INTEGER NOT NULL DEFAULT 0,
+    unique_users INTEGER NOT NULL DEFAULT 0,
+    emails TEXT NOT NULL DEFAULT '[]',
+    versions TEXT NOT NULL DEFAULT '[]',
+    replies_count INTEGER NOT NULL DEFAULT 0,
+    comments_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Entry and report keys with their own columns (JSON-encoded where noted);
+# any other keys round-trip through the 'extra' column
+_ENTRY_COLUMNS = ["fingerprint", "signature", "frames", "exception_type", "first_seen", "last_seen", "fix", "issue"]
+_ENTRY_JSON = {"frames", "fix", "issue"}
+_REPORT_COLUMNS = ["row_id", "date", "version", "installation_id", "email", "comment", "reply"]
+_REPORT_JSON = {"reply"}
+_STATS_COLUMNS = ["total_reports", "unique_users", "emails", "versions", "replies_count", "comments_count"]
+_STATS_JSON = {"emails", "versions"}
+
+_init_lock = threading.Lock()
+_initialized = set()  # Database paths whose schema has been created
+
+
+# =============================================================================
+# Database
+# =============================================================================
+
+def get_store_path() -> Path:
+    """Get ai/.tmp/daily/history/exception-history.sqlite."""
+    return get_daily_history_dir() / STORE_FILE
+
+
+def get_export_path() -> Path:
+    """Get ai/.tmp/daily/history/exception-history.json (compatibility export)."""
+    return get_daily_history_dir() / EXPORT_FILE
+
+
+def connect(path: Path = None) -> sqlite3.Connection:
+    """Open the store, creating tables and importing the JSON export on first use.
+
+    ``path`` defaults to get_store_path(); its JSON export is the same name
+    with a .json suffix.
+    """
+    path = Path(path or get_store_path())
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys=ON")
+    with _init_lock:
+        if str(path) not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _import_json_if_new(conn, path.with_suffix(".json"))
+            if conn.execute("PRAGMA user_version").fetchone()[0] != STATS_VERSION:
+                with conn:
+                    _recompute_stats(conn)
+                logger.info(f"Rebuilt exception statistics in {path} (version {STATS_VERSION})")
+            _initialized.add(str(path))
+    return conn
+
+
+def _import_json_if_new(conn: sqlite3.Connection, json_path: Path):
+    """Seed an empty store from an existing exception-history.json."""
+    if not json_path.exists() or conn.execute("SELECT 1 FROM meta LIMIT 1").fetchone():
+        return
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        logger.warning(f"Could not import exception history from {json_path}: {e}")
+        return
+    with conn:
+        _write_history(conn, history)
+    logger.info(f"Imported {len(history.get('exceptions', {}))} exception fingerprints from {json_path}")
+
+
+def _dumps(value) -> Optional[str]:
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _loads(value):
+    return None if value is None else json.loads(value)
+
+
+def _split_extra(item: dict, columns: list, json_columns: set) -> list:
+    """Column values for a dict, plus a JSON 'extra' for keys without a column."""
+    values = [_dumps(item.get(c)) if c in json_columns else item.get(c) for c in columns]
+    extra = {k: v for k, v in item.items() if k not in columns and k not in ('reports', '_stats')}
+    values.append(_dumps(extra) if extra else None)
+    return values
+
+
+def _insert_entry(conn: sqlite3.Connection, entry: dict):
+    conn.execute(
+        f"INSERT INTO exceptions ({', '.join(_ENTRY_COLUMNS)}, extra) "
+        f"VALUES ({', '.join('?' * (len(_ENTRY_COLUMNS) + 1))})",
+        _split_extra(entry, _ENTRY_COLUMNS, _ENTRY_JSON),
+    )
+    _insert_reports(conn, entry['fingerprint'], entry.get('reports', []))
+
+
+def _insert_reports(conn: sqlite3.Connection, fingerprint: str, reports: list) -> int:
+    """Insert reports, skipping posts (RowIds) already stored. Returns rows added."""
+    before = conn.total_changes
+    conn.executemany(
+        f"INSERT OR IGNORE INTO reports (fingerprint, {', '.join(_REPORT_COLUMNS)}, extra) "
+        f"VALUES ({', '.join('?' * (len(_REPORT_COLUMNS) + 2))})",
+        [[fingerprint] + _split_extra(r, _REPORT_COLUMNS, _REPORT_JSON) for r in reports],
+    )
+    return conn.total_changes - before
+
+
+def _append_report(conn: sqlite3.Connection, fingerprint: str, report: dict) -> bool:
+    """Insert one report and fold it into the entry's stats. False if already stored."""
+    cursor = conn.execute(
+        f"INSERT OR IGNORE INTO reports (fingerprint, {', '.join(_REPORT_COLUMNS)}, extra) "
+        f"VALUES ({', '.join('?' * (len(_REPORT_COLUMNS) + 2))})",
+        [fingerprint] + _split_extra(report, _REPORT_COLUMNS, _REPORT_JSON),
+    )
+    if not cursor.rowcount:
+        return False
+
+    row = conn.execute("SELECT * FROM entry_stats WHERE fingerprint = ?", (fingerprint,)).fetchone()
+    stats = _stats_from_row(row) if row else compute_stats([])
+    stats['total_reports'] += 1
+    installation_id = report.get('installation_id')
+    if installation_id and not conn.execute(
+        "SELECT 1 FROM reports WHERE fingerprint = ? AND installation_id = ? AND id != ? LIMIT 1",
+        (fingerprint, installation_id, cursor.lastrowid),
+    ).fetchone():
+        stats['unique_users'] += 1
+    for key, field in (('emails', 'email'), ('versions', 'version')):
+        value = report.get(field)
+        if value and value not in stats[key]:
+            insort(stats[key], value)
+    if report.get('reply'):
+        stats['replies_count'] += 1
+    if report.get('comment'):
+        stats['comments_count'] += 1
+    _write_stats(conn, [(fingerprint, stats)])
+    return True
+
+
+def _write_stats(conn: sqlite3.Connection, items):
+    """Store (fingerprint, stats dict) pairs in entry_stats."""
+    conn.executemany(
+        f"INSERT OR REPLACE INTO entry_stats (fingerprint, {', '.join(_STATS_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * (len(_STATS_COLUMNS) + 1))})",
+        [
+            [fp] + [_dumps(stats[c]) if c in _STATS_JSON else stats[c] for c in _STATS_COLUMNS]
+            for fp, stats in items
+        ],
+    )
+
+
+def _recompute_stats(conn: sqlite3.Connection):
+    """Rebuild entry_stats for every entry from the reports table (caller commits)."""
+    reports = {}
+    for row in conn.execute(
+        "SELECT fingerprint, version, installation_id, email, comment, reply FROM reports ORDER BY id"
+    ):
+        reports.setdefault(row['fingerprint'], []).append({
+            'version': row['version'],
+            'installation_id': row['installation_id'],
+            'email': row['email'],
+            'comment': row['comment'],
+            'reply': _loads(row['reply']),
+        })
+    conn.execute("DELETE FROM entry_stats")
+    _write_stats(conn, (
+        (row['fingerprint'], compute_stats(reports.get(row['fingerprint'], [])))
+        for row in conn.execute("SELECT fingerprint FROM exceptions ORDER BY rowid").fetchall()
+    ))
+    conn.execute(f"PRAGMA user_version = {STATS_VERSION}")
+
+
+def _set_meta(conn: sqlite3.Connection, key: str, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value)))
+
+
+def _write_history(conn: sqlite3.Connection, history: dict):
+    """Replace everything in the store with a v2 history dict (caller commits)."""
+    conn.execute("DELETE FROM reports")
+    conn.execute("DELETE FROM exceptions")
+    conn.execute("DELETE FROM meta")
+    for key, value in history.items():
+        if key != 'exceptions':
+            _set_meta(conn, key, value)
+    for fp, entry in history.get('exceptions', {}).items():
+        _insert_entry(conn, {**entry, 'fingerprint': fp})
+    _recompute_stats(conn)
+
+
+def compute_stats(reports: list) -> dict:
+    """Derived statistics of a reports list, as stored in entry_stats.
+
+    Returns dict with: total_reports, unique_users, emails, versions, replies_count, comments_count
+    """
+    unique_users = set()
+    emails = set()
+    versions = set()
+    replies_count = 0
+    comments_count = 0
+
+    for r in reports:
+        if r.get('installation_id'):
+            unique_users.add(r['installation_id'])
+        if r.get('email'):
+            emails.add(r['email'])
+        if r.get('version'):
+            versions.add(r['version'])
+        if r.get('reply'):
+            replies_count += 1
+        if r.get('comment'):
+            comments_count += 1
+
+    return {
+        'total_reports': len(reports),
+        'unique_users': len(unique_users),
+        'emails': sorted(emails),
+        'versions': sorted(versions),
+        'replies_count': replies_count,
+        'comments_count': comments_count,
+    }
+
+
+# =============================================================================
+# Reading
+# =============================================================================
+
+def _row_to_dict(row: sqlite3.Row, columns: list, json_columns: set, skip_none: set) -> dict:
+    item = {}
+    for c in columns:
+        value = _loads(row[c]) if c in json_columns else row[c]
+        if value is None and c in skip_none:
+            continue
+        item[c] = value
+    if row['extra']:
+        item.update(json.loads(row['extra']))
+    return item
+
+
+def _entry(row: sqlite3.Row, reports: Optional[list]) -> dict:
+    entry = _row_to_dict(row, _ENTRY_COLUMNS, _ENTRY_JSON, {'frames', 'issue'})
+    # Same key order as the original JSON entries
+    ordered = {k: entry.pop(k) for k in ('fingerprint', 'signature', 'frames', 'exception_type',
+                                         'first_seen', 'last_seen') if k in entry}
+    if reports is not None:
+        ordered['reports'] = reports
+    ordered.update(entry)
+    return ordered
+
+
+def _stats_from_row(row: sqlite3.Row) -> dict:
+    return {c: _loads(row[c]) if c in _STATS_JSON else row[c] for c in _STATS_COLUMNS}
+
+
+def _reports_by_fingerprint(conn: sqlite3.Connection, fingerprints: Optional[list]) -> dict:
+    query = f"SELECT fingerprint, {', '.join(_REPORT_COLUMNS)}, extra FROM reports"
+    params = []
+    if fingerprints is not None:
+        query += f" WHERE fingerprint IN ({', '.join('?' * len(fingerprints))})"
+        params = fingerprints
+    reports = {}
+    for row in conn.execute(query + " ORDER BY id", params):
+        reports.setdefault(row['fingerprint'], []).append(
+            _row_to_dict(row, _REPORT_COLUMNS, _REPORT_JSON, {'comment', 'reply'})
+        )
+    return reports
+
+
+def get_meta(conn: sqlite3.Connection) -> dict:
+    return {row['key']: _loads(row['value']) for row in conn.execute("SELECT key, value FROM meta ORDER BY rowid")}
+
+
+def load_history(path: Path = None) -> dict:
+    """The whole history as the v2 dict stored in exception-history.json."""
+    with closing(connect(path)) as conn:
+        history = get_meta(conn)
+        reports = _reports_by_fingerprint(conn, None)
+        history['exceptions'] = {
+            row['fingerprint']: _entry(row, reports.get(row['fingerprint'], []))
+            for row in conn.execute("SELECT * FROM exceptions ORDER BY rowid")
+        }
+    return history
+
+
+def get_entries(fingerprints, path: Path = None, with_reports: bool = True) -> dict:
+    """History entries for just these fingerprints.
+
+    Each entry carries its stored statistics under '_stats' (see
+    compute_stats). With with_reports=False the 'reports' list is not read,
+    which is all ranking and status annotations need.
+    """
+    fingerprints = list(dict.fromkeys(fingerprints))
+    entries = {}
+    with closing(connect(path)) as conn:
+        for start in range(0, len(fingerprints), 500):
+            chunk = fingerprints[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            reports = _reports_by_fingerprint(conn, chunk) if with_reports else None
+            stats = {
+                row['fingerprint']: _stats_from_row(row)
+                for row in conn.execute(f"SELECT * FROM entry_stats WHERE fingerprint IN ({placeholders})", chunk)
+            }
+            for row in conn.execute(
+                f"SELECT * FROM exceptions WHERE fingerprint IN ({placeholders}) ORDER BY rowid", chunk
+            ):
+                fp = row['fingerprint']
+                entry = _entry(row, reports.get(fp, []) if with_reports else None)
+                entry['_stats'] = stats.get(fp) or compute_stats(entry.get('reports', []))
+                entries[fp] = entry
+    return entries
+
+
+def get_index_entries(path: Path = None) -> dict:
+    """fingerprint -> {'frames', 'signature'} for every entry (TraceIndex input)."""
+    with closing(connect(path)) as conn:
+        return {
+            row['fingerprint']: {'frames': _loads(row['frames']), 'signature': row['signature']}
+            for row in conn.execute("SELECT fingerprint, frames, signature FROM exceptions ORDER BY rowid")
+        }
+
+
+def count_entries(path: Path = None) -> int:
+    with closing(connect(path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM exceptions").fetchone()[0]
+
+
+def top_priority(min_users: int, show_fixed: bool, limit: int, path: Path = None) -> tuple:
+    """Highest-priority fingerprints, scored in SQL from entry_stats.
+
+    The score mirrors exceptions._get_priority_score: 10 per unique user,
+    20 if any report has an email, plus reports capped at 10. Ties keep
+    history order. Reads one stats row per fingerprint, not the reports.
+
+    Returns:
+        ([(score, fingerprint)], history meta dict)
+    """
+    query = """
+        SELECT e.fingerprint,
+               s.unique_users * 10 + (s.emails != '[]') * 20 + MIN(s.total_reports, 10) AS score
+        FROM exceptions e JOIN entry_stats s ON s.fingerprint = e.fingerprint
+        WHERE s.unique_users >= ? AND (? OR e.fix IS NULL)
+        ORDER BY score DESC, e.rowid
+        LIMIT ?
+    """
+    with closing(connect(path)) as conn:
+        rows = conn.execute(query, (min_users, int(show_fixed), max(limit, 0))).fetchall()
+        meta = get_meta(conn)
+    return [(row['score'], row['fingerprint']) for row in rows], meta
+
+
+# =============================================================================
+# Writing
+# =============================================================================
+
+def record_reports(exceptions: list, report_date: str, meta_defaults: dict, path: Path = None) -> int:
+    """Add one day's parsed exceptions in a single transaction.
+
+    New fingerprints get an entry; existing ones get last_seen = report_date
+    and their frames filled in if missing. Reports whose RowId is already
+    stored are skipped; each new one is folded into its entry's stats.
+
+    Args:
+        exceptions: Dicts with fingerprint, signature_frames, frames, title,
+            row_id, version, installation_id, email
+        report_date: YYYY-MM-DD
+        meta_defaults: History-level keys (_schema_version, ...) to set if absent
+
+    Returns:
+        Number of reports added
+    """
+    added = 0
+    with closing(connect(path)) as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for key, value in meta_defaults.items():
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value)))
+        _set_meta(conn, '_last_updated', report_date)
+        for exc in exceptions:
+            fp = exc['fingerprint']
+            sig_frames = exc.get('signature_frames', [])
+            title = exc.get('title')
+            conn.execute(
+                """
+                INSERT INTO exceptions (fingerprint, signature, frames, exception_type, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (fingerprint) DO UPDATE SET
+                    last_seen = excluded.last_seen,
+                    frames = COALESCE(NULLIF(exceptions.frames, '[]'), excluded.frames)
+                """,
+                (
+                    fp,
+                    ' → '.join(sig_frames) if sig_frames else '(unknown)',
+                    _dumps(exc.get('frames', [])),
+                    title.split('|')[0].strip() if title else None,
+                    report_date,
+                    report_date,
+                ),
+            )
+            conn.execute("INSERT OR IGNORE INTO entry_stats (fingerprint) VALUES (?)", (fp,))
+            added += _append_report(conn, fp, {
+                'row_id': exc.get('row_id'),
+                'date': report_date,
+                'version': exc.get('version'),
+                'installation_id': exc.get('installation_id'),
+                'email': exc.get('email'),
+            })
+    return added
+
+
+def age_out(cutoff: str, path: Path = None) -> int:
+    """Delete fingerprints (and their reports) last seen before cutoff. Returns count removed."""
+    with closing(connect(path)) as conn, conn:
+        return conn.execute(
+            "DELETE FROM exceptions WHERE last_seen != '' AND last_seen < ?", (cutoff,)
+        ).rowcount
+
+
+def set_annotation(fingerprint: str, kind: str, data: dict, updated: str, path: Path = None) -> Optional[dict]:
+    """Set an entry's 'fix' or 'issue', touching only that row.
+
+    Returns:
+        The updated entry with its reports, or None if the fingerprint is unknown
+    """
+    if kind not in ('fix', 'issue'):
+        raise ValueError(f"Unknown annotation: {kind}")
+    with closing(connect(path)) as conn, conn:
+        changed = conn.execute(
+            f"UPDATE exceptions SET {kind} = ? WHERE fingerprint = ?", (_dumps(data), fingerprint)
+        ).rowcount
+        if not changed:
+            return None
+        _set_meta(conn, '_last_updated', updated)
+    return get_entries([fingerprint], path)[fingerprint]
+
+
+def replace_history(history: dict, path: Path = None) -> tuple:
+    """Replace the store with a freshly built history, keeping fixes and issues.
+
+    Annotations are read and re-applied inside the same transaction, so one
+    recorded while a backfill runs is not lost.
+
+    Returns:
+        (fixes_applied, issues_applied)
+    """
+    fixes_applied = issues_applied = 0
+    with closing(connect(path)) as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        preserved = conn.execute(
+            "SELECT fingerprint, fix, issue FROM exceptions WHERE fix IS NOT NULL OR issue IS NOT NULL"
+        ).fetchall()
+        _write_history(conn, history)
+        for row in preserved:
+            fix, issue = _loads(row['fix']), _loads(row['issue'])
+            if fix and conn.execute(
+                "UPDATE exceptions SET fix = ? WHERE fingerprint = ?", (row['fix'], row['fingerprint'])
+            ).rowcount:
+                fixes_applied += 1
+            if issue and conn.execute(
+                "UPDATE exceptions SET issue = ? WHERE fingerprint = ?", (row['issue'], row['fingerprint'])
+            ).rowcount:
+                issues_applied += 1
+    return fixes_applied, issues_applied
+
+
+def export_json(path: Path = None) -> Path:
+    """Write the history to exception-history.json atomically. Returns the file path."""
+    store_path = Path(path or get_store_path())
+    export_path = store_path.with_suffix(".json")
+    history = load_history(store_path)
+    tmp_path = export_path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, export_path)
+    logger.info(f"Exported exception history to {export_path}")
+    return export_path
@@ -9,8 +9,14 @@ Enhanced with stack trace normalization (2025-12-31) to:
 - Track software versions for known-fix correlation
 """
 
+import asyncio
 import logging
+import multiprocessing
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 
 import labkey
@@ -18,15 +24,19 @@ from labkey.query import QueryFilter
 
 from .common import (
     get_server_context,
+    run_blocking,
+    select_all_rows,
+    aiter_select_pages,
     get_tmp_dir,
-    get_daily_history_dir,
     DEFAULT_SERVER,
     DEFAULT_CONTAINER,
     EXCEPTION_SCHEMA,
     EXCEPTION_QUERY,
     _server_url,
 )
-from .stacktrace import normalize_stack_trace
+from .stacktrace import normalize_stack_trace, normalize_stack_traces
+from .traceindex import TraceIndex, trace_frames
+from . import exception_store
 
 logger = logging.getLogger("labkey_mcp")
 
@@ -48,8 +58,7 @@ USER_COMMENTS_PATTERN = re.compile(
 )
 STACK_TRACE_SEPARATOR = '--------------------'
 
-# History settings
-HISTORY_FILE = 'exception-history.json'
+# History settings (stored in exception_store)
 RETENTION_MONTHS = 9  # Cover full release cycle + buffer
 HISTORY_SCHEMA_VERSION = 2  # v2: stores individual reports with row_ids
 
@@ -178,198 +187,36 @@ def _parse_exception_body(body: str) -> dict:
     return result
 
 
-def _get_history_path():
-    """Get path to exception history file in ai/.tmp/daily/history/."""
-    return get_daily_history_dir() / HISTORY_FILE
-
-
-def _load_exception_history() -> dict:
-    """Load existing exception history or create empty structure."""
-    import json
-    history_path = _get_history_path()
-
-    if history_path.exists():
-        try:
-            with open(history_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            logger.warning(f"Could not load exception history: {e}")
-
-    # Return empty structure (schema v2: individual reports with row_ids)
+def _history_meta() -> dict:
+    """History-level keys for a new exception history (schema v2)."""
     return {
         '_schema_version': HISTORY_SCHEMA_VERSION,
         '_last_updated': None,
         '_retention_months': RETENTION_MONTHS,
         '_release_anchor': MAJOR_RELEASE_VERSION,
         '_release_date': MAJOR_RELEASE_DATE,
-        'exceptions': {}
     }
 
 
-def _extract_fix_annotations(old_history: dict) -> dict:
-    """Extract fix annotations from old history format.
-
-    Returns dict mapping fingerprint -> fix info.
-    """
-    fixes = {}
-    for fp, entry in old_history.get('exceptions', {}).items():
-        if entry.get('fix'):
-            fixes[fp] = entry['fix']
-    return fixes
-
-
-def _extract_issue_annotations(old_history: dict) -> dict:
-    """Extract issue annotations from old history.
-
-    Returns dict mapping fingerprint -> issue info.
-    """
-    issues = {}
-    for fp, entry in old_history.get('exceptions', {}).items():
-        if entry.get('issue'):
-            issues[fp] = entry['issue']
-    return issues
-
-
-def _apply_fix_annotations(history: dict, fixes: dict) -> int:
-    """Apply fix annotations to history entries.
-
-    Returns count of fixes applied.
-    """
-    applied = 0
-    for fp, fix_info in fixes.items():
-        if fp in history.get('exceptions', {}):
-            history['exceptions'][fp]['fix'] = fix_info
-            applied += 1
-    return applied
-
-
-def _apply_issue_annotations(history: dict, issues: dict) -> int:
-    """Apply issue annotations to history entries.
-
-    Returns count of issues applied.
-    """
-    applied = 0
-    for fp, issue_info in issues.items():
-        if fp in history.get('exceptions', {}):
-            history['exceptions'][fp]['issue'] = issue_info
-            applied += 1
-    return applied
-
-
-def _save_exception_history(history: dict, report_date: str):
-    """Save exception history to file."""
-    import json
-    history['_last_updated'] = report_date
-    history_path = _get_history_path()
-
-    with open(history_path, 'w', encoding='utf-8') as f:
-        json.dump(history, f, indent=2, ensure_ascii=False)
-
-    logger.info(f"Saved exception history to {history_path}")
-
-
-def _age_out_old_entries(history: dict, current_date: str) -> int:
-    """Remove entries not seen in RETENTION_MONTHS. Returns count removed."""
+def _retention_cutoff(current_date: str) -> str:
+    """Entries last seen before this date are aged out (RETENTION_MONTHS back)."""
     current = datetime.strptime(current_date, "%Y-%m-%d")
     # Approximate months as 30 days each
-    cutoff = current - timedelta(days=RETENTION_MONTHS * 30)
-    cutoff_str = cutoff.strftime("%Y-%m-%d")
-
-    to_remove = []
-    for fp, entry in history.get('exceptions', {}).items():
-        last_seen = entry.get('last_seen', '')
-        if last_seen and last_seen < cutoff_str:
-            to_remove.append(fp)
-
-    for fp in to_remove:
-        del history['exceptions'][fp]
-
-    if to_remove:
-        logger.info(f"Aged out {len(to_remove)} exceptions not seen since {cutoff_str}")
-
-    return len(to_remove)
-
-
-def _update_history_with_exceptions(history: dict, parsed_exceptions: list, report_date: str):
-    """Merge new exceptions into history.
-
-    Schema v2: Stores individual reports with row_id, date, version, installation_id, email.
-    Computed fields (total_reports, unique_users, etc.) are derived from reports list.
-
-    Args:
-        history: The history dict to update (modified in place)
-        parsed_exceptions: List of parsed exception dicts with fingerprint, etc.
-        report_date: Current report date YYYY-MM-DD
-    """
-    exceptions_db = history.setdefault('exceptions', {})
-
-    for exc in parsed_exceptions:
-        fp = exc['fingerprint']
-        row_id = exc.get('row_id')
-        install_id = exc.get('installation_id')
-        version = exc.get('version')
-        email = exc.get('email')
-        sig_frames = exc.get('signature_frames', [])
-
-        if fp not in exceptions_db:
-            # New fingerprint - create entry with v2 schema
-            exceptions_db[fp] = {
-                'fingerprint': fp,
-                'signature': ' → '.join(sig_frames) if sig_frames else '(unknown)',
-                'exception_type': exc.get('title', '').split('|')[0].strip() if exc.get('title') else None,
-                'first_seen': report_date,
-                'last_seen': report_date,
-                'reports': [],  # v2: list of individual reports
-                'fix': None,
-            }
-
-        entry = exceptions_db[fp]
-        entry['last_seen'] = report_date
-
-        # Add individual report (v2 schema)
-        report_entry = {
-            'row_id': row_id,
-            'date': report_date,
-            'version': version,
-            'installation_id': install_id,
-            'email': email,
-        }
-        entry['reports'].append(report_entry)
+    return (current - timedelta(days=RETENTION_MONTHS * 30)).strftime("%Y-%m-%d")
 
 
 def _get_entry_stats(entry: dict) -> dict:
-    """Compute derived statistics from an exception entry's reports list.
+    """Derived statistics for an exception entry.
+
+    Entries read from exception_store carry the stats it keeps up to date as
+    reports arrive ('_stats'); others are computed from their reports list.
 
     Returns dict with: total_reports, unique_users, emails, versions, replies_count, comments_count
     """
-    reports = entry.get('reports', [])
-
-    unique_users = set()
-    emails = set()
-    versions = set()
-    replies_count = 0
-    comments_count = 0
-
-    for r in reports:
-        if r.get('installation_id'):
-            unique_users.add(r['installation_id'])
-        if r.get('email'):
-            emails.add(r['email'])
-        if r.get('version'):
-            versions.add(r['version'])
-        if r.get('reply'):
-            replies_count += 1
-        if r.get('comment'):
-            comments_count += 1
-
-    return {
-        'total_reports': len(reports),
-        'unique_users': len(unique_users),
-        'emails': sorted(emails),
-        'versions': sorted(versions),
-        'replies_count': replies_count,
-        'comments_count': comments_count,
-    }
+    stats = entry.get('_stats')
+    if stats is None:
+        stats = exception_store.compute_stats(entry.get('reports', []))
+    return stats
 
 
 def _get_priority_score(entry: dict) -> int:
@@ -506,6 +353,169 @@ def _needs_attention(entry: dict, today_versions: list) -> tuple:
     return (True, 'recurring', f"{stats['total_reports']} reports from {stats['unique_users']} users")
 
 
+# Backfill fingerprinting: parsing and normalizing a multi-year window of
+# posts is CPU-bound, so chunks of rows go to worker processes as pages
+# arrive and the returned fingerprint groups are merged in page order.
+# LABKEY_MCP_FINGERPRINT_WORKERS=1 keeps it in one (non-event-loop) thread.
+FINGERPRINT_WORKERS = int(os.environ.get("LABKEY_MCP_FINGERPRINT_WORKERS", str(os.cpu_count() or 1)))
+FINGERPRINT_CHUNK_ROWS = 1000
+# Below this many rows, spawning workers costs more than it saves
+FINGERPRINT_POOL_MIN_ROWS = 10000
+_FINGERPRINT_FIELDS = ("RowId", "EntityId", "Title", "Created", "FormattedBody")
+
+
+def _fingerprint_exception_rows(rows: list) -> tuple:
+    """Parse and fingerprint a chunk of exception posts (runs in a worker process).
+
+    Rows must be in Created order. Returns (groups, unparseable_row_ids)
+    where groups maps fingerprint -> history entry for just this chunk, in
+    first-seen order. Each report keeps the post's EntityId under
+    '_entity_id' so replies can be attached once all replies are fetched.
+    """
+    groups = {}
+    unparseable_rows = []
+    parsed_rows = [_parse_exception_body(row.get("FormattedBody", "")) for row in rows]
+    norms = normalize_stack_traces([parsed['stack_trace'] for parsed in parsed_rows])
+
+    for row, parsed, norm in zip(rows, parsed_rows, norms):
+        row_id = row.get("RowId")
+        created = row.get("Created", "")
+
+        # Extract date from Created timestamp
+        if isinstance(created, str) and "T" in created:
+            report_date = created.split("T")[0]
+        elif isinstance(created, str) and " " in created:
+            report_date = created.split(" ")[0]
+        else:
+            report_date = str(created)[:10]
+
+        fp = norm.fingerprint
+        sig_frames = norm.signature_frames
+
+        # Track unparseable rows (empty fingerprint = no frames parsed)
+        if norm.frame_count == 0:
+            if row_id:
+                unparseable_rows.append(row_id)
+
+        if fp not in groups:
+            groups[fp] = {
+                'fingerprint': fp,
+                'signature': ' → '.join(sig_frames) if sig_frames else '(unknown)',
+                'frames': trace_frames(norm),
+                'exception_type': row.get('Title', '').split('|')[0].strip() if row.get('Title') else None,
+                'first_seen': report_date,
+                'last_seen': report_date,
+                'reports': [],
+                'fix': None,
+            }
+
+        entry = groups[fp]
+        entry['last_seen'] = report_date
+
+        report_entry = {
+            'row_id': row_id,
+            'date': report_date,
+            'version': parsed.get('version'),
+            'installation_id': parsed.get('installation_id'),
+            'email': parsed.get('email'),
+        }
+        if parsed.get('user_comment'):
+            report_entry['comment'] = parsed['user_comment']
+        report_entry['_entity_id'] = row.get("EntityId")
+
+        entry['reports'].append(report_entry)
+
+    return groups, unparseable_rows
+
+
+def _merge_fingerprint_groups(exceptions_db: dict, groups: dict):
+    """Merge one chunk's groups into exceptions_db (chunks must arrive in order)."""
+    for fp, group in groups.items():
+        entry = exceptions_db.get(fp)
+        if entry is None:
+            exceptions_db[fp] = group
+        else:
+            entry['reports'].extend(group['reports'])
+            entry['last_seen'] = group['last_seen']
+
+
+async def _fingerprint_exception_pages(pages) -> tuple:
+    """Fingerprint exception posts streamed from aiter_select_pages.
+
+    Chunks of FINGERPRINT_CHUNK_ROWS rows are handed to a process pool as
+    soon as their page arrives, with at most two chunks per worker in flight.
+    The pool starts once FINGERPRINT_POOL_MIN_ROWS rows have arrived, so
+    short backfills stay in a thread. If the pool cannot start or a worker
+    dies, the affected chunks are redone in a thread and the rest of the
+    backfill continues without the pool.
+
+    Returns:
+        (exceptions_db, unparseable_row_ids, row_count)
+    """
+    loop = asyncio.get_running_loop()
+    exceptions_db = {}
+    unparseable_rows = []
+    row_count = 0
+    pool = None
+    use_pool = FINGERPRINT_WORKERS > 1
+    max_pending = max(FINGERPRINT_WORKERS, 1) * 2
+    pending = deque()  # (chunk, future) in submission order
+
+    def submit(chunk: list):
+        nonlocal pool, use_pool
+        if use_pool and pool is None and row_count >= FINGERPRINT_POOL_MIN_ROWS:
+            try:
+                pool = ProcessPoolExecutor(
+                    max_workers=FINGERPRINT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Fingerprinting in-process; could not start worker pool: {e}")
+                use_pool = False
+        if pool is not None:
+            future = loop.run_in_executor(pool, _fingerprint_exception_rows, chunk)
+        else:
+            future = asyncio.ensure_future(asyncio.to_thread(_fingerprint_exception_rows, chunk))
+        pending.append((chunk, future))
+
+    async def merge_oldest():
+        nonlocal pool, use_pool
+        chunk, future = pending.popleft()
+        try:
+            groups, unparseable = await future
+        except BrokenProcessPool as e:
+            if use_pool:
+                logger.warning(f"Fingerprint worker pool failed, continuing in-process: {e}")
+                use_pool = False
+            groups, unparseable = await asyncio.to_thread(_fingerprint_exception_rows, chunk)
+        _merge_fingerprint_groups(exceptions_db, groups)
+        unparseable_rows.extend(unparseable)
+
+    try:
+        async for page in pages:
+            row_count += len(page)
+            for start in range(0, len(page), FINGERPRINT_CHUNK_ROWS):
+                chunk = [
+                    {field: row.get(field) for field in _FINGERPRINT_FIELDS}
+                    for row in page[start:start + FINGERPRINT_CHUNK_ROWS]
+                ]
+                if not use_pool and pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = None
+                submit(chunk)
+                while len(pending) >= max_pending:
+                    await merge_oldest()
+        while pending:
+            await merge_oldest()
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    return exceptions_db, unparseable_rows, row_count
+
+
 def register_tools(mcp):
     """Register exception triage tools."""
 
@@ -528,7 +538,9 @@ def register_tools(mcp):
                 QueryFilter("Parent", "", "isblank"),
             ]
 
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=EXCEPTION_SCHEMA,
                 query_name=EXCEPTION_QUERY,
@@ -579,7 +591,9 @@ def register_tools(mcp):
             server_context = get_server_context(server, container_path)
             filter_array = [QueryFilter("RowId", str(exception_id), "eq")]
 
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=EXCEPTION_SCHEMA,
                 query_name=EXCEPTION_QUERY,
@@ -614,6 +628,7 @@ def register_tools(mcp):
         report_date: str,
         server: str = DEFAULT_SERVER,
         container_path: str = DEFAULT_CONTAINER,
+        export_history: bool = False,
     ) -> str:
         """[P] Daily exception report with fingerprints. Saves to ai/.tmp/exceptions-report-YYYYMMDD.md. → exceptions.md"""
         try:
@@ -625,8 +640,6 @@ def register_tools(mcp):
             start_date = date_obj.strftime("%Y-%m-%d")
             end_date = next_day.strftime("%Y-%m-%d")
 
-            server_context = get_server_context(server, container_path)
-
             # Query exceptions created on the report date
             # Filter for Parent IS NULL to get only original posts, not responses
             filter_array = [
@@ -635,23 +648,21 @@ def register_tools(mcp):
                 QueryFilter("Parent", "", "isblank"),
             ]
 
-            result = labkey.query.select_rows(
-                server_context=server_context,
+            # Paged, so a busy day keeps every report
+            rows = []
+            async for page in aiter_select_pages(
+                server,
+                container_path,
                 schema_name=EXCEPTION_SCHEMA,
                 query_name=EXCEPTION_QUERY,
-                max_rows=500,
-                sort="-Created",
+                sort="Created,RowId",
                 filter_array=filter_array,
-            )
+            ):
+                rows.extend(page)
 
-            if not result or not result.get("rows"):
+            if not rows:
                 return f"No exceptions found for {report_date}."
 
-            rows = result["rows"]
-
-            # Load exception history
-            history = _load_exception_history()
-
             # Parse each exception and compute fingerprints
             parsed_exceptions = []
             for row in rows:
@@ -675,13 +686,19 @@ def register_tools(mcp):
                     'email': parsed['email'],
                     'fingerprint': norm.fingerprint,
                     'signature_frames': norm.signature_frames,
+                    'frames': trace_frames(norm),
                 })
 
-            # Update history with today's exceptions
-            _update_history_with_exceptions(history, parsed_exceptions, report_date)
+            # Update history with today's exceptions (only these rows are written)
+            await asyncio.to_thread(
+                exception_store.record_reports, parsed_exceptions, report_date, _history_meta()
+            )
 
             # Age out old entries
-            aged_out = _age_out_old_entries(history, report_date)
+            cutoff = _retention_cutoff(report_date)
+            aged_out = await asyncio.to_thread(exception_store.age_out, cutoff)
+            if aged_out:
+                logger.info(f"Aged out {aged_out} exceptions not seen since {cutoff}")
 
             # Group by fingerprint
             fingerprint_groups = {}
@@ -691,6 +708,32 @@ def register_tools(mcp):
                     fingerprint_groups[fp] = []
                 fingerprint_groups[fp].append(exc)
 
+            # History entries for today's fingerprints
+            # (stored stats only; the report never lists their past reports)
+            exceptions_db = await asyncio.to_thread(
+                exception_store.get_entries, fingerprint_groups, with_reports=False
+            )
+
+            # Suggest merges: today's fingerprints whose frames nearly match
+            # another tracked fingerprint (inlined, renamed or shifted frames)
+            trace_index = TraceIndex.from_entries(await asyncio.to_thread(exception_store.get_index_entries))
+            duplicates = {}  # fp -> [(similar fp, similarity)]
+            for fp in fingerprint_groups:
+                similar = trace_index.similar_to(fp)
+                if similar:
+                    duplicates[fp] = similar[:3]
+            similar_fps = [other for similar in duplicates.values() for other, _ in similar]
+            exceptions_db.update(await asyncio.to_thread(
+                exception_store.get_entries, [fp for fp in similar_fps if fp not in exceptions_db],
+                with_reports=False,
+            ))
+
+            def similar_bug(other_fp):
+                entry = exceptions_db[other_fp]
+                _, _, detail = _needs_attention(entry, [])
+                sig = entry.get('signature', '(unknown)')
+                return f"{detail}; {sig[:60]}{'...' if len(sig) > 60 else ''}"
+
             # Build the report
             lines = [
                 f"# Exception Report: {report_date}",
@@ -726,10 +769,30 @@ def register_tools(mcp):
             lines.append("---")
             lines.append("")
 
+            if duplicates:
+                lines.append(f"## Possible Duplicates ({len(duplicates)} fingerprints)")
+                lines.append("")
+                lines.append("Frames closely match another tracked fingerprint. If it is the same bug, "
+                             "record the same issue or fix for both.")
+                lines.append("")
+                lines.append("| Fingerprint | Similar to | Similarity | Similar bug |")
+                lines.append("|-------------|------------|------------|-------------|")
+                listed = set()
+                for fp, similar in duplicates.items():
+                    for other, similarity in similar:
+                        pair = frozenset((fp, other))
+                        if pair in listed:
+                            continue
+                        listed.add(pair)
+                        lines.append(f"| `{fp}` | `{other}` | {similarity:.0%} | {similar_bug(other)} |")
+                lines.append("")
+                lines.append("---")
+                lines.append("")
+
             # Classify each fingerprint as needs-attention or already-handled
             def get_sort_key(item):
                 fp, group = item
-                entry = history.get('exceptions', {}).get(fp, {})
+                entry = exceptions_db.get(fp, {})
                 return (-_get_priority_score(entry), -len(group))
 
             attention_items = []  # (fp, group, annotations, attention_info)
@@ -739,7 +802,7 @@ def register_tools(mcp):
                 reports = len(group)
                 unique_users = len(set(e['installation_id'] for e in group
                                        if e['installation_id']))
-                history_entry = history.get('exceptions', {}).get(fp, {})
+                history_entry = exceptions_db.get(fp, {})
                 annotations = _get_status_annotations(history_entry, reports, unique_users, report_date)
                 today_versions = [e['version'] for e in group if e['version']]
                 attention_info = _needs_attention(history_entry, today_versions)
@@ -768,6 +831,11 @@ def register_tools(mcp):
                 lines.append(f"**Signature**: {sig_str}")
                 lines.append("")
 
+                if fp in duplicates:
+                    other, similarity = duplicates[fp][0]
+                    lines.append(f"**Possible duplicate of**: `{other}` ({similarity:.0%} similar) - {similar_bug(other)}")
+                    lines.append("")
+
                 versions = sorted(set(e['version'] for e in group if e['version']))
                 if versions:
                     lines.append(f"**Versions**: {', '.join(versions)}")
@@ -844,14 +912,16 @@ def register_tools(mcp):
             file_path = get_tmp_dir() / f"exceptions-report-{date_str}.md"
             file_path.write_text(content, encoding="utf-8")
 
-            # Save updated history
-            _save_exception_history(history, report_date)
-            history_path = _get_history_path()
+            # The JSON export reads every stored report, so only on request
+            history_line = f"Updated exception history: {exception_store.get_store_path()}"
+            if export_history:
+                export_path = await asyncio.to_thread(exception_store.export_json)
+                history_line += f" (exported to {export_path.name})"
 
             # Return summary
             summary_lines = [
                 f"Saved exceptions report to {file_path}",
-                f"Updated exception history: {history_path}",
+                history_line,
                 "",
                 f"**{report_date}**: {len(rows)} reports → {len(fingerprint_groups)} unique bugs",
                 f"  - **{len(attention_items)} need attention**, {len(handled_items)} already handled",
@@ -859,11 +929,13 @@ def register_tools(mcp):
             ]
 
             # Count history stats
-            total_tracked = len(history.get('exceptions', {}))
+            total_tracked = await asyncio.to_thread(exception_store.count_entries)
             if aged_out > 0:
                 summary_lines.append(f"📊 History: {total_tracked} bugs tracked ({aged_out} aged out)")
             else:
                 summary_lines.append(f"📊 History: {total_tracked} bugs tracked")
+            if duplicates:
+                summary_lines.append(f"🔗 {len(duplicates)} fingerprint(s) look like duplicates of tracked bugs (see Possible Duplicates)")
             summary_lines.append("")
 
             # Highlight items needing attention
@@ -895,17 +967,13 @@ def register_tools(mcp):
             (entry, stats, None) on success
             (None, None, error_message) on failure
         """
-        history = _load_exception_history()
-        exceptions_db = history.get('exceptions', {})
+        entry = exception_store.set_annotation(
+            fingerprint, property_name, tracking_data, datetime.now().strftime("%Y-%m-%d")
+        )
 
-        if fingerprint not in exceptions_db:
+        if entry is None:
             return None, None, f"Fingerprint `{fingerprint}` not found in history. Run save_exceptions_report first to populate history."
 
-        entry = exceptions_db[fingerprint]
-        entry[property_name] = tracking_data
-
-        _save_exception_history(history, datetime.now().strftime("%Y-%m-%d"))
-
         stats = _get_entry_stats(entry)
         return entry, stats, None
 
@@ -1040,46 +1108,31 @@ def register_tools(mcp):
     ) -> str:
         """Query exception history for high-priority bugs. → exceptions.md"""
         try:
-            history = _load_exception_history()
-            exceptions_db = history.get('exceptions', {})
+            total_tracked = await asyncio.to_thread(exception_store.count_entries)
 
-            if not exceptions_db:
+            if not total_tracked:
                 return "No exceptions in history. Run backfill_exception_history to populate."
 
-            schema_version = history.get('_schema_version', 1)
-
-            # Filter and score
-            scored = []
-            for fp, entry in exceptions_db.items():
-                # Compute stats from reports list (v2) or use legacy fields (v1)
-                stats = _get_entry_stats(entry)
-
-                # Skip if below user threshold
-                if stats['unique_users'] < min_users:
-                    continue
-
-                # Skip fixed unless requested
-                if entry.get('fix') and not show_fixed:
-                    continue
+            # Score and filter in the store; load reports only for the top entries
+            ranked, meta = await asyncio.to_thread(exception_store.top_priority, min_users, show_fixed, top_n)
+            schema_version = meta.get('_schema_version', 1)
 
-                score = _get_priority_score(entry)
-                scored.append((score, fp, entry, stats))
-
-            # Sort by score descending
-            scored.sort(key=lambda x: -x[0])
-
-            if not scored:
+            if not ranked:
                 return f"No exceptions match criteria (min_users={min_users}, show_fixed={show_fixed})"
 
+            entries = await asyncio.to_thread(exception_store.get_entries, [fp for _, fp in ranked])
+
             lines = [
-                f"# Top {min(top_n, len(scored))} Priority Exceptions",
+                f"# Top {len(ranked)} Priority Exceptions",
                 "",
-                f"History contains {len(exceptions_db)} tracked bugs (schema v{schema_version}).",
-                f"Last updated: {history.get('_last_updated', 'Unknown')}",
+                f"History contains {total_tracked} tracked bugs (schema v{schema_version}).",
+                f"Last updated: {meta.get('_last_updated', 'Unknown')}",
                 "",
             ]
 
-            for i, (score, fp, entry, stats) in enumerate(scored[:top_n], 1):
+            for i, (score, fp) in enumerate(ranked, 1):
+                entry = entries[fp]
+                stats = _get_entry_stats(entry)
                 sig = entry.get('signature', '(unknown)')
                 first_seen = entry.get('first_seen', '?')
                 last_seen = entry.get('last_seen', '?')
@@ -1152,54 +1205,52 @@ def register_tools(mcp):
     ) -> str:
         """Backfill exception history from skyline.ms. → exceptions.md"""
         try:
-            # Load existing history to preserve fix and issue annotations
-            old_history = _load_exception_history()
-            preserved_fixes = _extract_fix_annotations(old_history)
-            preserved_issues = _extract_issue_annotations(old_history)
-            if preserved_fixes:
-                logger.info(f"Preserving {len(preserved_fixes)} fix annotations from existing history")
-            if preserved_issues:
-                logger.info(f"Preserving {len(preserved_issues)} issue annotations from existing history")
+            # Fetch replies (Parent IS NOT NULL) while the posts are fingerprinted
+            reply_filter = [
+                QueryFilter("Created", since_date, "dategte"),
+                QueryFilter("Parent", "", "isnonblank"),
+            ]
 
-            server_context = get_server_context(server, container_path)
+            reply_task = asyncio.ensure_future(select_all_rows(
+                server,
+                container_path,
+                schema_name=EXCEPTION_SCHEMA,
+                query_name=EXCEPTION_QUERY,
+                sort="Created,RowId",
+                filter_array=reply_filter,
+            ))
 
-            # Query all exceptions since the anchor date
+            # Stream all exceptions since the anchor date through the fingerprint workers
             # Filter for Parent IS NULL to get only original posts, not responses
             filter_array = [
                 QueryFilter("Created", since_date, "dategte"),
                 QueryFilter("Parent", "", "isblank"),
             ]
 
-            result = labkey.query.select_rows(
-                server_context=server_context,
-                schema_name=EXCEPTION_SCHEMA,
-                query_name=EXCEPTION_QUERY,
-                max_rows=10000,  # Should be plenty
-                sort="Created",  # Oldest first for proper first_seen tracking
-                filter_array=filter_array,
-                columns="RowId,EntityId,Title,Created,Modified,Status,AssignedTo,FormattedBody,Parent",
-            )
-
-            if not result or not result.get("rows"):
+            try:
+                exceptions_db, unparseable_rows, row_count = await _fingerprint_exception_pages(
+                    aiter_select_pages(
+                        server,
+                        container_path,
+                        schema_name=EXCEPTION_SCHEMA,
+                        query_name=EXCEPTION_QUERY,
+                        sort="Created,RowId",  # Oldest first for proper first_seen tracking
+                        filter_array=filter_array,
+                        columns="RowId,EntityId,Title,Created,Modified,Status,AssignedTo,FormattedBody,Parent",
+                    )
+                )
+            except BaseException:
+                reply_task.cancel()
+                raise
+
+            if not row_count:
+                reply_task.cancel()
                 return f"No exceptions found since {since_date}."
 
-            rows = result["rows"]
-            logger.info(f"Backfilling {len(rows)} exceptions since {since_date}")
+            logger.info(f"Backfilled {row_count} exceptions since {since_date} "
+                        f"into {len(exceptions_db)} fingerprints")
 
-            # Query all replies (Parent IS NOT NULL) to match with parent posts
-            reply_filter = [
-                QueryFilter("Created", since_date, "dategte"),
-                QueryFilter("Parent", "", "isnonblank"),
-            ]
-
-            reply_result = labkey.query.select_rows(
-                server_context=server_context,
-                schema_name=EXCEPTION_SCHEMA,
-                query_name=EXCEPTION_QUERY,
-                max_rows=10000,
-                sort="Created",
-                filter_array=reply_filter,
-            )
+            reply_result = await reply_task
 
             # Build lookup: parent RowId -> reply info
             replies_by_parent = {}
@@ -1241,99 +1292,33 @@ def register_tools(mcp):
 
                 logger.info(f"Found {len(replies_by_parent)} replies to exception posts")
 
+            # Attach replies to their posts (matched by EntityId)
+            for entry in exceptions_db.values():
+                for report_entry in entry['reports']:
+                    entity_id = report_entry.pop('_entity_id', None)
+                    if entity_id and entity_id in replies_by_parent:
+                        report_entry['reply'] = replies_by_parent[entity_id]
+
             # Start fresh history with v2 schema
+            today = datetime.now().strftime("%Y-%m-%d")
             history = {
-                '_schema_version': HISTORY_SCHEMA_VERSION,
-                '_last_updated': None,
-                '_retention_months': RETENTION_MONTHS,
-                '_release_anchor': MAJOR_RELEASE_VERSION,
-                '_release_date': MAJOR_RELEASE_DATE,
-                '_backfill_date': datetime.now().strftime("%Y-%m-%d"),
-                '_backfill_count': len(rows),
-                'exceptions': {}
+                **_history_meta(),
+                '_last_updated': today,
+                '_backfill_date': today,
+                '_backfill_count': row_count,
+                'exceptions': exceptions_db
             }
 
-            exceptions_db = history['exceptions']
-            unparseable_rows = []  # Track RowIds we can't parse
-
-            # Process each exception
-            for row in rows:
-                row_id = row.get("RowId")
-                entity_id = row.get("EntityId")  # Used for reply matching
-                body = row.get("FormattedBody", "")
-                parsed = _parse_exception_body(body)
-                created = row.get("Created", "")
-
-                # Extract date from Created timestamp
-                if isinstance(created, str) and "T" in created:
-                    report_date = created.split("T")[0]
-                elif isinstance(created, str) and " " in created:
-                    report_date = created.split(" ")[0]
-                else:
-                    report_date = str(created)[:10]
-
-                # Normalize stack trace and get fingerprint
-                norm = normalize_stack_trace(parsed['stack_trace'])
-                fp = norm.fingerprint
-                sig_frames = norm.signature_frames
-
-                # Track unparseable rows (empty fingerprint = no frames parsed)
-                if norm.frame_count == 0:
-                    if row_id:
-                        unparseable_rows.append(row_id)
-
-                install_id = parsed.get('installation_id')
-                version = parsed.get('version')
-                email = parsed.get('email')
-                user_comment = parsed.get('user_comment')
-
-                if fp not in exceptions_db:
-                    # New fingerprint - create entry with v2 schema
-                    exceptions_db[fp] = {
-                        'fingerprint': fp,
-                        'signature': ' → '.join(sig_frames) if sig_frames else '(unknown)',
-                        'exception_type': row.get('Title', '').split('|')[0].strip() if row.get('Title') else None,
-                        'first_seen': report_date,
-                        'last_seen': report_date,
-                        'reports': [],  # v2: list of individual reports
-                        'fix': None,
-                    }
-
-                entry = exceptions_db[fp]
-
-                # Update last_seen (rows are sorted by Created ascending)
-                entry['last_seen'] = report_date
-
-                # Add individual report (v2 schema)
-                report_entry = {
-                    'row_id': row_id,
-                    'date': report_date,
-                    'version': version,
-                    'installation_id': install_id,
-                    'email': email,
-                }
-
-                # Add user comment if present
-                if user_comment:
-                    report_entry['comment'] = user_comment
-
-                # Add reply if one exists for this post (matched by EntityId)
-                if entity_id and entity_id in replies_by_parent:
-                    report_entry['reply'] = replies_by_parent[entity_id]
-
-                entry['reports'].append(report_entry)
-
-            # Re-apply preserved fix and issue annotations
-            fixes_applied = _apply_fix_annotations(history, preserved_fixes)
-            issues_applied = _apply_issue_annotations(history, preserved_issues)
-
             # Save unparseable RowIds in history for investigation
             if unparseable_rows:
                 history['_unparseable_rowids'] = unparseable_rows
 
-            # Save the history
-            today = datetime.now().strftime("%Y-%m-%d")
-            _save_exception_history(history, today)
+            # Replace the stored history in one transaction; fix and issue
+            # annotations recorded for surviving fingerprints are carried over
+            fixes_applied, issues_applied = await asyncio.to_thread(exception_store.replace_history, history)
+            if fixes_applied or issues_applied:
+                logger.info(f"Preserved {fixes_applied} fix and {issues_applied} issue annotations")
+            export_path = await asyncio.to_thread(exception_store.export_json)
 
             # Generate summary using stats helper
             total_fingerprints = len(exceptions_db)
@@ -1358,7 +1343,7 @@ def register_tools(mcp):
                 f"# Exception History Backfill Complete",
                 "",
                 f"**Schema**: v{HISTORY_SCHEMA_VERSION} (individual reports with row_ids)",
-                f"**Source**: {len(rows)} exceptions since {since_date}",
+                f"**Source**: {row_count} exceptions since {since_date}",
                 f"**Replies found**: {total_replies}",
                 f"**Unique bugs**: {total_fingerprints} fingerprints",
                 f"**Multi-user bugs**: {multi_user}",
@@ -1374,7 +1359,7 @@ def register_tools(mcp):
 
             lines.extend([
                 "",
-                f"Saved to: {_get_history_path()}",
+                f"Saved to: {exception_store.get_store_path()} (exported to {export_path.name})",
                 "",
                 "## Top 5 Most Reported Issues",
                 "",
@@ -12,6 +12,7 @@ import labkey
 
 from .common import (
     get_server_context,
+    run_blocking,
     get_tmp_dir,
     DEFAULT_SERVER,
     DEFAULT_ISSUES_CONTAINER,
@@ -39,7 +40,9 @@ def register_tools(mcp):
             # Use issues_by_status for server-side filtering when status specified
             if status:
                 # Use parameterized query with wide date range for server-side filtering
-                result = labkey.query.select_rows(
+                result = await run_blocking(
+                    server,
+                    labkey.query.select_rows,
                     server_context=server_context,
                     schema_name=ISSUES_SCHEMA,
                     query_name="issues_by_status",
@@ -53,7 +56,9 @@ def register_tools(mcp):
                 )
             else:
                 # No status filter - use issues_list
-                result = labkey.query.select_rows(
+                result = await run_blocking(
+                    server,
+                    labkey.query.select_rows,
                     server_context=server_context,
                     schema_name=ISSUES_SCHEMA,
                     query_name="issues_list",
@@ -128,7 +133,9 @@ def register_tools(mcp):
             server_context = get_server_context(server, container_path)
 
             # Use issue_with_comments parameterized query
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=ISSUES_SCHEMA,
                 query_name="issue_with_comments",
@@ -278,7 +285,9 @@ def register_tools(mcp):
             server_context = get_server_context(server, container_path)
 
             # Query all issues with the specified status
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=ISSUES_SCHEMA,
                 query_name="issues_list",
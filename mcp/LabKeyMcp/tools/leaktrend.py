@@ -0,0 +1,166 @@
+"""Leak trends for every test across folders from one compact event table.
+
+NOT exposed as MCP tools - used internally by nightly.py (save_leak_trends).
+
+Leak events (one per run and test, from the local run metrics store) are
+loaded into LeakTable: parallel typed arrays with test, computer, folder and
+git hash interned to integer codes and dates stored as day ordinals. A year
+of leaks from all six folders is a few hundred thousand slots and a few MB.
+
+leak_trends() walks the table once and keeps running sums per (test,
+computer). From those it derives, for every test at once:
+- first appearance (date, run, computer, folder, git hash)
+- growth slopes in bytes/day and handles/day, pooled within computers so a
+  machine that always leaks more does not read as growth when it joins
+- growth over 30 days as a percentage of the mean leak
+
+This replaces one leaks_history query and Python filter per test.
+"""
+
+import math
+from array import array
+from datetime import datetime
+from typing import Optional
+
+# Fewest leak events a test needs before its slope is reported
+MIN_EVENTS = 5
+# Growth percentages are expressed over this many days
+GROWTH_WINDOW_DAYS = 30
+
+
+class LeakTable:
+    """Leak events as parallel arrays, one slot per (run, test) leak.
+
+    String columns are interned: ``names[kind][code]`` maps a code back to
+    its test, computer, folder or git hash. A missing amount is NaN.
+    """
+
+    KINDS = ("test", "computer", "folder", "githash")
+
+    def __init__(self):
+        self.names = {kind: [] for kind in self.KINDS}
+        self._codes = {kind: {} for kind in self.KINDS}
+        self._days = {}  # 'YYYY-MM-DD' -> day ordinal
+        self.test = array("I")
+        self.computer = array("I")
+        self.folder = array("I")
+        self.githash = array("I")
+        self.day = array("I")
+        self.run_id = array("q")
+        self.bytes = array("d")
+        self.handles = array("d")
+
+    def __len__(self) -> int:
+        return len(self.test)
+
+    def _code(self, kind: str, value) -> int:
+        value = value or "?"
+        codes = self._codes[kind]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.names[kind])
+            self.names[kind].append(value)
+        return code
+
+    def add_events(self, folder: str, events: list[tuple]) -> None:
+        """Append metrics_store.get_leak_events() tuples for one folder."""
+        folder_code = self._code("folder", folder)
+        for testname, computer, posttime, run_id, githash, leak_bytes, leak_handles in events:
+            self.test.append(self._code("test", testname))
+            self.computer.append(self._code("computer", computer))
+            self.folder.append(folder_code)
+            self.githash.append(self._code("githash", githash))
+            date = posttime[:10]
+            day = self._days.get(date)
+            if day is None:
+                day = self._days[date] = datetime.strptime(date, "%Y-%m-%d").toordinal()
+            self.day.append(day)
+            self.run_id.append(run_id)
+            self.bytes.append(math.nan if leak_bytes is None else float(leak_bytes))
+            self.handles.append(math.nan if leak_handles is None else float(leak_handles))
+
+
+def _pooled_slope(sums: list) -> Optional[float]:
+    """Within-computer least-squares slope from [n, Sx, Sy, Sxy, Sxx] per computer."""
+    sxy = sxx = 0.0
+    for n, sx, sy, s_xy, s_xx in sums:
+        if n >= 2:
+            sxy += s_xy - sx * sy / n
+            sxx += s_xx - sx * sx / n
+    return sxy / sxx if sxx > 1e-9 else None
+
+
+def leak_trends(table: LeakTable, min_events: int = MIN_EVENTS) -> list[dict]:
+    """Per-test leak summary and growth slopes in one pass over the table.
+
+    Returns:
+        One dict per test, ordered by testname. bytes_per_day and
+        handles_per_day are None when fewer than min_events leaks of that
+        kind were seen or no computer leaked on two different days.
+        growth_percent is the bytes slope (handles if the test never leaked
+        memory) over GROWTH_WINDOW_DAYS, relative to the mean leak.
+    """
+    if not len(table):
+        return []
+    day0 = min(table.day)
+
+    tests = {}  # test code -> [events, first slot, last day, computer codes, folder codes]
+    by_computer = {}  # (test code, computer code) -> ([n, Sx, Sy, Sxy, Sxx] bytes, same for handles)
+    columns = zip(table.test, table.computer, table.folder, table.day, table.bytes, table.handles)
+    for i, (t, c, folder, day, leak_bytes, leak_handles) in enumerate(columns):
+        acc = tests.get(t)
+        if acc is None:
+            acc = tests[t] = [0, i, day, set(), set()]
+        acc[0] += 1
+        if day < table.day[acc[1]]:
+            acc[1] = i
+        if day > acc[2]:
+            acc[2] = day
+        acc[3].add(c)
+        acc[4].add(folder)
+
+        sums = by_computer.get((t, c))
+        if sums is None:
+            sums = by_computer[(t, c)] = ([0, 0.0, 0.0, 0.0, 0.0], [0, 0.0, 0.0, 0.0, 0.0])
+        x = float(day - day0)
+        for value, s in ((leak_bytes, sums[0]), (leak_handles, sums[1])):
+            if value == value:  # not NaN
+                s[0] += 1
+                s[1] += x
+                s[2] += value
+                s[3] += x * value
+                s[4] += x * x
+
+    per_test_sums = {}
+    for (t, _), sums in by_computer.items():
+        per_test_sums.setdefault(t, []).append(sums)
+
+    names = table.names
+    results = []
+    for t, (events, first, last_day, computers, folders) in tests.items():
+        row = {
+            "testname": names["test"][t],
+            "events": events,
+            "computers": len(computers),
+            "folders": sorted(names["folder"][f].split("/")[-1] for f in folders),
+            "first_seen": datetime.fromordinal(table.day[first]).strftime("%Y-%m-%d"),
+            "first_run_id": table.run_id[first],
+            "first_computer": names["computer"][table.computer[first]],
+            "first_folder": names["folder"][table.folder[first]],
+            "first_githash": names["githash"][table.githash[first]],
+            "last_seen": datetime.fromordinal(last_day).strftime("%Y-%m-%d"),
+        }
+        growth = None
+        for index, kind in enumerate(("bytes", "handles")):
+            per_computer = [sums[index] for sums in per_test_sums[t]]
+            n = sum(s[0] for s in per_computer)
+            mean = sum(s[2] for s in per_computer) / n if n else None
+            slope = _pooled_slope(per_computer) if n >= min_events else None
+            row[f"mean_{kind}"] = mean
+            row[f"{kind}_per_day"] = slope
+            if growth is None and slope is not None and mean:
+                growth = slope * GROWTH_WINDOW_DAYS / mean * 100
+        row["growth_percent"] = growth
+        results.append(row)
+    results.sort(key=lambda r: r["testname"])
+    return results
@@ -0,0 +1,436 @@
+"""Multi-run log search tools for LabKey MCP server.
+
+Investigating a regression used to mean save_run_log run by run and a grep
+per file. This module keeps a local inverted index over full nightly run
+logs so a question like "which runs in the last 60 days logged
+OutOfMemoryException near TestFoo" is answered from disk in milliseconds.
+
+- build_log_index: index every run in a date range and folder set. Logs
+  come from runlog.py (downloaded once, then read locally); runs already
+  indexed are skipped, so repeated calls only add new runs.
+- search_run_logs: runs whose logs contain all terms within N lines of
+  each other, with the first matching line.
+
+The index lives in ai/.tmp/cache/log-index.sqlite:
+- logs: one row per indexed run (folder, computer, posttime, line count)
+- tokens: vocabulary (lowercased words of 3+ characters that start with a
+  letter or underscore; numbers and timestamps are not indexed)
+- postings: per (token, run) the occurrence count and up to MAX_POSITIONS
+  (line, byte offset) pairs, one per line the token appears on
+
+It is derived data and can be deleted at any time; build_log_index
+rebuilds it from the cached logs (re-downloading any that were evicted).
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .common import (
+    get_tmp_dir,
+    resolve_relative_date,
+    _server_url,
+    DEFAULT_SERVER,
+    DEFAULT_TEST_CONTAINER,
+)
+from . import metrics_store
+from . import runlog
+
+logger = logging.getLogger("labkey_mcp")
+
+INDEX_FILE = "log-index.sqlite"
+MAX_POSITIONS = 256  # (line, offset) pairs kept per token per run
+INDEX_CONCURRENCY = int(os.environ.get("LABKEY_MCP_INDEX_CONCURRENCY", "4"))
+_LOOKUP_CHUNK = 500  # Tokens per IN (...) lookup
+
+# Identifiers: a word starting with a letter or underscore, 3+ characters
+_TOKEN = re.compile(rb"(?<![a-z0-9_])[a-z_][a-z0-9_]{2,}")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    log_id INTEGER PRIMARY KEY,
+    server TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    folder TEXT NOT NULL,
+    computer TEXT,
+    posttime TEXT NOT NULL,
+    lines INTEGER,
+    indexed_at TEXT,
+    UNIQUE (server, run_id)
+);
+CREATE INDEX IF NOT EXISTS logs_by_posttime ON logs (server, folder, posttime);
+
+CREATE TABLE IF NOT EXISTS tokens (
+    token_id INTEGER PRIMARY KEY,
+    token TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS postings (
+    token_id INTEGER NOT NULL,
+    log_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (token_id, log_id)
+) WITHOUT ROWID;
+"""
+
+_init_lock = threading.Lock()
+_initialized = set()
+_write_lock = threading.Lock()  # One indexing transaction at a time
+
+
+# =============================================================================
+# Index Storage
+# =============================================================================
+
+def get_index_path() -> Path:
+    """Get ai/.tmp/cache/log-index.sqlite."""
+    cache_dir = get_tmp_dir() / "cache"
+    cache_dir.mkdir(exist_ok=True)
+    return cache_dir / INDEX_FILE
+
+
+def _connect() -> sqlite3.Connection:
+    path = get_index_path()
+    conn = sqlite3.connect(path, timeout=30)
+    with _init_lock:
+        if str(path) not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _initialized.add(str(path))
+    return conn
+
+
+def _tokenize_file(path: Path) -> tuple[dict, int]:
+    """Scan a local log once; returns ({token: [count, positions]}, line count).
+
+    ``count`` is the number of lines containing the token; ``positions`` is
+    an array of (line, byte offset) pairs for the first MAX_POSITIONS of them.
+    """
+    postings = {}
+    offset = 0
+    line_no = 0
+    with open(path, "rb") as f:
+        for line in f:
+            for token in set(_TOKEN.findall(line.lower())):
+                entry = postings.get(token)
+                if entry is None:
+                    entry = postings[token] = [0, array("I")]
+                entry[0] += 1
+                if entry[0] <= MAX_POSITIONS:
+                    entry[1].append(line_no)
+                    entry[1].append(offset)
+            offset += len(line)
+            line_no += 1
+    return postings, line_no
+
+
+def _token_ids(conn: sqlite3.Connection, tokens: list[str], create: bool) -> dict:
+    """Map tokens to ids, adding unknown ones when ``create``."""
+    if create:
+        conn.executemany("INSERT OR IGNORE INTO tokens (token) VALUES (?)", ((t,) for t in tokens))
+    ids = {}
+    for i in range(0, len(tokens), _LOOKUP_CHUNK):
+        chunk = tokens[i:i + _LOOKUP_CHUNK]
+        placeholders = ", ".join("?" * len(chunk))
+        ids.update(conn.execute(
+            f"SELECT token, token_id FROM tokens WHERE token IN ({placeholders})", chunk
+        ).fetchall())
+    return ids
+
+
+def _index_log(server_key: str, run: dict, folder: str, path: Path) -> int:
+    """Tokenize one local log and store its postings; returns tokens indexed."""
+    postings, lines = _tokenize_file(path)
+    tokens = [token.decode("ascii") for token in postings]
+    with _write_lock, closing(_connect()) as conn, conn:
+        ids = _token_ids(conn, tokens, create=True)
+        if conn.execute("SELECT 1 FROM logs WHERE server = ? AND run_id = ?",
+                        (server_key, run["run_id"])).fetchone():
+            return 0  # Indexed by a concurrent build
+        log_id = conn.execute(
+            "INSERT INTO logs (server, run_id, folder, computer, posttime, lines, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (server_key, run["run_id"], folder, run.get("computer"), run["posttime"], lines,
+             datetime.now().isoformat(timespec="seconds")),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?, ?)",
+            ((ids[token], log_id, count, positions.tobytes())
+             for token, (count, positions) in zip(tokens, postings.values())),
+        )
+    return len(tokens)
+
+
+# =============================================================================
+# Search
+# =============================================================================
+
+def _parse_terms(terms: str) -> list[list[str]]:
+    """Whitespace-separated terms, each split into tokens that must share a line."""
+    parsed = []
+    for term in terms.split():
+        tokens = [t.decode("ascii") for t in _TOKEN.findall(term.lower().encode("utf-8", "ignore"))]
+        if tokens:
+            parsed.append(list(dict.fromkeys(tokens)))
+    return parsed
+
+
+def _term_lines(positions: dict, term: list[int]) -> tuple[list[int], dict]:
+    """Sorted lines where every token of a term occurs, and line -> byte offset."""
+    lines = None
+    offsets = {}
+    for token_id in term:
+        pairs = positions[token_id]
+        token_lines = pairs[0::2]
+        offsets.update(zip(token_lines, pairs[1::2]))
+        lines = set(token_lines) if lines is None else lines & set(token_lines)
+    return sorted(lines), offsets
+
+
+def _search(server_key: str, folders: list[str], start_date: str, end_date: str,
+            terms: list[list[str]], within_lines: int) -> dict:
+    """Runs matching all terms within ``within_lines`` lines, newest first."""
+    with closing(_connect()) as conn:
+        scope = (
+            f"server = ? AND folder IN ({', '.join('?' * len(folders))}) "
+            "AND posttime >= ? AND posttime < ?"
+        )
+        scope_params = (server_key, *folders, start_date, metrics_store._next_day(end_date))
+        searched, newest = conn.execute(
+            f"SELECT COUNT(*), MAX(posttime) FROM logs WHERE {scope}", scope_params
+        ).fetchone()
+
+        all_tokens = sorted({token for term in terms for token in term})
+        ids = _token_ids(conn, all_tokens, create=False)
+        result = {"searched": searched, "newest": newest, "matches": [], "capped": 0}
+        if len(ids) < len(all_tokens):
+            return result  # Some token never occurs in any indexed log
+
+        # Runs in scope containing every token, rarest token first
+        token_ids = sorted(ids.values(), key=lambda tid: conn.execute(
+            "SELECT COUNT(*) FROM postings WHERE token_id = ?", (tid,)).fetchone()[0])
+        intersect = " INTERSECT ".join("SELECT log_id FROM postings WHERE token_id = ?" for _ in token_ids)
+        candidates = {
+            row[0]: row[1:] for row in conn.execute(
+                f"SELECT log_id, run_id, folder, computer, posttime FROM logs "
+                f"WHERE {scope} AND log_id IN ({intersect})",
+                (*scope_params, *token_ids),
+            )
+        }
+        if not candidates:
+            return result
+
+        positions = {}  # log_id -> {token_id: array}
+        capped = set()
+        placeholders = ", ".join("?" * len(candidates))
+        for token_id in token_ids:
+            for log_id, count, blob in conn.execute(
+                f"SELECT log_id, count, positions FROM postings WHERE token_id = ? AND log_id IN ({placeholders})",
+                (token_id, *candidates),
+            ):
+                pairs = array("I")
+                pairs.frombytes(blob)
+                positions.setdefault(log_id, {})[token_id] = pairs
+                if count > MAX_POSITIONS:
+                    capped.add(log_id)
+
+    term_ids = [[ids[token] for token in term] for term in terms]
+    for log_id, (run_id, folder, computer, posttime) in candidates.items():
+        per_term = [_term_lines(positions[log_id], term) for term in term_ids]
+        anchor = min(range(len(per_term)), key=lambda i: len(per_term[i][0]))
+        hits = []
+        for line in per_term[anchor][0]:
+            near = True
+            for lines, _ in per_term:
+                i = bisect_left(lines, line - within_lines)
+                if i == len(lines) or lines[i] > line + within_lines:
+                    near = False
+                    break
+            if near:
+                hits.append(line)
+        if not hits:
+            if log_id in capped:
+                result["capped"] += 1
+            continue
+        result["matches"].append({
+            "run_id": run_id, "folder": folder, "computer": computer, "posttime": posttime,
+            "hits": len(hits), "line": hits[0], "offset": per_term[anchor][1][hits[0]],
+        })
+
+    result["matches"].sort(key=lambda m: m["posttime"], reverse=True)
+    return result
+
+
+def _read_line(path: Path, offset: int, limit: int = 160) -> str:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        line = f.readline(limit * 4).decode("utf-8", errors="replace").rstrip("\n")
+    return line if len(line) <= limit else line[:limit - 3] + "..."
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+def _split_folders(container_paths: str) -> list[str]:
+    return [path.strip() for path in container_paths.split(",") if path.strip()]
+
+
+def register_tools(mcp):
+    """Register multi-run log search tools."""
+
+    @mcp.tool()
+    async def build_log_index(
+        start_date: str = "60d",
+        end_date: Optional[str] = None,
+        container_paths: str = DEFAULT_TEST_CONTAINER,
+        max_new_runs: int = 500,
+        server: str = DEFAULT_SERVER,
+    ) -> str:
+        """[A] Add nightly run logs in a date range to the local search index. → nightly-tests.md
+
+        Args:
+            start_date: Start date (YYYY-MM-DD) or relative like "1y", "6m", "60d"
+            end_date: End date (YYYY-MM-DD), defaults to today
+            container_paths: Comma-separated test folder paths
+            max_new_runs: Most runs to index in this call (newest first); call again to continue
+            server: LabKey server hostname
+        """
+        start_date, end_date = resolve_relative_date(start_date, end_date)
+        folders = _split_folders(container_paths)
+        server_key = _server_url(server).lower()
+        started = time.perf_counter()
+
+        try:
+            with closing(_connect()) as conn:
+                indexed = {row[0] for row in conn.execute(
+                    "SELECT run_id FROM logs WHERE server = ?", (server_key,))}
+
+            pending = []
+            in_range = 0
+            for folder in folders:
+                runs, _ = await metrics_store.get_runs(server, folder, start_date, end_date)
+                in_range += len(runs)
+                pending.extend((folder, run) for run in runs if run["run_id"] not in indexed)
+            pending.sort(key=lambda item: item[1]["posttime"], reverse=True)
+            todo, remaining = pending[:max_new_runs], len(pending) - min(len(pending), max_new_runs)
+
+            semaphore = asyncio.Semaphore(INDEX_CONCURRENCY)
+            sources = {"local": 0, "download": 0}
+
+            async def index_run(folder: str, run: dict) -> int:
+                async with semaphore:
+                    path, _, source = await runlog.fetch_full_log(server, folder, run["run_id"])
+                    sources[source] += 1
+                    return await asyncio.to_thread(_index_log, server_key, run, folder, path)
+
+            results = await asyncio.gather(
+                *(index_run(folder, run) for folder, run in todo), return_exceptions=True
+            )
+            failed = [(item[1]["run_id"], r) for item, r in zip(todo, results) if isinstance(r, Exception)]
+            for run_id, error in failed:
+                logger.warning(f"Could not index log for run {run_id}: {error}")
+
+            size_mb = get_index_path().stat().st_size / (1024 * 1024)
+            lines = [
+                f"Log index: {start_date} to {end_date}, {len(folders)} folder(s)",
+                f"  Runs in range: {in_range}",
+                f"  Already indexed: {in_range - len(pending)}",
+                f"  Newly indexed: {len(todo) - len(failed)} "
+                f"({sources['download']} downloaded, {sources['local']} from local log cache)",
+            ]
+            if failed:
+                lines.append(f"  Failed: {len(failed)} (e.g. run {failed[0][0]}: {failed[0][1]})")
+            if remaining:
+                lines.append(f"  Remaining: {remaining} - call again to continue")
+            lines.append(f"  Index size: {size_mb:.1f} MB, {time.perf_counter() - started:.1f}s")
+            lines.append("")
+            lines.append("Search with search_run_logs(terms, start_date, container_paths).")
+            return "\n".join(lines)
+
+        except Exception as e:
+            logger.error(f"Error building log index: {e}", exc_info=True)
+            return f"Error building log index: {e}"
+
+    @mcp.tool()
+    async def search_run_logs(
+        terms: str,
+        start_date: str = "60d",
+        end_date: Optional[str] = None,
+        container_paths: str = DEFAULT_TEST_CONTAINER,
+        within_lines: int = 20,
+        max_results: int = 50,
+        server: str = DEFAULT_SERVER,
+    ) -> str:
+        """[A] Find indexed runs whose logs contain all terms within N lines. No downloads. → nightly-tests.md
+
+        Args:
+            terms: Space-separated terms, e.g. "OutOfMemoryException TestFoo" (case-insensitive)
+            start_date: Start date (YYYY-MM-DD) or relative like "1y", "6m", "60d"
+            end_date: End date (YYYY-MM-DD), defaults to today
+            container_paths: Comma-separated test folder paths
+            within_lines: Max line distance between terms (0 = same line)
+            max_results: Max runs listed
+            server: LabKey server hostname
+        """
+        parsed = _parse_terms(terms)
+        if not parsed:
+            return f"No searchable terms in '{terms}' (terms need 3+ letters, digits or underscores)"
+        start_date, end_date = resolve_relative_date(start_date, end_date)
+        folders = _split_folders(container_paths)
+        started = time.perf_counter()
+
+        try:
+            result = await asyncio.to_thread(
+                _search, _server_url(server).lower(), folders, start_date, end_date, parsed, within_lines
+            )
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            matches = result["matches"]
+
+            lines = [
+                f"**{len(matches)}** of {result['searched']} indexed runs match \"{terms}\" "
+                f"within {within_lines} lines ({start_date} to {end_date}, {elapsed_ms:.0f} ms)",
+            ]
+            if not result["searched"]:
+                lines.append("No indexed runs in range - run build_log_index first.")
+                return "\n".join(lines)
+            lines.append(f"Index covers runs through {result['newest']}; build_log_index adds newer runs.")
+            if result["capped"]:
+                lines.append(
+                    f"{result['capped']} more run(s) contain every term, but too often to check "
+                    f"distance from the index (>{MAX_POSITIONS} lines); grep those logs directly."
+                )
+            if matches:
+                lines.extend([
+                    "",
+                    "| Posted | Folder | Computer | Run | Hits | First match |",
+                    "|--------|--------|----------|-----|------|-------------|",
+                ])
+                for match in matches[:max_results]:
+                    path = runlog.get_local_log_path(server, match["run_id"])
+                    text = _read_line(path, match["offset"]) if path else "(log not cached)"
+                    text = text.replace("|", "\\|")
+                    lines.append(
+                        f"| {match['posttime'][:16]} | {match['folder'].split('/')[-1]} | "
+                        f"{match['computer'] or '?'} | {match['run_id']} | {match['hits']} | "
+                        f"L{match['line'] + 1}: `{text}` |"
+                    )
+                if len(matches) > max_results:
+                    lines.append(f"\n... {len(matches) - max_results} more (raise max_results)")
+                lines.append("\nUse save_run_log(run_id) for full context.")
+            return "\n".join(lines)
+
+        except Exception as e:
+            logger.error(f"Error searching run logs: {e}", exc_info=True)
+            return f"Error searching run logs: {e}"
@@ -0,0 +1,848 @@
+"""Local SQLite store of per-run nightly metrics.
+
+This module keeps a local copy of per-run data that trend tools read over
+long date ranges. NOT exposed as MCP tools - used internally by nightly.py
+(save_run_metrics_csv, save_leakcheck_stats, save_duration_regressions,
+save_leak_trends, get_daily_test_summary) and logindex.py (run lists).
+
+A posted run never changes, so each (dataset, server, folder) only needs to
+be fetched once. The store records which calendar dates it has covered and
+the newest posttime it holds (the high-water mark); a request fetches only
+dates it has not seen, plus any covered days that had not yet ended when
+they were synced (from the high-water day onwards), then answers from the
+local tables. A 1-year trend that used to re-query ~10000 rows costs one
+small delta request after the first call.
+
+Datasets:
+- runs: one row per run from testruns_detail
+- leakcheck: pass-1 iterations and time per (run, test) from leakcheck_by_run
+- durations: passes and average duration per (run, test) from
+  test_durations_by_run
+- leaks: leaked bytes and handles per (run, test) from leaks_by_run
+
+It also keeps each folder's trained computer baselines (expected_computers)
+with a refresh policy, and can derive baselines locally from stored runs.
+
+Aggregations run as SQL over the local tables rather than Python loops:
+daily means are a GROUP BY, rolling 7/30-day statistics are window sums
+over those daily groups, and per-computer z-scores join each run to its
+computer's grouped mean and variance. Five years of runs from 50 computers aggregate in well under a
+second (see bench_run_metrics.py).
+
+The database lives at ai/.tmp/daily/history/run-metrics.sqlite. It can be
+deleted at any time; the next call rebuilds what it needs.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from statistics import median, pstdev
+
+from .common import (
+    earliest_server_time,
+    get_daily_history_dir,
+    select_all_rows,
+    _server_url,
+    TESTRESULTS_SCHEMA,
+)
+
+logger = logging.getLogger("labkey_mcp")
+
+STORE_FILE = "run-metrics.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    server TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    computer TEXT,
+    posttime TEXT NOT NULL,
+    duration REAL,
+    os TEXT,
+    passedtests INTEGER,
+    averagemem REAL,
+    failedtests INTEGER,
+    leakedtests INTEGER,
+    revision INTEGER,
+    githash TEXT,
+    flagged INTEGER,
+    hung_test TEXT,
+    hung_language TEXT,
+    PRIMARY KEY (server, folder, run_id)
+);
+CREATE INDEX IF NOT EXISTS runs_by_posttime ON runs (server, folder, posttime);
+
+CREATE TABLE IF NOT EXISTS leakcheck (
+    server TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    testname TEXT NOT NULL,
+    posttime TEXT NOT NULL,
+    iterations INTEGER,
+    duration_sec REAL,
+    PRIMARY KEY (server, folder, run_id, testname)
+);
+CREATE INDEX IF NOT EXISTS leakcheck_by_posttime ON leakcheck (server, folder, posttime);
+
+CREATE TABLE IF NOT EXISTS durations (
+    server TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    testname TEXT NOT NULL,
+    posttime TEXT NOT NULL,
+    passes INTEGER,
+    avg_duration REAL,
+    PRIMARY KEY (server, folder, run_id, testname)
+);
+CREATE INDEX IF NOT EXISTS durations_by_posttime ON durations (server, folder, posttime);
+
+CREATE TABLE IF NOT EXISTS leaks (
+    server TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    testname TEXT NOT NULL,
+    posttime TEXT NOT NULL,
+    leak_bytes INTEGER,
+    leak_handles REAL,
+    PRIMARY KEY (server, folder, run_id, testname)
+);
+CREATE INDEX IF NOT EXISTS leaks_by_posttime ON leaks (server, folder, posttime);
+
+CREATE TABLE IF NOT EXISTS baselines (
+    server TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    computer TEXT NOT NULL,
+    meantestsrun REAL,
+    stddevtestsrun REAL,
+    meanmemory REAL,
+    stddevmemory REAL,
+    PRIMARY KEY (server, folder, computer)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    dataset TEXT NOT NULL,
+    server TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    covered_start TEXT NOT NULL,
+    covered_end TEXT NOT NULL,
+    high_water TEXT,
+    synced_at TEXT,
+    PRIMARY KEY (dataset, server, folder)
+);
+"""
+
+RUN_COLUMNS = [
+    "run_id", "computer", "posttime", "duration", "os", "passedtests", "averagemem",
+    "failedtests", "leakedtests", "revision", "githash", "flagged", "hung_test", "hung_language",
+]
+LEAKCHECK_COLUMNS = ["run_id", "testname", "posttime", "iterations", "duration_sec"]
+DURATION_COLUMNS = ["run_id", "testname", "posttime", "passes", "avg_duration"]
+LEAK_COLUMNS = ["run_id", "testname", "posttime", "leak_bytes", "leak_handles"]
+
+# metric -> (runs column, CSV column, decimals for means and rolling stats)
+METRICS = {
+    "memory": ("averagemem", "memory_mb", 1),
+    "tests": ("passedtests", "tests", 0),
+    "duration": ("duration", "duration_min", 0),
+    "failures": ("failedtests", "failures", 2),
+    "leaks": ("leakedtests", "leaks", 2),
+}
+
+# Rolling windows in calendar days; bands are mean +/- BAND_SIGMAS * stddev
+SHORT_WINDOW_DAYS = 7
+LONG_WINDOW_DAYS = 30
+BAND_SIGMAS = 2
+
+# Trained baselines (expected_computers) are re-fetched once older than this
+BASELINE_TTL_HOURS = float(os.environ.get("LABKEY_MCP_BASELINE_TTL_HOURS", "24"))
+# Local baselines: trailing window, fewest runs per computer, MAD -> sigma factor
+BASELINE_WINDOW_DAYS = 30
+BASELINE_MIN_RUNS = 5
+MAD_SCALE = 1.4826
+
+# dataset -> (LabKey query, local table, paging sort). Hundreds of rows share
+# one posttime, so each sort ends in columns unique per row; a sort on
+# posttime alone can skip or repeat rows at a page boundary.
+DATASETS = {
+    "runs": ("testruns_detail", "runs", "posttime,run_id"),
+    "leakcheck": ("leakcheck_by_run", "leakcheck", "posttime,testrunid,testname"),
+    "durations": ("test_durations_by_run", "durations", "posttime,testrunid,testname"),
+    "leaks": ("leaks_by_run", "leaks", "posttime,testrunid,testname"),
+}
+
+_init_lock = threading.Lock()
+_initialized = set()  # Database paths whose schema has been created
+_sync_locks = {}  # (dataset, server, folder) -> asyncio.Lock
+
+
+# =============================================================================
+# Database
+# =============================================================================
+
+def get_store_path() -> Path:
+    """Get ai/.tmp/daily/history/run-metrics.sqlite."""
+    return get_daily_history_dir() / STORE_FILE
+
+
+def connect(path: Path = None) -> sqlite3.Connection:
+    """Open the store (creating tables on first use); rows come back as sqlite3.Row.
+
+    ``path`` defaults to get_store_path(); benchmarks pass a scratch file.
+    """
+    path = path or get_store_path()
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    with _init_lock:
+        if str(path) not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _initialized.add(str(path))
+    return conn
+
+
+def _read(func, *args):
+    """func(conn, *args) on a fresh connection. Async callers run this via asyncio.to_thread."""
+    with closing(connect()) as conn:
+        return func(conn, *args)
+
+
+def _normalize_posttime(value) -> str:
+    """LabKey timestamps as sortable 'YYYY-MM-DD HH:MM:SS' text."""
+    return str(value or "").replace("T", " ").replace("/", "-")[:19]
+
+
+def _next_day(date_str: str) -> str:
+    return (datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _days_before(date_str: str, days: int) -> str:
+    return (datetime.strptime(date_str, "%Y-%m-%d") - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def _std(mean_sq, mean):
+    """Population stddev from E[x^2] and E[x] (clamped against rounding below zero)."""
+    if mean_sq is None or mean is None:
+        return None
+    return math.sqrt(max(mean_sq - mean * mean, 0.0))
+
+
+def _round(value, decimals: int):
+    return None if value is None else round(value, decimals)
+
+
+def _store_rows(dataset: str, server_key: str, folder: str, rows: list[dict]) -> int:
+    """Upsert fetched LabKey rows; returns the number stored."""
+    if dataset == "runs":
+        columns = RUN_COLUMNS
+        records = [
+            (server_key, folder, *[
+                _normalize_posttime(row.get(c)) if c == "posttime" else row.get(c)
+                for c in columns
+            ])
+            for row in rows if row.get("run_id") is not None
+        ]
+    else:
+        # (run, test) datasets: testrunid, testname, posttime + two values
+        columns = {"leakcheck": LEAKCHECK_COLUMNS, "durations": DURATION_COLUMNS, "leaks": LEAK_COLUMNS}[dataset]
+        values = columns[3:]
+        records = [
+            (server_key, folder, row.get("testrunid"), row.get("testname"),
+             _normalize_posttime(row.get("posttime")), *[row.get(c) for c in values])
+            for row in rows if row.get("testrunid") is not None
+        ]
+    table = DATASETS[dataset][1]
+    placeholders = ", ".join("?" * (len(columns) + 2))
+    with closing(connect()) as conn, conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table} (server, folder, {', '.join(columns)}) VALUES ({placeholders})",
+            records,
+        )
+    return len(records)
+
+
+# =============================================================================
+# Incremental Sync
+# =============================================================================
+
+def _settled_through(state) -> str:
+    """Last covered date that had ended on the server when the state was synced.
+
+    Days after it were fetched while runs could still be posted for them.
+    Judged by earliest_server_time(), since synced_at is client local time.
+    """
+    if not state["synced_at"]:
+        return _days_before(state["covered_end"], 1)
+    synced = earliest_server_time(datetime.fromisoformat(state["synced_at"]))
+    return min(state["covered_end"], _days_before(synced.strftime("%Y-%m-%d"), 1))
+
+
+def _sync_state(conn: sqlite3.Connection, key: tuple):
+    return conn.execute(
+        "SELECT * FROM sync_state WHERE dataset = ? AND server = ? AND folder = ?", key
+    ).fetchone()
+
+
+def _write_sync_state(key: tuple, table: str, covered_start: str, covered_end: str, synced_at: str):
+    """Record coverage and the table's high-water posttime for a (dataset, server, folder)."""
+    _, server_key, folder = key
+    with closing(connect()) as conn, conn:
+        high_water = conn.execute(
+            f"SELECT MAX(posttime) FROM {table} WHERE server = ? AND folder = ?",
+            (server_key, folder),
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*key, covered_start, covered_end, high_water, synced_at),
+        )
+
+
+def _missing_ranges(state, start_date: str, end_date: str) -> list[tuple[str, str]]:
+    """Date ranges (inclusive) that must be fetched to cover start..end.
+
+    Covered dates are complete once they had ended when they were synced.
+    If the request reaches past that, everything from the first unsettled
+    day (or the high-water day, if earlier) through the end of the coverage
+    is re-fetched, so no day is recorded as synced while still partial;
+    upserts make the overlap harmless.
+    """
+    if state is None:
+        return [(start_date, end_date)]
+
+    ranges = []
+    if start_date < state["covered_start"]:
+        ranges.append((start_date, state["covered_start"]))
+
+    settled = _settled_through(state)
+    if end_date > settled:
+        resume = _next_day(settled)
+        if state["high_water"]:
+            resume = min(resume, state["high_water"][:10])
+        ranges.append((resume, max(end_date, state["covered_end"])))
+    return ranges
+
+
+async def sync(dataset: str, server: str, container_path: str, start_date: str, end_date: str) -> dict:
+    """Bring one dataset for one folder up to date for start..end.
+
+    Args:
+        dataset: "runs", "leakcheck", "durations" or "leaks"
+        server: LabKey server
+        container_path: Test folder
+        start_date: First date needed (YYYY-MM-DD)
+        end_date: Last date needed (YYYY-MM-DD), inclusive
+
+    Returns:
+        Dict with "requests" (LabKey queries issued) and "fetched" (rows stored)
+    """
+    query_name, table, sort = DATASETS[dataset]
+    server_key = _server_url(server).lower()
+    key = (dataset, server_key, container_path)
+    lock = _sync_locks.setdefault(key, asyncio.Lock())
+
+    async with lock:
+        state = await asyncio.to_thread(_read, _sync_state, key)
+        ranges = _missing_ranges(state, start_date, end_date)
+        fetched = 0
+        for range_start, range_end in ranges:
+            result = await select_all_rows(
+                server,
+                container_path,
+                schema_name=TESTRESULTS_SCHEMA,
+                query_name=query_name,
+                parameters={"StartDate": range_start, "EndDate": range_end},
+                sort=sort,
+            )
+            fetched += await asyncio.to_thread(
+                _store_rows, dataset, server_key, container_path, (result or {}).get("rows") or []
+            )
+
+        if ranges or state is None:
+            covered_start = min(start_date, state["covered_start"]) if state else start_date
+            covered_end = max(end_date, state["covered_end"]) if state else end_date
+            synced_at = datetime.now().isoformat(timespec="seconds")
+            if state is not None and not any(range_end >= state["covered_end"] for _, range_end in ranges):
+                # Only earlier dates were added; the newest days keep the time they were fetched
+                synced_at = state["synced_at"]
+            await asyncio.to_thread(_write_sync_state, key, table, covered_start, covered_end, synced_at)
+            logger.info(
+                f"Synced {dataset} for {container_path}: {fetched} rows in {len(ranges)} request(s)"
+            )
+
+    return {"requests": len(ranges), "fetched": fetched}
+
+
+# =============================================================================
+# Local Queries
+# =============================================================================
+
+async def get_runs(server: str, container_path: str, start_date: str, end_date: str) -> tuple[list[dict], dict]:
+    """testruns_detail-shaped rows for start..end (inclusive), oldest first.
+
+    Returns:
+        (rows, sync info from sync())
+    """
+    info = await sync("runs", server, container_path, start_date, end_date)
+    rows = await asyncio.to_thread(
+        _read, _run_rows, _server_url(server).lower(), container_path, start_date, end_date
+    )
+    return rows, info
+
+
+def _run_rows(conn: sqlite3.Connection, server_key: str, folder: str, start_date: str, end_date: str) -> list[dict]:
+    return [dict(row) for row in conn.execute(
+        f"SELECT {', '.join(RUN_COLUMNS)} FROM runs "
+        "WHERE server = ? AND folder = ? AND posttime >= ? AND posttime < ? "
+        "ORDER BY posttime",
+        (server_key, folder, start_date, _next_day(end_date)),
+    )]
+
+
+async def get_leakcheck_stats(server: str, container_path: str, start_date: str, end_date: str) -> tuple[list[dict], dict]:
+    """leakcheck_stats-shaped rows (one per test) aggregated from the local store.
+
+    Returns:
+        (rows sorted by avg_iterations_per_run descending, sync info)
+    """
+    info = await sync("leakcheck", server, container_path, start_date, end_date)
+    rows = await asyncio.to_thread(
+        _read, _leakcheck_rows, _server_url(server).lower(), container_path, start_date, end_date
+    )
+    return rows, info
+
+
+def _leakcheck_rows(conn: sqlite3.Connection, server_key: str, folder: str, start_date: str, end_date: str) -> list[dict]:
+    return [dict(row) for row in conn.execute(
+        """
+        SELECT
+            testname,
+            SUM(iterations) AS total_iterations,
+            COUNT(DISTINCT run_id) AS run_count,
+            ROUND(CAST(SUM(iterations) AS REAL) / COUNT(DISTINCT run_id), 1) AS avg_iterations_per_run,
+            CAST(ROUND(SUM(duration_sec) / SUM(iterations)) AS INTEGER) AS avg_duration_sec,
+            CAST(ROUND(SUM(duration_sec) / 60.0) AS INTEGER) AS total_time_min,
+            ROUND(SUM(duration_sec) / COUNT(DISTINCT run_id) / 60.0, 1) AS avg_time_per_run_min
+        FROM leakcheck
+        WHERE server = ? AND folder = ? AND posttime >= ? AND posttime < ?
+        GROUP BY testname
+        ORDER BY avg_iterations_per_run DESC, testname
+        """,
+        (server_key, folder, start_date, _next_day(end_date)),
+    )]
+
+
+async def get_duration_matrix(server: str, container_path: str, start_date: str, end_date: str) -> tuple[list[dict], dict, dict]:
+    """Per-test average durations for every run in start..end.
+
+    Returns:
+        (runs, matrix, sync info) where runs are dicts with run_id, computer,
+        posttime, githash and revision ordered by posttime, and matrix maps
+        testname -> {run_id: (avg_duration, passes)}. Sync info sums the
+        requests and rows of the runs and durations syncs.
+    """
+    runs_info, durations_info = await asyncio.gather(
+        sync("runs", server, container_path, start_date, end_date),
+        sync("durations", server, container_path, start_date, end_date),
+    )
+    runs, matrix = await asyncio.to_thread(
+        _read, _duration_matrix, _server_url(server).lower(), container_path, start_date, end_date
+    )
+    info = {key: runs_info[key] + durations_info[key] for key in ("requests", "fetched")}
+    return runs, matrix, info
+
+
+def _duration_matrix(conn: sqlite3.Connection, server_key: str, folder: str, start_date: str, end_date: str) -> tuple:
+    params = (server_key, folder, start_date, _next_day(end_date))
+    runs = [dict(row) for row in conn.execute(
+        "SELECT run_id, computer, posttime, githash, revision FROM runs "
+        "WHERE server = ? AND folder = ? AND posttime >= ? AND posttime < ? "
+        "ORDER BY posttime, run_id",
+        params,
+    )]
+    matrix = {}
+    for testname, run_id, avg_duration, passes in conn.execute(
+        "SELECT testname, run_id, avg_duration, passes FROM durations "
+        "WHERE server = ? AND folder = ? AND posttime >= ? AND posttime < ?",
+        params,
+    ):
+        matrix.setdefault(testname, {})[run_id] = (avg_duration, passes)
+    return runs, matrix
+
+
+async def get_leak_events(server: str, container_path: str, start_date: str, end_date: str) -> tuple[list[tuple], dict]:
+    """Every (run, test) leak in start..end joined to its run, oldest first.
+
+    Returns:
+        (events, sync info) where events are (testname, computer, posttime,
+        run_id, githash, leak_bytes, leak_handles) tuples. Sync info sums the
+        requests and rows of the runs and leaks syncs.
+    """
+    runs_info, leaks_info = await asyncio.gather(
+        sync("runs", server, container_path, start_date, end_date),
+        sync("leaks", server, container_path, start_date, end_date),
+    )
+    events = await asyncio.to_thread(
+        _read, _leak_events, _server_url(server).lower(), container_path, start_date, end_date
+    )
+    info = {key: runs_info[key] + leaks_info[key] for key in ("requests", "fetched")}
+    return events, info
+
+
+def _leak_events(conn: sqlite3.Connection, server_key: str, folder: str, start_date: str, end_date: str) -> list[tuple]:
+    return [tuple(row) for row in conn.execute(
+        "SELECT l.testname, r.computer, l.posttime, l.run_id, r.githash, l.leak_bytes, l.leak_handles "
+        "FROM leaks l LEFT JOIN runs r "
+        "ON r.server = l.server AND r.folder = l.folder AND r.run_id = l.run_id "
+        "WHERE l.server = ? AND l.folder = ? AND l.posttime >= ? AND l.posttime < ? "
+        "ORDER BY l.posttime, l.run_id",
+        (server_key, folder, start_date, _next_day(end_date)),
+    )]
+
+
+# =============================================================================
+# Computer Baselines
+# =============================================================================
+
+BASELINE_COLUMNS = ["computer", "meantestsrun", "stddevtestsrun", "meanmemory", "stddevmemory"]
+
+
+def _read_baselines(conn: sqlite3.Connection, server_key: str, folder: str) -> list[dict]:
+    return [dict(row) for row in conn.execute(
+        f"SELECT {', '.join(BASELINE_COLUMNS)} FROM baselines WHERE server = ? AND folder = ? ORDER BY computer",
+        (server_key, folder),
+    )]
+
+
+async def get_trained_baselines(
+    server: str, container_path: str, max_age_hours: float = BASELINE_TTL_HOURS
+) -> tuple[list[dict], dict]:
+    """expected_computers rows from the local copy, re-fetched once it is older than max_age_hours.
+
+    If the re-fetch fails and a local copy exists, the stale copy is used
+    rather than failing the caller.
+
+    Returns:
+        (rows, info) with "source" ("local copy", "server" or "stale local
+        copy") and "age_hours" of the rows returned (None once invalidated)
+    """
+    server_key = _server_url(server).lower()
+    key = ("baselines", server_key, container_path)
+    lock = _sync_locks.setdefault(key, asyncio.Lock())
+
+    async with lock:
+        state = await asyncio.to_thread(_read, _sync_state, key)
+        age_hours = None
+        if state is not None and state["synced_at"]:
+            synced_at = datetime.fromisoformat(state["synced_at"])
+            age_hours = (datetime.now() - synced_at).total_seconds() / 3600
+            if age_hours < max_age_hours:
+                return await asyncio.to_thread(_read, _read_baselines, server_key, container_path), {
+                    "source": "local copy", "age_hours": age_hours,
+                }
+
+        try:
+            result = await select_all_rows(
+                server,
+                container_path,
+                schema_name=TESTRESULTS_SCHEMA,
+                query_name="expected_computers",
+            )
+        except Exception as e:
+            if state is None:
+                raise
+            logger.warning(f"Refreshing baselines for {container_path} failed, using local copy: {e}")
+            return await asyncio.to_thread(_read, _read_baselines, server_key, container_path), {
+                "source": "stale local copy", "age_hours": age_hours,
+            }
+
+        rows = [
+            {column: row.get(column) for column in BASELINE_COLUMNS}
+            for row in (result or {}).get("rows") or [] if row.get("computer")
+        ]
+        await asyncio.to_thread(_replace_baselines, key, rows)
+        logger.info(f"Refreshed baselines for {container_path}: {len(rows)} computers")
+        return rows, {"source": "server", "age_hours": 0.0}
+
+
+def _replace_baselines(key: tuple, rows: list[dict]):
+    """Store a folder's freshly fetched expected_computers rows and their fetch time."""
+    _, server_key, folder = key
+    now = datetime.now()
+    with closing(connect()) as conn, conn:
+        conn.execute("DELETE FROM baselines WHERE server = ? AND folder = ?", (server_key, folder))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO baselines (server, folder, {', '.join(BASELINE_COLUMNS)}) "
+            f"VALUES (?, ?{', ?' * len(BASELINE_COLUMNS)})",
+            [(server_key, folder, *(row[c] for c in BASELINE_COLUMNS)) for row in rows],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*key, now.strftime("%Y-%m-%d"), now.strftime("%Y-%m-%d"), None,
+             now.isoformat(timespec="seconds")),
+        )
+
+
+def invalidate_trained_baselines(server: str, container_path: str) -> None:
+    """Force the next get_trained_baselines() call to re-fetch (e.g. after deactivating a computer).
+
+    The rows stay as the fallback copy; only their fetch time is cleared.
+    """
+    with closing(connect()) as conn, conn:
+        conn.execute(
+            "UPDATE sync_state SET synced_at = NULL WHERE dataset = 'baselines' AND server = ? AND folder = ?",
+            (_server_url(server).lower(), container_path),
+        )
+
+
+def _robust_center_spread(values: list[float]) -> tuple[float, float]:
+    """Median and MAD scaled to a normal stddev; the plain stddev if the MAD is 0."""
+    center = median(values)
+    spread = MAD_SCALE * median(abs(v - center) for v in values)
+    return center, spread if spread > 0 else pstdev(values)
+
+
+def local_baseline_rows(
+    conn: sqlite3.Connection,
+    server_key: str,
+    folder: str,
+    before: str,
+    window_days: int = BASELINE_WINDOW_DAYS,
+    computers: list[str] = None,
+) -> list[dict]:
+    """expected_computers-shaped rows from each computer's stored runs in the window before ``before``.
+
+    meantestsrun/meanmemory are medians and the stddev columns are MAD x
+    MAD_SCALE, so a few crashed or hung runs do not widen the baseline.
+    ``computers`` lists the expected computers; without it, every computer
+    with at least BASELINE_MIN_RUNS runs in the window is expected. Expected
+    computers with too few runs get None statistics (missing, not scored).
+    """
+    start = _days_before(before[:10], window_days)
+    per_computer = {}
+    for computer, passed, memory in conn.execute(
+        "SELECT computer, passedtests, averagemem FROM runs "
+        "WHERE server = ? AND folder = ? AND posttime >= ? AND posttime < ? AND computer IS NOT NULL",
+        (server_key, folder, start, before),
+    ):
+        tests, mem = per_computer.setdefault(computer, ([], []))
+        if passed is not None:
+            tests.append(passed)
+        if memory is not None:
+            mem.append(memory)
+
+    if computers is None:
+        computers = [c for c, (tests, _) in per_computer.items() if len(tests) >= BASELINE_MIN_RUNS]
+
+    rows = []
+    for computer in sorted(computers):
+        tests, mem = per_computer.get(computer, ([], []))
+        row = {column: None for column in BASELINE_COLUMNS}
+        row["computer"] = computer
+        row["runs"] = len(tests)
+        if len(tests) >= BASELINE_MIN_RUNS:
+            row["meantestsrun"], row["stddevtestsrun"] = _robust_center_spread(tests)
+        if len(mem) >= BASELINE_MIN_RUNS:
+            row["meanmemory"], row["stddevmemory"] = _robust_center_spread(mem)
+        rows.append(row)
+    return rows
+
+
+def _local_baselines(conn: sqlite3.Connection, server_key: str, folder: str, before: str, window_days: int) -> list[dict]:
+    has_trained = conn.execute(
+        "SELECT 1 FROM sync_state WHERE dataset = 'baselines' AND server = ? AND folder = ?",
+        (server_key, folder),
+    ).fetchone()
+    computers = [row["computer"] for row in _read_baselines(conn, server_key, folder)] if has_trained else None
+    return local_baseline_rows(conn, server_key, folder, before, window_days, computers)
+
+
+async def get_local_baselines(
+    server: str, container_path: str, before: datetime, window_days: int = BASELINE_WINDOW_DAYS
+) -> tuple[list[dict], dict]:
+    """local_baseline_rows() for the window_days before ``before`` after syncing those runs.
+
+    The expected computer list comes from the local copy of the trained
+    baselines when one exists (any age, no request), so deactivated computers
+    stay out of the missing list.
+
+    Returns:
+        (rows, info) with "source" and the runs sync's "requests"/"fetched"
+    """
+    server_key = _server_url(server).lower()
+    before_str = before.strftime("%Y-%m-%d %H:%M:%S")
+    info = await sync(
+        "runs", server, container_path, _days_before(before_str[:10], window_days), before_str[:10]
+    )
+    rows = await asyncio.to_thread(_read, _local_baselines, server_key, container_path, before_str, window_days)
+    info["source"] = f"local median/MAD over {window_days} days"
+    return rows, info
+
+
+# =============================================================================
+# Run Metric Aggregation
+# =============================================================================
+
+def daily_metric_rows(
+    conn: sqlite3.Connection,
+    server_key: str,
+    folder: str,
+    start_date: str,
+    end_date: str,
+    metrics: list[str],
+    rolling: bool = True,
+) -> list[dict]:
+    """One row per date with run_count and mean_{metric} columns.
+
+    Missing values count as 0, matching the CSV export before this moved to
+    SQL. With ``rolling``, each metric also gets run-weighted rolling means
+    over the trailing 7 and 30 calendar days ({col}_mean_7d, {col}_mean_30d),
+    the 30-day stddev ({col}_std_30d) and a band of mean +/- 2 stddev
+    ({col}_lo_30d, {col}_hi_30d). The windows read up to 29 days before
+    start_date so the first rows are not computed from a partial window;
+    the store must already cover that lead-in (see get_daily_metrics).
+    """
+    per_day = []
+    outer = []
+    for metric in metrics:
+        source, col, _ = METRICS[metric]
+        value = f"COALESCE({source}, 0)"
+        per_day.append(f"SUM({value}) AS {col}_sum, SUM({value} * {value}) AS {col}_sq")
+        outer.append(f"CAST({col}_sum AS REAL) / n AS mean_{col}")
+        if rolling:
+            for days, window in ((SHORT_WINDOW_DAYS, "w_short"), (LONG_WINDOW_DAYS, "w_long")):
+                outer.append(f"CAST(SUM({col}_sum) OVER {window} AS REAL) / SUM(n) OVER {window} AS {col}_mean_{days}d")
+            outer.append(f"CAST(SUM({col}_sq) OVER w_long AS REAL) / SUM(n) OVER w_long AS {col}_sq_{LONG_WINDOW_DAYS}d")
+
+    lead_in = _days_before(start_date, LONG_WINDOW_DAYS - 1) if rolling else start_date
+    windows = (
+        f" WINDOW w_short AS (ORDER BY day RANGE BETWEEN {SHORT_WINDOW_DAYS - 1} PRECEDING AND CURRENT ROW),"
+        f" w_long AS (ORDER BY day RANGE BETWEEN {LONG_WINDOW_DAYS - 1} PRECEDING AND CURRENT ROW)"
+        if rolling else ""
+    )
+    sql = f"""
+        SELECT * FROM (
+            SELECT date, n AS run_count{''.join(', ' + c for c in outer)}
+            FROM (
+                SELECT substr(posttime, 1, 10) AS date,
+                       CAST(julianday(substr(posttime, 1, 10)) AS INTEGER) AS day,
+                       COUNT(*) AS n{''.join(', ' + c for c in per_day)}
+                FROM runs
+                WHERE server = ? AND folder = ? AND posttime >= ? AND posttime < ?
+                GROUP BY date
+            ){windows}
+        )
+        WHERE date >= ?
+        ORDER BY date
+    """
+    cursor = conn.execute(sql, (server_key, folder, lead_in, _next_day(end_date), start_date))
+
+    rows = []
+    for record in cursor:
+        record = dict(record)
+        row = {"date": record["date"], "run_count": record["run_count"]}
+        for metric in metrics:
+            _, col, decimals = METRICS[metric]
+            row[f"mean_{col}"] = _round(record[f"mean_{col}"], decimals)
+            if rolling:
+                mean_long = record[f"{col}_mean_{LONG_WINDOW_DAYS}d"]
+                std = _std(record.pop(f"{col}_sq_{LONG_WINDOW_DAYS}d"), mean_long)
+                row[f"{col}_mean_{SHORT_WINDOW_DAYS}d"] = _round(record[f"{col}_mean_{SHORT_WINDOW_DAYS}d"], decimals)
+                row[f"{col}_mean_{LONG_WINDOW_DAYS}d"] = _round(mean_long, decimals)
+                row[f"{col}_std_{LONG_WINDOW_DAYS}d"] = _round(std, decimals)
+                row[f"{col}_lo_{LONG_WINDOW_DAYS}d"] = _round(mean_long - BAND_SIGMAS * std, decimals)
+                row[f"{col}_hi_{LONG_WINDOW_DAYS}d"] = _round(mean_long + BAND_SIGMAS * std, decimals)
+        rows.append(row)
+    return rows
+
+
+def run_metric_rows(
+    conn: sqlite3.Connection,
+    server_key: str,
+    folder: str,
+    start_date: str,
+    end_date: str,
+    metrics: list[str],
+    zscores: bool = True,
+) -> list[dict]:
+    """One row per run (date, computer, raw metric columns), oldest first.
+
+    With ``zscores``, each metric also gets {col}_z: how many stddevs the
+    run lies from its computer's mean over start..end. A computer whose
+    values never vary gets 0.
+    """
+    columns = ["substr(r.posttime, 1, 10) AS date", "r.computer AS computer"]
+    stats = []
+    for metric in metrics:
+        source, col, _ = METRICS[metric]
+        columns.append(f"r.{source} AS {col}")
+        if zscores:
+            stats.append(f"AVG({source}) AS {col}_avg, AVG({source} * {source}) AS {col}_sq")
+            columns.append(f"r.{source} - s.{col}_avg AS {col}_dev")
+            columns.append(f"s.{col}_sq - s.{col}_avg * s.{col}_avg AS {col}_var")
+
+    in_range = "{0}server = ? AND {0}folder = ? AND {0}posttime >= ? AND {0}posttime < ?"
+    params = (server_key, folder, start_date, _next_day(end_date))
+    sql = f"SELECT {', '.join(columns)} FROM runs r"
+    if zscores:
+        # Per-computer mean and E[x^2] in one grouped pass, joined back to each run
+        sql = (
+            f"WITH s AS (SELECT computer, {', '.join(stats)} FROM runs "
+            f"WHERE {in_range.format('')} GROUP BY computer) "
+            f"{sql} JOIN s ON r.computer IS s.computer"
+        )
+        params = params * 2
+    sql += f" WHERE {in_range.format('r.')} ORDER BY r.posttime"
+    cursor = conn.execute(sql, params)
+
+    rows = []
+    for record in cursor:
+        record = dict(record)
+        row = {"date": record["date"], "computer": record["computer"]}
+        for metric in metrics:
+            _, col, _ = METRICS[metric]
+            row[col] = record[col]
+            if zscores:
+                dev, var = record[f"{col}_dev"], record[f"{col}_var"]
+                if dev is None:
+                    row[f"{col}_z"] = None
+                else:
+                    std = math.sqrt(max(var, 0.0))
+                    row[f"{col}_z"] = round(dev / std, 2) if std > 1e-9 else 0.0
+        rows.append(row)
+    return rows
+
+
+async def get_daily_metrics(
+    server: str, container_path: str, start_date: str, end_date: str, metrics: list[str], rolling: bool = True
+) -> tuple[list[dict], dict]:
+    """daily_metric_rows() for one folder after syncing start..end (plus the rolling lead-in).
+
+    Returns:
+        (rows, sync info from sync())
+    """
+    sync_start = _days_before(start_date, LONG_WINDOW_DAYS - 1) if rolling else start_date
+    info = await sync("runs", server, container_path, sync_start, end_date)
+    rows = await asyncio.to_thread(
+        _read, daily_metric_rows, _server_url(server).lower(), container_path, start_date, end_date, metrics, rolling
+    )
+    return rows, info
+
+
+async def get_run_metrics(
+    server: str, container_path: str, start_date: str, end_date: str, metrics: list[str], zscores: bool = True
+) -> tuple[list[dict], dict]:
+    """run_metric_rows() for one folder after syncing start..end.
+
+    Returns:
+        (rows, sync info from sync())
+    """
+    info = await sync("runs", server, container_path, start_date, end_date)
+    rows = await asyncio.to_thread(
+        _read, run_metric_rows, _server_url(server).lower(), container_path, start_date, end_date, metrics, zscores
+    )
+    return rows, info
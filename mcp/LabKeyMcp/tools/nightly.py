@@ -4,12 +4,16 @@ This module contains tools for querying and analyzing Skyline nightly test resul
 from the skyline.ms test infrastructure.
 """
 
+import asyncio
 import json
 import logging
+import os
 import re
+import time
 from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
+from statistics import median
 from typing import Literal, Optional
 from urllib.parse import quote
 
@@ -18,115 +22,27 @@ from labkey.query import QueryFilter
 
 from .common import (
     get_server_context,
+    run_blocking,
+    select_all_rows,
     get_netrc_credentials,
     get_tmp_dir,
-    make_authenticated_request,
+    resolve_relative_date,
     _server_url,
     DEFAULT_SERVER,
     DEFAULT_TEST_CONTAINER,
     TESTRESULTS_SCHEMA,
 )
-from .nightly_history import _load_nightly_history
+from .cache import cached_fetch, cached_select_rows
+from . import leaktrend
+from . import metrics_store
+from . import runlog
+from .nightly_history import _load_nightly_history, TEST_FOLDERS
 from .stacktrace import normalize_stack_trace, group_by_fingerprint
 
 logger = logging.getLogger("labkey_mcp")
 
-
-def _find_log_section_boundaries(lines: list[str]) -> dict:
-    """Find section boundaries in a SkylineTester nightly log.
-
-    Returns dict with line indices for:
-    - git_end: End of git section (before "# Building Skyline...")
-    - build_start: Start of build section ("# Building Skyline...")
-    - build_end: End of build section ("# Build done.")
-    - testrunner_start: Start of TestRunner section (TestRunner.exe command line)
-    - testrunner_end: End of TestRunner section ("# Stopped ...")
-    - failures_start: Start of failures section (after TestRunner.exe report=...)
-    """
-    boundaries = {
-        'git_end': 0,
-        'build_start': 0,
-        'build_end': 0,
-        'testrunner_start': 0,
-        'testrunner_end': 0,
-        'failures_start': 0,
-    }
-
-    for i, line in enumerate(lines):
-        if line.startswith('# Building Skyline'):
-            boundaries['git_end'] = i
-            boundaries['build_start'] = i
-        elif line.startswith('# Build done'):
-            boundaries['build_end'] = i
-        # TestRunner section starts with its command line
-        elif 'TestRunner.exe" status=' in line and boundaries['testrunner_start'] == 0:
-            boundaries['testrunner_start'] = i
-        elif line.startswith('# Stopped '):
-            boundaries['testrunner_end'] = i
-        # Failures section starts after the report command
-        elif 'TestRunner.exe" report=' in line:
-            boundaries['failures_start'] = i + 1
-
-    return boundaries
-
-
-def _extract_log_section(
-    content: str,
-    part: str,
-) -> tuple[str, str]:
-    """Extract a section from log content.
-
-    Returns (section_content, section_info) where section_info describes
-    which lines were extracted.
-    """
-    # Normalize line endings to LF first
-    content = content.replace('\r\n', '\n').replace('\r', '')
-    lines = content.split('\n')
-
-    if part == 'full':
-        return content, f"Full log ({len(lines)} lines)"
-
-    boundaries = _find_log_section_boundaries(lines)
-
-    if part == 'git':
-        end = boundaries['build_start'] if boundaries['build_start'] > 0 else len(lines)
-        section_lines = lines[:end]
-        info = f"Git section (lines 1-{end})"
-
-    elif part == 'build':
-        start = boundaries['build_start']
-        end = boundaries['build_end'] + 1 if boundaries['build_end'] > start else len(lines)
-        section_lines = lines[start:end]
-        info = f"Build section (lines {start+1}-{end})"
-
-    elif part == 'testrunner':
-        start = boundaries['testrunner_start']
-        end = boundaries['testrunner_end'] + 1 if boundaries['testrunner_end'] > start else len(lines)
-        # Don't include the failures section
-        if boundaries['failures_start'] > 0 and boundaries['failures_start'] < end:
-            end = boundaries['failures_start'] - 1
-        section_lines = lines[start:end]
-        info = f"TestRunner section (lines {start+1}-{end})"
-
-    elif part == 'failures':
-        start = boundaries['failures_start']
-        if start == 0:
-            return "", "No failures section found"
-        section_lines = lines[start:]
-        # Strip "# " prefix from each line
-        cleaned_lines = []
-        for line in section_lines:
-            if line.startswith('# '):
-                cleaned_lines.append(line[2:])
-            else:
-                cleaned_lines.append(line)
-        section_lines = cleaned_lines
-        info = f"Failures section (lines {start+1}-{len(lines)}, # prefix stripped)"
-
-    else:
-        return content, f"Unknown part '{part}', returning full log"
-
-    return '\n'.join(section_lines), info
+# Maximum test folders get_daily_test_summary queries at once
+FOLDER_CONCURRENCY = int(os.environ.get("LABKEY_MCP_FOLDER_CONCURRENCY", "6"))
 
 
 def _extract_toolsets_from_build_log(content: str) -> dict:
@@ -169,6 +85,413 @@ def _extract_toolsets_from_build_log(content: str) -> dict:
     return result
 
 
+async def _timed(timings: dict, name: str, coro):
+    """Await ``coro``, recording its wall time in ms as ``timings[name]``."""
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[name] = (time.perf_counter() - start) * 1000
+
+
+async def _fetch_daily_folder(
+    server: str,
+    container_path: str,
+    semaphore: asyncio.Semaphore,
+    window_start: datetime,
+    window_end: datetime,
+    baseline: str = "trained",
+) -> dict:
+    """Run one folder's daily report queries, overlapping independent ones.
+
+    Computer baselines and testruns_by_window run together; failures_by_date
+    and leaks_by_date then run together, each only if a run of this folder in
+    the window failed or leaked. All three windowed queries take the same
+    WindowStart/WindowEnd, so the server returns only in-window rows.
+
+    Baselines are the trained expected_computers values from the local run
+    metrics store (refreshed per its TTL), or with ``baseline="local"``
+    median/MAD statistics from the stored runs before window_start.
+
+    Returns:
+        Dict with "expected", "runs", "failures" and "leaks" row lists,
+        "baseline_info" (source of "expected"), "error" (exception from the
+        first stage, or None), "timings" (query name -> ms), "queued_ms" and
+        "critical_ms".
+    """
+    folder_name = container_path.split("/")[-1]
+    timings = {}
+    folder = {
+        "expected": [], "runs": [], "failures": [], "leaks": [], "baseline_info": {},
+        "error": None, "timings": timings, "queued_ms": 0.0, "critical_ms": 0.0,
+    }
+    window_params = {
+        "WindowStart": window_start.strftime("%Y-%m-%d %H:%M:%S"),
+        "WindowEnd": window_end.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    queued = time.perf_counter()
+    async with semaphore:
+        started = time.perf_counter()
+        folder["queued_ms"] = (started - queued) * 1000
+
+        expected_result, runs_result = await asyncio.gather(
+            _timed(timings, "baselines", (
+                metrics_store.get_local_baselines(server, container_path, window_start)
+                if baseline == "local"
+                else metrics_store.get_trained_baselines(server, container_path)
+            )),
+            _timed(timings, "testruns_by_window", cached_select_rows(
+                server,
+                container_path,
+                schema_name=TESTRESULTS_SCHEMA,
+                query_name="testruns_by_window",
+                parameters=window_params,
+                sort="-posttime",  # API sort required - ORDER BY in SQL unreliable
+            )),
+            return_exceptions=True,
+        )
+        for result in (expected_result, runs_result):
+            if isinstance(result, BaseException):
+                folder["error"] = result
+                folder["critical_ms"] = (time.perf_counter() - started) * 1000
+                return folder
+
+        folder["expected"], folder["baseline_info"] = expected_result
+        folder["runs"] = (runs_result or {}).get("rows") or []
+
+        # Paged in full; rows tied on every sort column are identical
+        second_stage = []
+        if any((row.get("failedtests") or 0) > 0 for row in folder["runs"]):
+            second_stage.append(("failures_by_date", "failures", "-posttime,testrunid,testname"))
+        if any((row.get("leakedtests") or 0) > 0 for row in folder["runs"]):
+            second_stage.append(("leaks_by_date", "leaks", "testname,leak_type,computer"))
+
+        results = await asyncio.gather(
+            *(
+                _timed(timings, query_name, cached_select_rows(
+                    server,
+                    container_path,
+                    schema_name=TESTRESULTS_SCHEMA,
+                    query_name=query_name,
+                    parameters=window_params,
+                    sort=sort,
+                ))
+                for query_name, _, sort in second_stage
+            ),
+            return_exceptions=True,
+        )
+        for (query_name, key, _), result in zip(second_stage, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error querying {query_name} for {folder_name}: {result}")
+            elif result:
+                folder[key] = result.get("rows") or []
+
+        folder["critical_ms"] = (time.perf_counter() - started) * 1000
+    return folder
+
+
+def _format_timing_section(folders: list, fetched: list, wall_ms: float) -> list[str]:
+    """Markdown lines for the report's per-folder timing breakdown."""
+    query_names = ["baselines", "testruns_by_window", "failures_by_date", "leaks_by_date"]
+    serial_ms = sum(sum(f["timings"].values()) for f in fetched)
+    lines = [
+        "## Timing",
+        "",
+        f"Folders queried concurrently (up to {FOLDER_CONCURRENCY} at once): "
+        f"{wall_ms:,.0f} ms wall time vs {serial_ms:,.0f} ms summed over individual queries.",
+        "Critical path is the folder's own wall time: the slower of baselines/testruns_by_window "
+        "plus the slower of failures_by_date/leaks_by_date. All times in ms; `-` = not needed.",
+        "",
+        "| Folder | Queued | " + " | ".join(query_names) + " | Critical path |",
+        "|--------|-------:|" + "".join("-" * (len(q) + 1) + ":|" for q in query_names) + "--------------:|",
+    ]
+    for (container_path, _), folder in zip(folders, fetched):
+        cells = [
+            f"{folder['timings'][q]:,.0f}" if q in folder["timings"] else "-"
+            for q in query_names
+        ]
+        critical = f"{folder['critical_ms']:,.0f}"
+        if folder["error"] is not None:
+            critical += " (error)"
+        lines.append(
+            f"| {container_path.split('/')[-1]} | {folder['queued_ms']:,.0f} | "
+            + " | ".join(cells) + f" | {critical} |"
+        )
+    lines.append("")
+    return lines
+
+# testrunid values per batched testfails request. The filter travels as a
+# query.testrunid~in=1;2;3 parameter, so keep each batch far below URL limits.
+TESTFAILS_BATCH_SIZE = 200
+
+
+async def _fetch_testfails_batched(
+    server: str,
+    container_path: str,
+    run_ids: list,
+    test_names: set = None,
+) -> list[dict]:
+    """testfails rows for many runs using one ``in`` query per batch of run IDs.
+
+    Batches run concurrently. Each batch names specific runs, so the cache
+    treats it as immutable like a single-run testfails query.
+
+    Args:
+        server: LabKey server
+        container_path: Test folder
+        run_ids: testrunid values
+        test_names: Only return rows for these test names (None = all)
+    """
+    run_ids = sorted({str(run_id) for run_id in run_ids})
+    name_filter = []
+    if test_names:
+        names = sorted(test_names)
+        if len(names) == 1:
+            name_filter = [QueryFilter("testname", names[0], "eq")]
+        else:
+            name_filter = [QueryFilter("testname", ";".join(names), "in")]
+
+    batches = [
+        run_ids[i:i + TESTFAILS_BATCH_SIZE]
+        for i in range(0, len(run_ids), TESTFAILS_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(*(
+        cached_select_rows(
+            server,
+            container_path,
+            schema_name=TESTRESULTS_SCHEMA,
+            query_name="testfails",
+            filter_array=[QueryFilter("testrunid", ";".join(batch), "in")] + name_filter,
+            sort="testrunid,pass,id",  # Unique, so paged batches cannot skip rows
+        )
+        for batch in batches
+    ))
+    return [row for result in results if result for row in result.get("rows", [])]
+
+
+async def _fetch_failure_histories(
+    server: str,
+    container_path: str,
+    failure_rows: list[dict],
+    test_names: set = None,
+) -> dict[str, list[dict]]:
+    """Group stack traces by test for the runs listed in failures_by_date rows.
+
+    Args:
+        failure_rows: failures_by_date rows (testname, testrunid, computer, posttime)
+        test_names: Tests to include (None = every test in ``failure_rows``)
+
+    Returns:
+        test name -> failures in failures_by_date order, each with run_id,
+        computer, posttime, pass_num and stacktrace
+    """
+    # (test, run) pairs in failures_by_date order, with run details
+    matching = {}
+    for row in failure_rows:
+        name = row.get("testname")
+        run_id = row.get("testrunid")
+        if not run_id or (test_names is not None and name not in test_names):
+            continue
+        posttime = row.get("posttime", "?")
+        matching[(name, str(run_id))] = {
+            "run_id": run_id,
+            "computer": row.get("computer", "?"),
+            "posttime": str(posttime)[:16] if posttime else "?",
+        }
+    if not matching:
+        return {}
+
+    rows = await _fetch_testfails_batched(
+        server,
+        container_path,
+        [run_id for _, run_id in matching],
+        test_names,
+    )
+    traces = defaultdict(list)
+    for row in rows:
+        traces[(row.get("testname"), str(row.get("testrunid")))].append(row)
+
+    histories = defaultdict(list)
+    for (name, run_key), run_info in matching.items():
+        for row in traces.get((name, run_key), []):
+            histories[name].append({
+                **run_info,
+                "pass_num": row.get("pass", "?"),
+                "stacktrace": row.get("stacktrace", "No stack trace"),
+            })
+    return dict(histories)
+
+
+def _write_failure_history(
+    test_name: str,
+    folder_name: str,
+    start_date: str,
+    end_date: str,
+    all_failures: list[dict],
+) -> tuple[Path, int]:
+    """Write ai/.tmp/test-failures-{testname}.md; returns (path, unique pattern count)."""
+    lines = [
+        f"# Failure History: {test_name}",
+        f"",
+        f"**Folder**: {folder_name}",
+        f"**Date range**: {start_date} to {end_date}",
+        f"**Total failures**: {len(all_failures)}",
+        f"",
+        "## Summary",
+        "",
+        "| Computer | Date | Pass |",
+        "|----------|------|------|",
+    ]
+
+    for f in all_failures:
+        lines.append(f"| {f['computer']} | {f['posttime']} | {f['pass_num']} |")
+
+    lines.extend(["", "## Stack Traces", ""])
+
+    # Group by unique stack traces to identify patterns
+    trace_groups = defaultdict(list)
+    for f in all_failures:
+        # Normalize stack trace for grouping (first 500 chars as key)
+        trace_key = f["stacktrace"][:500] if f["stacktrace"] else "empty"
+        trace_groups[trace_key].append(f)
+
+    lines.append(f"**Unique stack trace patterns**: {len(trace_groups)}")
+    lines.append("")
+
+    if len(trace_groups) == 1:
+        lines.append("All failures have the **same stack trace pattern** - likely same root cause.")
+        lines.append("")
+
+    # Output each unique pattern
+    pattern_num = 0
+    for trace_key, failures in trace_groups.items():
+        pattern_num += 1
+        computers = sorted(set(f["computer"] for f in failures))
+
+        lines.extend([
+            f"### Pattern {pattern_num} ({len(failures)} occurrences)",
+            f"",
+            f"**Computers**: {', '.join(computers)}",
+            f"",
+            "```",
+            failures[0]["stacktrace"],
+            "```",
+            "",
+        ])
+
+    # Sanitize test name for filename
+    safe_name = test_name.replace("/", "_").replace("\\", "_").replace(" ", "_")
+    output_file = get_tmp_dir() / f"test-failures-{safe_name}.md"
+    output_file.write_text("\n".join(lines), encoding="utf-8")
+    return output_file, len(trace_groups)
+
+
+# Fewest runs allowed on either side of a duration changepoint
+MIN_SEGMENT_RUNS = 3
+# Smallest pooled t-statistic reported as a duration step
+MIN_STEP_T = 3.0
+
+
+def _duration_step_up(values: list[float], min_segment: int = MIN_SEGMENT_RUNS) -> Optional[tuple[int, float]]:
+    """Best split of a duration series into a lower then a higher mean.
+
+    Scores every split k (values[:k] vs values[k:], each side at least
+    min_segment long) with a pooled two-sample t-statistic from running
+    sums of x and x^2, so one test costs a single O(n) pass.
+
+    Returns:
+        (k, t) for the largest positive t, or None if the series is too short
+        or never steps up.
+    """
+    n = len(values)
+    if n < 2 * min_segment:
+        return None
+    sums = [0.0]
+    squares = [0.0]
+    for value in values:
+        sums.append(sums[-1] + value)
+        squares.append(squares[-1] + value * value)
+    total, total_sq = sums[n], squares[n]
+
+    best = None
+    for k in range(min_segment, n - min_segment + 1):
+        left, right = k, n - k
+        mean_left = sums[k] / left
+        mean_right = (total - sums[k]) / right
+        if mean_right <= mean_left:
+            continue
+        # Within-segment sum of squared deviations, both sides pooled
+        ss = (squares[k] - left * mean_left ** 2) + (total_sq - squares[k] - right * mean_right ** 2)
+        var = max(ss, 0.0) / (n - 2)
+        se = (var * (1 / left + 1 / right)) ** 0.5
+        t = (mean_right - mean_left) / se if se > 1e-12 else float("inf")
+        if best is None or t > best[1]:
+            best = (k, t)
+    return best
+
+
+def _find_duration_regressions(
+    runs: list[dict],
+    matrix: dict,
+    min_step_percent: float,
+    min_delta_sec: float,
+) -> list[dict]:
+    """Duration step-ups for every test in a test x run matrix, largest impact first.
+
+    Each test's durations are divided by that test's median on the same
+    computer, so a slow machine joining or leaving the rotation does not read
+    as a step. The changepoint is found on the normalized series, then kept
+    only if it clears MIN_STEP_T, min_step_percent and a min_delta_sec rise
+    in the raw median duration. Impact is the added seconds per run
+    (median delta x mean passes after the step).
+    """
+    order = {run["run_id"]: i for i, run in enumerate(runs)}
+    regressions = []
+    for testname, by_run in matrix.items():
+        series = sorted(
+            (order[run_id], duration, passes)
+            for run_id, (duration, passes) in by_run.items()
+            if run_id in order and duration
+        )
+        if len(series) < 2 * MIN_SEGMENT_RUNS:
+            continue
+
+        per_computer = defaultdict(list)
+        for i, duration, _ in series:
+            per_computer[runs[i]["computer"]].append(duration)
+        medians = {computer: median(durations) for computer, durations in per_computer.items()}
+        normalized = [duration / medians[runs[i]["computer"]] for i, duration, _ in series]
+
+        step = _duration_step_up(normalized)
+        if step is None or step[1] < MIN_STEP_T:
+            continue
+        k, t = step
+        ratio = (sum(normalized[k:]) / len(normalized[k:])) / (sum(normalized[:k]) / k)
+        before = median([duration for _, duration, _ in series[:k]])
+        after = median([duration for _, duration, _ in series[k:]])
+        delta = after - before
+        if ratio < 1 + min_step_percent / 100 or delta < min_delta_sec:
+            continue
+
+        passes_after = sum(passes or 0 for _, _, passes in series[k:]) / len(series[k:])
+        regressions.append({
+            "testname": testname,
+            "first_bad": runs[series[k][0]],
+            "last_good": runs[series[k - 1][0]],
+            "before": before,
+            "after": after,
+            "delta": delta,
+            "percent": (ratio - 1) * 100,
+            "t": t,
+            "runs_before": k,
+            "runs_after": len(series) - k,
+            "impact": delta * passes_after,
+        })
+    regressions.sort(key=lambda r: r["impact"], reverse=True)
+    return regressions
+
+
 def register_tools(mcp):
     """Register nightly test analysis tools."""
 
@@ -181,15 +504,14 @@ def register_tools(mcp):
     ) -> str:
         """[D] Browse test runs. Prefer get_daily_test_summary. → nightly-tests.md"""
         try:
-            server_context = get_server_context(server, container_path)
-
             # Calculate date range for parameterized query
             end_date = datetime.now().strftime("%Y-%m-%d")
             start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
 
             # Use testruns_detail query which includes computer name
-            result = labkey.query.select_rows(
-                server_context=server_context,
+            result = await cached_select_rows(
+                server,
+                container_path,
                 schema_name=TESTRESULTS_SCHEMA,
                 query_name="testruns_detail",
                 max_rows=max_rows,
@@ -241,11 +563,11 @@ def register_tools(mcp):
     ) -> str:
         """[D] Stack traces for failed tests in a run. → nightly-tests.md"""
         try:
-            server_context = get_server_context(server, container_path)
             filter_array = [QueryFilter("testrunid", str(run_id), "eq")]
 
-            result = labkey.query.select_rows(
-                server_context=server_context,
+            result = await cached_select_rows(
+                server,
+                container_path,
                 schema_name=TESTRESULTS_SCHEMA,
                 query_name="testfails",
                 max_rows=100,
@@ -283,25 +605,10 @@ def register_tools(mcp):
     ) -> str:
         """[D] Test run log by section. Saves to ai/.tmp/testrun-log-{run_id}[-{part}].txt. → nightly-tests.md"""
         try:
-            # URL-encode the container path for the URL
-            encoded_path = quote(container_path, safe='/')
-            log_url = f"{_server_url(server)}{encoded_path}/testresults-viewLog.view?runId={run_id}"
-
-            logger.info(f"Fetching log from: {log_url}")
-
-            # Make authenticated HTTP request
-            response_bytes = make_authenticated_request(server, log_url, timeout=120)
-            response_text = response_bytes.decode("utf-8")
-
-            # Parse JSON response - endpoint returns {log: "..."}
-            data = json.loads(response_text)
-            log_content = data.get("log", "")
-
-            if not log_content:
-                return f"Test run #{run_id} has no log content"
-
-            # Extract requested section (also normalizes line endings to LF)
-            section_content, section_info = _extract_log_section(log_content, part)
+            # Streams only as much of the log as the section needs (LF-normalized)
+            section_content, section_info, stats = await runlog.get_log_section(
+                server, container_path, run_id, part
+            )
 
             if not section_content:
                 return f"Test run #{run_id}: {section_info}"
@@ -317,6 +624,12 @@ def register_tools(mcp):
             # Calculate metadata
             size_bytes = output_file.stat().st_size
             line_count = section_content.count("\n") + 1
+            if stats["source"] == "local":
+                source = f"local log cache ({stats['log_bytes']:,} bytes held)"
+            elif stats["complete"]:
+                source = "downloaded (full log)"
+            else:
+                source = f"downloaded (stopped after {stats['log_bytes']:,} bytes of log)"
 
             return (
                 f"Log saved successfully:\n"
@@ -324,6 +637,7 @@ def register_tools(mcp):
                 f"  section: {section_info}\n"
                 f"  size_bytes: {size_bytes:,}\n"
                 f"  line_count: {line_count:,}\n"
+                f"  source: {source}\n"
                 f"\nUse Grep or Read tools to search within this file."
             )
 
@@ -339,48 +653,12 @@ def register_tools(mcp):
     ) -> str:
         """[A] Toolset versions for a run build. → nightly-tests.md"""
         try:
-            output_dir = get_tmp_dir()
-
-            # Check for existing build log
-            build_log_file = output_dir / f"testrun-log-{run_id}-build.txt"
-            full_log_file = output_dir / f"testrun-log-{run_id}.txt"
-
-            build_content = None
-
-            # Try cached build log first
-            if build_log_file.exists():
-                logger.info(f"Using cached build log: {build_log_file}")
-                build_content = build_log_file.read_text(encoding="utf-8")
-            # Try cached full log and extract build section
-            elif full_log_file.exists():
-                logger.info(f"Extracting build section from cached full log: {full_log_file}")
-                full_content = full_log_file.read_text(encoding="utf-8")
-                build_content, _ = _extract_log_section(full_content, "build")
-
-            # Download if not cached
+            # Build section only; the download stops at "# Build done"
+            build_content, _, _ = await runlog.get_log_section(
+                server, container_path, run_id, "build"
+            )
             if not build_content:
-                logger.info(f"Downloading build log for run {run_id}")
-                encoded_path = quote(container_path, safe='/')
-                log_url = f"{_server_url(server)}{encoded_path}/testresults-viewLog.view?runId={run_id}"
-
-                response_bytes = make_authenticated_request(server, log_url, timeout=120)
-                response_text = response_bytes.decode("utf-8")
-
-                data = json.loads(response_text)
-                log_content = data.get("log", "")
-
-                if not log_content:
-                    return f"Test run #{run_id} has no log content"
-
-                # Extract build section
-                build_content, section_info = _extract_log_section(log_content, "build")
-
-                if not build_content:
-                    return f"Test run #{run_id}: No build section found"
-
-                # Cache the build log for future use
-                build_log_file.write_text(build_content, encoding="utf-8")
-                logger.info(f"Cached build log to: {build_log_file}")
+                return f"Test run #{run_id}: No build section found"
 
             # Extract toolsets
             toolsets = _extract_toolsets_from_build_log(build_content)
@@ -429,7 +707,7 @@ def register_tools(mcp):
             logger.info(f"Fetching XML from: {xml_url}")
 
             # Make authenticated HTTP request
-            response_bytes = make_authenticated_request(server, xml_url, timeout=120)
+            response_bytes = await cached_fetch(server, xml_url, timeout=120)
             response_text = response_bytes.decode("utf-8")
 
             # Parse JSON response - endpoint returns {xml: "..."}
@@ -472,7 +750,9 @@ def register_tools(mcp):
             filter_array = [QueryFilter("testrunid", str(run_id), "eq")]
 
             # Query both memory leaks and handle leaks
-            mem_result = labkey.query.select_rows(
+            mem_result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=TESTRESULTS_SCHEMA,
                 query_name="memoryleaks",
@@ -480,7 +760,9 @@ def register_tools(mcp):
                 filter_array=filter_array,
             )
 
-            handle_result = labkey.query.select_rows(
+            handle_result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=TESTRESULTS_SCHEMA,
                 query_name="handleleaks",
@@ -521,9 +803,16 @@ def register_tools(mcp):
     @mcp.tool()
     async def get_daily_test_summary(
         report_date: str,
+        baseline: Literal["trained", "local"] = "trained",
         server: str = DEFAULT_SERVER,
     ) -> str:
-        """[P] Daily nightly test report. Queries all 6 folders. Saves to ai/.tmp/nightly-report-YYYYMMDD.md. → nightly-tests.md"""
+        """[P] Daily nightly test report. Queries all 6 folders. Saves to ai/.tmp/nightly-report-YYYYMMDD.md. → nightly-tests.md
+
+        Args:
+            report_date: Date the nightly window ends (YYYY-MM-DD, 8:00 AM)
+            baseline: "trained" for expected_computers values (local copy), "local" for median/MAD of the prior 30 days of runs
+            server: LabKey server hostname
+        """
         # Parse report_date as the END of the nightly window
         # Nightly "day" runs from 8:01 AM day before to 8:00 AM report_date
         end_dt = datetime.strptime(report_date, "%Y-%m-%d")
@@ -533,14 +822,6 @@ def register_tools(mcp):
         window_start = start_dt.replace(hour=8, minute=1, second=0, microsecond=0)
         window_end = end_dt.replace(hour=8, minute=0, second=0, microsecond=0)
 
-        # Format timestamps for queries that support WindowStart/WindowEnd
-        window_start_str = window_start.strftime("%Y-%m-%d %H:%M:%S")
-        window_end_str = window_end.strftime("%Y-%m-%d %H:%M:%S")
-
-        # Calendar dates for testruns_detail query (filtered client-side by window)
-        start_date = start_dt.strftime("%Y-%m-%d")
-        end_date = end_dt.strftime("%Y-%m-%d")
-
         # All 6 test folders with their expected durations
         folders = [
             ("/home/development/Nightly x64", 540),
@@ -566,55 +847,39 @@ def register_tools(mcp):
         runs_with_leaks = []
         runs_with_hangs = []
 
-        for container_path, expected_duration in folders:
+        # Each folder's queries run as an independent pipeline; results are
+        # then processed in the fixed folder order so the report is stable.
+        semaphore = asyncio.Semaphore(FOLDER_CONCURRENCY)
+        fetch_start = time.perf_counter()
+        fetched = await asyncio.gather(*(
+            _fetch_daily_folder(server, container_path, semaphore, window_start, window_end, baseline)
+            for container_path, _ in folders
+        ))
+        fetch_wall_ms = (time.perf_counter() - fetch_start) * 1000
+        fetched_by_path = {
+            container_path: folder for (container_path, _), folder in zip(folders, fetched)
+        }
+
+        for (container_path, expected_duration), fetched_folder in zip(folders, fetched):
             folder_name = container_path.split("/")[-1]
             try:
-                server_context = get_server_context(server, container_path)
+                if fetched_folder["error"] is not None:
+                    raise fetched_folder["error"]
 
-                # Query expected computers with their trained values
-                expected_result = labkey.query.select_rows(
-                    server_context=server_context,
-                    schema_name=TESTRESULTS_SCHEMA,
-                    query_name="expected_computers",
-                    max_rows=100,
-                )
+                # Expected computers with their trained values
                 expected_computers = {}
-                if expected_result and expected_result.get("rows"):
-                    for ec in expected_result["rows"]:
-                        comp_name = ec.get("computer", "")
-                        if comp_name:
-                            expected_computers[comp_name] = {
-                                "meantestsrun": ec.get("meantestsrun", 0),
-                                "stddevtestsrun": ec.get("stddevtestsrun", 1),
-                                "meanmemory": ec.get("meanmemory", 0),
-                                "stddevmemory": ec.get("stddevmemory", 1),
-                            }
-
-                result = labkey.query.select_rows(
-                    server_context=server_context,
-                    schema_name=TESTRESULTS_SCHEMA,
-                    query_name="testruns_detail",
-                    max_rows=50,
-                    parameters={"StartDate": start_date, "EndDate": end_date},
-                    sort="-posttime",  # API sort required - ORDER BY in SQL unreliable
-                )
+                for ec in fetched_folder["expected"]:
+                    comp_name = ec.get("computer", "")
+                    if comp_name:
+                        expected_computers[comp_name] = {
+                            "meantestsrun": ec.get("meantestsrun", 0),
+                            "stddevtestsrun": ec.get("stddevtestsrun", 1),
+                            "meanmemory": ec.get("meanmemory", 0),
+                            "stddevmemory": ec.get("stddevmemory", 1),
+                        }
 
-                rows = result.get("rows", []) if result else []
-
-                # Filter rows by posttime within the 8AM-8AM window
-                filtered_rows = []
-                for row in rows:
-                    posttime_str = row.get("posttime", "")
-                    if posttime_str:
-                        try:
-                            # Parse posttime (format: "2025-12-16 21:07:00.000" or similar)
-                            posttime_dt = datetime.strptime(str(posttime_str)[:19], "%Y-%m-%d %H:%M:%S")
-                            if window_start <= posttime_dt <= window_end:
-                                filtered_rows.append(row)
-                        except ValueError:
-                            # If parsing fails, include the row (be permissive)
-                            filtered_rows.append(row)
-                rows = filtered_rows
+                # Runs in the 8AM-8AM window (filtered server-side)
+                rows = fetched_folder["runs"]
 
                 if not rows:
                     summary_lines.append(f"| {folder_name} | 0 | - | - | - | - |")
@@ -658,7 +923,7 @@ def register_tools(mcp):
                         ec = expected_computers[computer]
                         mean_tests = ec["meantestsrun"]
                         stddev_tests = ec["stddevtestsrun"]
-                        if stddev_tests > 0:
+                        if mean_tests is not None and (stddev_tests or 0) > 0:
                             z_score = abs(passed - mean_tests) / stddev_tests
                             if z_score >= 4:
                                 is_anomaly = True
@@ -748,11 +1013,28 @@ def register_tools(mcp):
                 logger.error(f"Error querying {folder_name}: {e}")
                 summary_lines.append(f"| {folder_name} | ERROR | - | - | - | - |")
 
+        # Where each folder's anomaly baselines came from, e.g. "local copy (3h old) x6"
+        baseline_sources = defaultdict(int)
+        for fetched_folder in fetched:
+            info = fetched_folder["baseline_info"]
+            if info:
+                source = info["source"]
+                if (info.get("age_hours") or 0) >= 1:
+                    source += f" ({info['age_hours']:.0f}h old)"
+                baseline_sources[source] += 1
         summary_lines.extend([
             "",
             f"**Total tests run**: {total_tests:,}",
             "",
         ])
+        if baseline_sources:
+            summary_lines.extend([
+                "**Baselines**: " + ", ".join(
+                    f"{source} x{count}" if count > 1 else source
+                    for source, count in baseline_sources.items()
+                ),
+                "",
+            ])
 
         # Add details for each folder with data
         for folder_data in all_results:
@@ -782,7 +1064,7 @@ def register_tools(mcp):
 
             summary_lines.append("")
 
-        # Query failures and leaks by test name for each folder with issues
+        # Failures and leaks by test name (queried above for folders with issues)
         all_failures = []  # (testname, computer, folder)
         all_leaks = []  # (testname, computer, folder, leak_type)
 
@@ -790,50 +1072,21 @@ def register_tools(mcp):
             if not folder_data["runs"]:
                 continue
 
-            container_path = folder_data["container_path"]
             folder_name = folder_data["folder"]
-
-            # Check if this folder had any failures or leaks
-            has_failures = any(r["failed"] > 0 for r in folder_data["runs"])
-            has_leaks = any(r["leaked"] > 0 for r in folder_data["runs"])
-
-            try:
-                server_context = get_server_context(server, container_path)
-
-                if has_failures:
-                    fail_result = labkey.query.select_rows(
-                        server_context=server_context,
-                        schema_name=TESTRESULTS_SCHEMA,
-                        query_name="failures_by_date",
-                        max_rows=100,
-                        parameters={"WindowStart": window_start_str, "WindowEnd": window_end_str},
-                    )
-                    if fail_result and fail_result.get("rows"):
-                        for row in fail_result["rows"]:
-                            all_failures.append({
-                                "testname": row.get("testname", "?"),
-                                "computer": row.get("computer", "?"),
-                                "folder": folder_name,
-                            })
-
-                if has_leaks:
-                    leak_result = labkey.query.select_rows(
-                        server_context=server_context,
-                        schema_name=TESTRESULTS_SCHEMA,
-                        query_name="leaks_by_date",
-                        max_rows=100,
-                        parameters={"WindowStart": window_start_str, "WindowEnd": window_end_str},
-                    )
-                    if leak_result and leak_result.get("rows"):
-                        for row in leak_result["rows"]:
-                            all_leaks.append({
-                                "testname": row.get("testname", "?"),
-                                "computer": row.get("computer", "?"),
-                                "folder": folder_name,
-                                "leak_type": row.get("leak_type", "?"),
-                            })
-            except Exception as e:
-                logger.error(f"Error querying failures/leaks for {folder_name}: {e}")
+            fetched_folder = fetched_by_path[folder_data["container_path"]]
+            for row in fetched_folder["failures"]:
+                all_failures.append({
+                    "testname": row.get("testname", "?"),
+                    "computer": row.get("computer", "?"),
+                    "folder": folder_name,
+                })
+            for row in fetched_folder["leaks"]:
+                all_leaks.append({
+                    "testname": row.get("testname", "?"),
+                    "computer": row.get("computer", "?"),
+                    "folder": folder_name,
+                    "leak_type": row.get("leak_type", "?"),
+                })
 
         # Group failures by test name
         if all_failures:
@@ -892,6 +1145,8 @@ def register_tools(mcp):
                 summary_lines.append(f"| {testname} | {language} | {computers_str} | {folder} |")
             summary_lines.append("")
 
+        summary_lines.extend(_format_timing_section(folders, fetched, fetch_wall_ms))
+
         # Write full report to file
         report_content = "\n".join(summary_lines)
 
@@ -959,134 +1214,36 @@ def register_tools(mcp):
         window_start_str = f"{start_date} 00:00:00"
         window_end_str = f"{end_date} 23:59:59"
 
-        all_failures = []
-
         try:
-            server_context = get_server_context(server, container_path)
-
-            # Get failures for this test in the date range
-            fail_result = labkey.query.select_rows(
-                server_context=server_context,
+            # Get failures in the date range
+            fail_result = await cached_select_rows(
+                server,
+                container_path,
                 schema_name=TESTRESULTS_SCHEMA,
                 query_name="failures_by_date",
-                max_rows=500,
                 parameters={"WindowStart": window_start_str, "WindowEnd": window_end_str},
+                sort="-posttime,testrunid,testname",  # Paged; rows tied on all three are identical
             )
 
             if not fail_result or not fail_result.get("rows"):
                 return f"No failures found in '{folder_name}' for {start_date} to {end_date}."
 
-            # Filter for our specific test and collect run IDs
-            matching_runs = {}
-            for row in fail_result["rows"]:
-                if row.get("testname") == test_name:
-                    run_id = row.get("testrunid")
-                    computer = row.get("computer", "?")
-                    posttime = row.get("posttime", "?")
-                    if run_id:
-                        matching_runs[run_id] = {
-                            "computer": computer,
-                            "posttime": str(posttime)[:16] if posttime else "?",
-                        }
-
-            if not matching_runs:
-                return f"No failures found for test '{test_name}' in '{folder_name}' ({start_date} to {end_date})."
-
-            # Get the full stack traces from testfails for each run
-            for run_id, run_info in matching_runs.items():
-                try:
-                    stack_result = labkey.query.select_rows(
-                        server_context=server_context,
-                        schema_name=TESTRESULTS_SCHEMA,
-                        query_name="testfails",
-                        max_rows=10,
-                        filter_array=[
-                            QueryFilter("testrunid", str(run_id), "eq"),
-                            QueryFilter("testname", test_name, "eq"),
-                        ],
-                    )
-
-                    if stack_result and stack_result.get("rows"):
-                        for row in stack_result["rows"]:
-                            all_failures.append({
-                                "run_id": run_id,
-                                "computer": run_info["computer"],
-                                "posttime": run_info["posttime"],
-                                "pass_num": row.get("pass", "?"),
-                                "stacktrace": row.get("stacktrace", "No stack trace"),
-                            })
-                except Exception as e:
-                    logger.error(f"Error getting stack trace for run {run_id}: {e}")
+            # Stack traces for every matching run in one batched testfails pass
+            histories = await _fetch_failure_histories(
+                server, container_path, fail_result["rows"], {test_name}
+            )
 
         except Exception as e:
             logger.error(f"Error querying {folder_name}: {e}")
             return f"Error querying {folder_name}: {e}"
 
+        all_failures = histories.get(test_name)
         if not all_failures:
             return f"No failures found for test '{test_name}' in '{folder_name}' ({start_date} to {end_date})."
 
-        # Build the report
-        lines = [
-            f"# Failure History: {test_name}",
-            f"",
-            f"**Folder**: {folder_name}",
-            f"**Date range**: {start_date} to {end_date}",
-            f"**Total failures**: {len(all_failures)}",
-            f"",
-            "## Summary",
-            "",
-            "| Computer | Date | Pass |",
-            "|----------|------|------|",
-        ]
-
-        for f in all_failures:
-            lines.append(f"| {f['computer']} | {f['posttime']} | {f['pass_num']} |")
-
-        lines.extend(["", "## Stack Traces", ""])
-
-        # Group by unique stack traces to identify patterns
-        trace_groups = defaultdict(list)
-        for f in all_failures:
-            # Normalize stack trace for grouping (first 500 chars as key)
-            trace_key = f["stacktrace"][:500] if f["stacktrace"] else "empty"
-            trace_groups[trace_key].append(f)
-
-        lines.append(f"**Unique stack trace patterns**: {len(trace_groups)}")
-        lines.append("")
-
-        if len(trace_groups) == 1:
-            lines.append("All failures have the **same stack trace pattern** - likely same root cause.")
-            lines.append("")
-
-        # Output each unique pattern
-        pattern_num = 0
-        for trace_key, failures in trace_groups.items():
-            pattern_num += 1
-            computers = sorted(set(f["computer"] for f in failures))
-
-            lines.extend([
-                f"### Pattern {pattern_num} ({len(failures)} occurrences)",
-                f"",
-                f"**Computers**: {', '.join(computers)}",
-                f"",
-                "```",
-                failures[0]["stacktrace"],
-                "```",
-                "",
-            ])
-
-        # Write to file
-        report_content = "\n".join(lines)
-
-        output_dir = get_tmp_dir()
-
-        # Sanitize test name for filename
-        safe_name = test_name.replace("/", "_").replace("\\", "_").replace(" ", "_")
-        output_file = output_dir / f"test-failures-{safe_name}.md"
-        output_file.write_text(report_content, encoding="utf-8")
-
-        # Build brief summary
-        unique_patterns = len(trace_groups)
+        output_file, unique_patterns = _write_failure_history(
+            test_name, folder_name, start_date, end_date, all_failures
+        )
         pattern_msg = "same root cause" if unique_patterns == 1 else f"{unique_patterns} different patterns"
 
         return (
@@ -1100,6 +1257,75 @@ def register_tools(mcp):
             f"See {output_file} for full stack traces."
         )
 
+    @mcp.tool()
+    async def save_test_failure_histories(
+        start_date: str,
+        end_date: Optional[str] = None,
+        test_names: str = "",
+        server: str = DEFAULT_SERVER,
+        container_path: str = DEFAULT_TEST_CONTAINER,
+    ) -> str:
+        """[D] save_test_failure_history for many tests in one pass. Saves ai/.tmp/test-failures-{testname}.md per test. → nightly-tests.md
+
+        Args:
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD), defaults to start_date
+            test_names: Comma-separated test names; empty = every test that failed in the range
+        """
+        if not end_date:
+            end_date = start_date
+        folder_name = container_path.split("/")[-1]
+        wanted = {name.strip() for name in test_names.split(",") if name.strip()} or None
+
+        window_start_str = f"{start_date} 00:00:00"
+        window_end_str = f"{end_date} 23:59:59"
+
+        try:
+            fail_result = await cached_select_rows(
+                server,
+                container_path,
+                schema_name=TESTRESULTS_SCHEMA,
+                query_name="failures_by_date",
+                parameters={"WindowStart": window_start_str, "WindowEnd": window_end_str},
+                sort="-posttime,testrunid,testname",  # Paged; rows tied on all three are identical
+            )
+
+            if not fail_result or not fail_result.get("rows"):
+                return f"No failures found in '{folder_name}' for {start_date} to {end_date}."
+
+            histories = await _fetch_failure_histories(
+                server, container_path, fail_result["rows"], wanted
+            )
+
+        except Exception as e:
+            logger.error(f"Error querying {folder_name}: {e}")
+            return f"Error querying {folder_name}: {e}"
+
+        if not histories:
+            return f"No failures found for the requested tests in '{folder_name}' ({start_date} to {end_date})."
+
+        lines = [
+            f"Failure histories for {len(histories)} tests in {folder_name} ({start_date} to {end_date}):",
+            "",
+        ]
+        for name in sorted(histories):
+            failures = histories[name]
+            output_file, unique_patterns = _write_failure_history(
+                name, folder_name, start_date, end_date, failures
+            )
+            computers = len(set(f["computer"] for f in failures))
+            lines.append(
+                f"  - {name}: {len(failures)} failures, {unique_patterns} trace pattern(s), "
+                f"{computers} computer(s) -> {output_file.name}"
+            )
+
+        missing = sorted(wanted - set(histories)) if wanted else []
+        if missing:
+            lines.extend(["", f"No failures found for: {', '.join(missing)}"])
+
+        lines.extend(["", f"Reports saved to: {get_tmp_dir()}"])
+        return "\n".join(lines)
+
     @mcp.tool()
     async def save_test_leak_history(
         test_name: str,
@@ -1118,15 +1344,14 @@ def register_tools(mcp):
         window_end_str = f"{end_date} 23:59:59"
 
         try:
-            server_context = get_server_context(server, container_path)
-
             # Query leaks_history - returns all leak events with bytes/handles/githash
-            result = labkey.query.select_rows(
-                server_context=server_context,
+            result = await select_all_rows(
+                server,
+                container_path,
                 schema_name=TESTRESULTS_SCHEMA,
                 query_name="leaks_history",
-                max_rows=500,
                 parameters={"StartDate": window_start_str, "EndDate": window_end_str},
+                sort="run_id,testname,leak_type,leak_bytes,leak_handles",
             )
 
             if not result or not result.get("rows"):
@@ -1246,6 +1471,170 @@ def register_tools(mcp):
             logger.error(f"Error querying leak history: {e}", exc_info=True)
             return f"Error querying leak history: {e}"
 
+    @mcp.tool()
+    async def save_leak_trends(
+        start_date: str = "90d",
+        end_date: Optional[str] = None,
+        container_paths: Optional[str] = None,
+        min_events: int = leaktrend.MIN_EVENTS,
+        min_growth_percent: float = 10,
+        max_tests: int = 50,
+        server: str = DEFAULT_SERVER,
+    ) -> str:
+        """[A] Leak growth slopes and first-seen dates for every test across folders. Saves to ai/.tmp/leak-trends-{start}-{end}.md. → nightly-tests.md
+
+        Args:
+            start_date: Start date (YYYY-MM-DD) or relative like "1y", "6m", "30d"
+            end_date: End date (YYYY-MM-DD), defaults to today
+            container_paths: Comma-separated test folders (default: all 6 nightly folders)
+            min_events: Fewest leaks a test needs before its growth slope is reported
+            min_growth_percent: Smallest growth (% of the mean leak per 30 days) listed as growing
+            max_tests: Maximum tests listed per report section
+            server: LabKey server hostname
+        """
+        import csv
+
+        start_date, end_date = resolve_relative_date(start_date, end_date)
+
+        if container_paths:
+            folders = [p.strip() for p in container_paths.split(",") if p.strip()]
+        else:
+            folders = TEST_FOLDERS
+
+        try:
+            # One paged pull per folder (only new runs once synced), folders concurrently
+            semaphore = asyncio.Semaphore(FOLDER_CONCURRENCY)
+
+            async def fetch(container_path):
+                async with semaphore:
+                    return await metrics_store.get_leak_events(server, container_path, start_date, end_date)
+
+            results = await asyncio.gather(*(fetch(p) for p in folders), return_exceptions=True)
+
+            table = leaktrend.LeakTable()
+            requests = fetched = 0
+            errors = []
+            for container_path, result in zip(folders, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Error syncing leaks for {container_path}: {result}")
+                    errors.append(f"{container_path.split('/')[-1]}: {result}")
+                    continue
+                events, sync_info = result
+                table.add_events(container_path, events)
+                requests += sync_info["requests"]
+                fetched += sync_info["fetched"]
+
+            if not len(table):
+                message = f"No leaks found in {len(folders)} folder(s) from {start_date} to {end_date}"
+                return message + ("\nErrors: " + "; ".join(errors) if errors else "")
+
+            trends = await asyncio.to_thread(leaktrend.leak_trends, table, min_events)
+
+            growing = sorted(
+                (t for t in trends if (t["growth_percent"] or 0) >= min_growth_percent),
+                key=lambda t: t["growth_percent"], reverse=True,
+            )
+            # First seen well after the window opened: likely introduced in the window
+            new_after = (datetime.strptime(start_date, "%Y-%m-%d") + timedelta(days=7)).strftime("%Y-%m-%d")
+            new_leaks = sorted(
+                (t for t in trends if t["first_seen"] > new_after),
+                key=lambda t: t["first_seen"], reverse=True,
+            )
+
+            output_dir = get_tmp_dir()
+            start_str = start_date.replace("-", "")
+            end_str = end_date.replace("-", "")
+            csv_file = output_dir / f"leak-trends-{start_str}-{end_str}.csv"
+            columns = [
+                "testname", "events", "computers", "folders", "first_seen", "last_seen",
+                "first_run_id", "first_computer", "first_folder", "first_githash",
+                "mean_bytes", "bytes_per_day", "mean_handles", "handles_per_day", "growth_percent",
+            ]
+            with open(csv_file, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                for t in trends:
+                    writer.writerow({
+                        **t,
+                        "folders": ";".join(t["folders"]),
+                        **{k: round(t[k], 2) for k in columns[10:] if t[k] is not None},
+                    })
+
+            def fmt(value, unit=""):
+                return "-" if value is None else f"{value:,.0f}{unit}"
+
+            lines = [
+                "# Leak Trends",
+                "",
+                f"**Date range**: {start_date} to {end_date}",
+                f"**Folders**: {', '.join(p.split('/')[-1] for p in folders)}",
+                f"**Leak events**: {len(table):,} across {len(trends)} tests",
+                f"**All tests**: {csv_file}",
+                "",
+                "Slopes are least-squares leak size per day, pooled within each computer. "
+                f"Growth is the slope over {leaktrend.GROWTH_WINDOW_DAYS} days as a percentage of the mean leak "
+                f"(tests with at least {min_events} leaks).",
+                "",
+            ]
+            if errors:
+                lines.extend([f"**Errors**: {'; '.join(errors)}", ""])
+
+            lines.extend([
+                f"## Growing Leaks (≥ {min_growth_percent:g}% per {leaktrend.GROWTH_WINDOW_DAYS} days)",
+                "",
+                "| Test | Leaks | Computers | Mean Bytes | Bytes/Day | Mean Handles | Handles/Day | Growth | First Seen |",
+                "|------|-------|-----------|------------|-----------|--------------|-------------|--------|------------|",
+            ])
+            for t in growing[:max_tests]:
+                lines.append(
+                    f"| {t['testname'][:45]} | {t['events']} | {t['computers']} | {fmt(t['mean_bytes'])} | "
+                    f"{fmt(t['bytes_per_day'])} | {fmt(t['mean_handles'])} | {fmt(t['handles_per_day'])} | "
+                    f"+{t['growth_percent']:.0f}% | {t['first_seen']} |"
+                )
+            if not growing:
+                lines.append("| (none) | | | | | | | | |")
+
+            lines.extend([
+                "",
+                f"## New Leaks (first seen after {new_after})",
+                "",
+                "| Test | First Seen | Folder | Computer | Run | Git Hash | Leaks |",
+                "|------|------------|--------|----------|-----|----------|-------|",
+            ])
+            for t in new_leaks[:max_tests]:
+                lines.append(
+                    f"| {t['testname'][:45]} | {t['first_seen']} | {t['first_folder'].split('/')[-1]} | "
+                    f"{t['first_computer']} | {t['first_run_id']} | {t['first_githash'][:9]} | {t['events']} |"
+                )
+            if not new_leaks:
+                lines.append("| (none) | | | | | | |")
+            lines.append("")
+
+            output_file = output_dir / f"leak-trends-{start_str}-{end_str}.md"
+            output_file.write_text("\n".join(lines), encoding="utf-8")
+
+            brief = [
+                f"Leak trends saved to: {output_file}",
+                f"All tests saved to: {csv_file}",
+                "",
+                f"{start_date} to {end_date}, {len(folders)} folder(s): {len(table):,} leak events across {len(trends)} tests "
+                f"({fetched} rows fetched in {requests} request(s), rest from local store)",
+                f"  Growing leaks: {len(growing)}",
+                f"  New leaks (first seen after {new_after}): {len(new_leaks)}",
+            ]
+            if errors:
+                brief.append(f"  Errors: {'; '.join(errors)}")
+            if growing:
+                brief.extend(["", "Fastest growing:"])
+                for t in growing[:3]:
+                    brief.append(f"  - {t['testname']}: +{t['growth_percent']:.0f}% per {leaktrend.GROWTH_WINDOW_DAYS} days ({t['events']} leaks)")
+            brief.extend(["", f"See {output_file} for full details."])
+            return "\n".join(brief)
+
+        except Exception as e:
+            logger.error(f"Error computing leak trends: {e}", exc_info=True)
+            return f"Error computing leak trends: {e}"
+
     @mcp.tool()
     async def save_daily_failures(
         report_date: str,
@@ -1280,17 +1669,16 @@ def register_tools(mcp):
         for container_path in folders:
             folder_name = container_path.split("/")[-1]
             try:
-                server_context = get_server_context(server, container_path)
-
-                result = labkey.query.select_rows(
-                    server_context=server_context,
+                result = await cached_select_rows(
+                    server,
+                    container_path,
                     schema_name=TESTRESULTS_SCHEMA,
                     query_name="failures_with_traces_by_date",
-                    max_rows=500,
                     parameters={
                         "WindowStart": window_start_str,
                         "WindowEnd": window_end_str,
                     },
+                    sort="testname,-posttime,testrunid,passnum",  # Paged; one failure per test per pass
                 )
 
                 if result and result.get("rows"):
@@ -1512,7 +1900,9 @@ def register_tools(mcp):
         try:
             server_context = get_server_context(server, container_path)
 
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=TESTRESULTS_SCHEMA,
                 query_name="compare_run_timings",
@@ -1739,12 +2129,128 @@ def register_tools(mcp):
             logger.error(f"Error comparing run timings: {e}", exc_info=True)
             return f"Error comparing run timings: {e}"
 
+    @mcp.tool()
+    async def save_duration_regressions(
+        start_date: str = "30d",
+        end_date: Optional[str] = None,
+        min_step_percent: float = 20,
+        min_delta_sec: float = 2,
+        max_tests: int = 50,
+        server: str = DEFAULT_SERVER,
+        container_path: str = DEFAULT_TEST_CONTAINER,
+    ) -> str:
+        """[A] Rank per-test duration step-ups across all runs in a window. Saves to ai/.tmp/duration-regressions-{folder}-{start}-{end}.md. → nightly-tests.md
+
+        Args:
+            start_date: Start date (YYYY-MM-DD) or relative like "1y", "6m", "30d"
+            end_date: End date (YYYY-MM-DD), defaults to today
+            min_step_percent: Smallest step (% over the per-computer baseline) to report
+            min_delta_sec: Smallest rise in median duration (seconds) to report
+            max_tests: Maximum regressions listed in the report
+            server: LabKey server hostname
+            container_path: Test folder path (e.g., "/home/development/Nightly x64")
+        """
+        import csv
+
+        folder_name = container_path.split("/")[-1]
+
+        start_date, end_date = resolve_relative_date(start_date, end_date)
+
+        try:
+            # One paged pull per dataset; later calls fetch only new runs
+            runs, matrix, sync_info = await metrics_store.get_duration_matrix(
+                server, container_path, start_date, end_date
+            )
+            if not runs or not matrix:
+                return f"No test durations found in {folder_name} from {start_date} to {end_date}"
+
+            regressions = await asyncio.to_thread(
+                _find_duration_regressions, runs, matrix, min_step_percent, min_delta_sec
+            )
+
+            output_dir = get_tmp_dir()
+            safe_folder = folder_name.replace(" ", "-").replace("/", "-")
+            start_str = start_date.replace("-", "")
+            end_str = end_date.replace("-", "")
+
+            # Test x run matrix of average durations, runs in posttime order
+            matrix_file = output_dir / f"duration-matrix-{safe_folder}-{start_str}-{end_str}.csv"
+            with open(matrix_file, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["testname"] + [run["run_id"] for run in runs])
+                for testname in sorted(matrix):
+                    by_run = matrix[testname]
+                    writer.writerow([testname] + [
+                        round(by_run[run["run_id"]][0], 1) if run["run_id"] in by_run else ""
+                        for run in runs
+                    ])
+
+            lines = [
+                f"# Duration Regressions: {folder_name}",
+                "",
+                f"**Date range**: {start_date} to {end_date}",
+                f"**Runs**: {len(runs)}, **Tests**: {len(matrix)}",
+                f"**Thresholds**: step ≥ {min_step_percent:g}%, median delta ≥ {min_delta_sec:g}s, t ≥ {MIN_STEP_T:g}",
+                f"**Matrix**: {matrix_file}",
+                "",
+                "Each test's durations are normalized by its median on the same computer, then split at the run "
+                "where the mean steps up most. First bad run is the first run after the split; last good is the run before it.",
+                "",
+            ]
+            if not regressions:
+                lines.append("No duration regressions found.")
+            else:
+                lines.extend([
+                    "## Regressions (by added seconds per run)",
+                    "",
+                    "| # | Test | Before | After | Step | Added/run | t | First Bad Run | Date | Computer | Git Hash | Last Good Hash |",
+                    "|---|------|--------|-------|------|-----------|---|---------------|------|----------|----------|----------------|",
+                ])
+                for i, r in enumerate(regressions[:max_tests], 1):
+                    bad, good = r["first_bad"], r["last_good"]
+                    lines.append(
+                        f"| {i} | {r['testname'][:45]} | {r['before']:.0f}s | {r['after']:.0f}s | "
+                        f"+{r['percent']:.0f}% | {r['impact']:+,.0f}s | {r['t']:.1f} | "
+                        f"{bad['run_id']} | {str(bad['posttime'])[:10]} | {bad['computer']} | "
+                        f"{(bad['githash'] or '?')[:9]} | {(good['githash'] or '?')[:9]} |"
+                    )
+                if len(regressions) > max_tests:
+                    lines.append(f"\n... and {len(regressions) - max_tests} more")
+            lines.append("")
+
+            output_file = output_dir / f"duration-regressions-{safe_folder}-{start_str}-{end_str}.md"
+            output_file.write_text("\n".join(lines), encoding="utf-8")
+
+            brief = [
+                f"Duration regressions saved to: {output_file}",
+                f"Test x run matrix saved to: {matrix_file}",
+                "",
+                f"**{folder_name}**: {start_date} to {end_date}",
+                f"  Runs: {len(runs)}, tests: {len(matrix)} "
+                f"({sync_info['fetched']} rows fetched in {sync_info['requests']} request(s), rest from local store)",
+                f"  Regressions: {len(regressions)}",
+            ]
+            if regressions:
+                brief.extend(["", "Top regressions:"])
+                for r in regressions[:3]:
+                    brief.append(
+                        f"  - {r['testname']}: {r['before']:.0f}s → {r['after']:.0f}s (+{r['percent']:.0f}%), "
+                        f"first bad run {r['first_bad']['run_id']} ({(r['first_bad']['githash'] or '?')[:9]})"
+                    )
+            brief.extend(["", f"See {output_file} for full details."])
+            return "\n".join(brief)
+
+        except Exception as e:
+            logger.error(f"Error finding duration regressions: {e}", exc_info=True)
+            return f"Error finding duration regressions: {e}"
+
     @mcp.tool()
     async def save_run_metrics_csv(
         start_date: str,
         end_date: Optional[str] = None,
         metrics: str = "memory,tests,duration",
         granularity: Literal["run", "day"] = "run",
+        rolling: bool = True,
         server: str = DEFAULT_SERVER,
         container_path: str = DEFAULT_TEST_CONTAINER,
     ) -> str:
@@ -1755,6 +2261,7 @@ def register_tools(mcp):
             end_date: End date (YYYY-MM-DD), defaults to today
             metrics: Comma-separated metrics: memory,tests,duration,failures,leaks
             granularity: "run" for one row per run, "day" for daily means with run_count
+            rolling: Add stats columns - day: 7/30-day rolling means + 30-day ±2σ band; run: per-computer z-scores
             server: LabKey server hostname
             container_path: Test folder path (e.g., "/home/development/Nightly x64")
         """
@@ -1763,23 +2270,7 @@ def register_tools(mcp):
 
         folder_name = container_path.split("/")[-1]
 
-        # Parse relative dates
-        today = datetime.now()
-        if end_date is None:
-            end_date = today.strftime("%Y-%m-%d")
-
-        if start_date.endswith("y"):
-            years = int(start_date[:-1])
-            start_dt = today - timedelta(days=years * 365)
-            start_date = start_dt.strftime("%Y-%m-%d")
-        elif start_date.endswith("m"):
-            months = int(start_date[:-1])
-            start_dt = today - timedelta(days=months * 30)
-            start_date = start_dt.strftime("%Y-%m-%d")
-        elif start_date.endswith("d"):
-            days = int(start_date[:-1])
-            start_dt = today - timedelta(days=days)
-            start_date = start_dt.strftime("%Y-%m-%d")
+        start_date, end_date = resolve_relative_date(start_date, end_date)
 
         # Parse metrics list
         requested_metrics = [m.strip().lower() for m in metrics.split(",")]
@@ -1787,113 +2278,29 @@ def register_tools(mcp):
         invalid = set(requested_metrics) - valid_metrics
         if invalid:
             return f"Invalid metrics: {invalid}. Valid options: {valid_metrics}"
+        # CSV columns always follow memory,tests,duration,failures,leaks
+        requested_metrics = [m for m in metrics_store.METRICS if m in requested_metrics]
 
         try:
-            server_context = get_server_context(server, container_path)
-
-            # Query all runs in date range
-            # Note: testruns_detail uses StartDate/EndDate parameters
-            result = labkey.query.select_rows(
-                server_context=server_context,
-                schema_name=TESTRESULTS_SCHEMA,
-                query_name="testruns_detail",
-                max_rows=10000,  # Up to ~27 years of daily runs
-                parameters={"StartDate": start_date, "EndDate": end_date},
-                sort="posttime",
-            )
-
-            if not result or not result.get("rows"):
-                return f"No runs found in {folder_name} from {start_date} to {end_date}"
-
-            rows = result["rows"]
-
-            # Build CSV based on granularity
-            output = StringIO()
-
+            # Aggregated in SQL over the local store (fetches only the delta)
             if granularity == "run":
-                # One row per run with raw values
-                fieldnames = ["date", "computer"]
-                if "memory" in requested_metrics:
-                    fieldnames.append("memory_mb")
-                if "tests" in requested_metrics:
-                    fieldnames.append("tests")
-                if "duration" in requested_metrics:
-                    fieldnames.append("duration_min")
-                if "failures" in requested_metrics:
-                    fieldnames.append("failures")
-                if "leaks" in requested_metrics:
-                    fieldnames.append("leaks")
-
-                writer = csv.DictWriter(output, fieldnames=fieldnames)
-                writer.writeheader()
-
-                for row in rows:
-                    posttime = str(row.get("posttime", ""))[:10]  # YYYY-MM-DD
-                    csv_row = {
-                        "date": posttime,
-                        "computer": row.get("computer", "?"),
-                    }
-                    if "memory" in requested_metrics:
-                        csv_row["memory_mb"] = row.get("averagemem", 0)
-                    if "tests" in requested_metrics:
-                        csv_row["tests"] = row.get("passedtests", 0)
-                    if "duration" in requested_metrics:
-                        csv_row["duration_min"] = row.get("duration", 0)
-                    if "failures" in requested_metrics:
-                        csv_row["failures"] = row.get("failedtests", 0)
-                    if "leaks" in requested_metrics:
-                        csv_row["leaks"] = row.get("leakedtests", 0)
-                    writer.writerow(csv_row)
-
+                rows, sync_info = await metrics_store.get_run_metrics(
+                    server, container_path, start_date, end_date, requested_metrics, zscores=rolling
+                )
+                total_runs = len(rows)
             else:  # granularity == "day"
-                # Aggregate by date, compute means
-                from collections import defaultdict
-
-                daily_data = defaultdict(list)
-                for row in rows:
-                    posttime = str(row.get("posttime", ""))[:10]
-                    if posttime:
-                        daily_data[posttime].append({
-                            "memory": row.get("averagemem", 0) or 0,
-                            "tests": row.get("passedtests", 0) or 0,
-                            "duration": row.get("duration", 0) or 0,
-                            "failures": row.get("failedtests", 0) or 0,
-                            "leaks": row.get("leakedtests", 0) or 0,
-                        })
+                rows, sync_info = await metrics_store.get_daily_metrics(
+                    server, container_path, start_date, end_date, requested_metrics, rolling=rolling
+                )
+                total_runs = sum(row["run_count"] for row in rows)
 
-                fieldnames = ["date", "run_count"]
-                if "memory" in requested_metrics:
-                    fieldnames.append("mean_memory_mb")
-                if "tests" in requested_metrics:
-                    fieldnames.append("mean_tests")
-                if "duration" in requested_metrics:
-                    fieldnames.append("mean_duration_min")
-                if "failures" in requested_metrics:
-                    fieldnames.append("mean_failures")
-                if "leaks" in requested_metrics:
-                    fieldnames.append("mean_leaks")
-
-                writer = csv.DictWriter(output, fieldnames=fieldnames)
-                writer.writeheader()
+            if not rows:
+                return f"No runs found in {folder_name} from {start_date} to {end_date}"
 
-                for date in sorted(daily_data.keys()):
-                    runs = daily_data[date]
-                    count = len(runs)
-                    csv_row = {
-                        "date": date,
-                        "run_count": count,
-                    }
-                    if "memory" in requested_metrics:
-                        csv_row["mean_memory_mb"] = round(sum(r["memory"] for r in runs) / count, 1)
-                    if "tests" in requested_metrics:
-                        csv_row["mean_tests"] = round(sum(r["tests"] for r in runs) / count, 0)
-                    if "duration" in requested_metrics:
-                        csv_row["mean_duration_min"] = round(sum(r["duration"] for r in runs) / count, 0)
-                    if "failures" in requested_metrics:
-                        csv_row["mean_failures"] = round(sum(r["failures"] for r in runs) / count, 2)
-                    if "leaks" in requested_metrics:
-                        csv_row["mean_leaks"] = round(sum(r["leaks"] for r in runs) / count, 2)
-                    writer.writerow(csv_row)
+            output = StringIO()
+            writer = csv.DictWriter(output, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
 
             # Write to file
             csv_content = output.getvalue()
@@ -1917,7 +2324,8 @@ def register_tools(mcp):
                 f"  Granularity: {granularity}\n"
                 f"  Metrics: {', '.join(requested_metrics)}\n"
                 f"  Rows: {row_count}\n"
-                f"  Total runs queried: {len(rows)}\n"
+                f"  Total runs: {total_runs} "
+                f"({sync_info['fetched']} fetched in {sync_info['requests']} request(s), rest from local store)\n"
                 f"\n"
                 f"Load in Excel or use Read tool to view."
             )
@@ -1943,40 +2351,18 @@ def register_tools(mcp):
         """
         folder_name = container_path.split("/")[-1]
 
-        # Parse relative dates
-        today = datetime.now()
-        if end_date is None:
-            end_date = today.strftime("%Y-%m-%d")
-
-        if start_date.endswith("y"):
-            years = int(start_date[:-1])
-            start_dt = today - timedelta(days=years * 365)
-            start_date = start_dt.strftime("%Y-%m-%d")
-        elif start_date.endswith("m"):
-            months = int(start_date[:-1])
-            start_dt = today - timedelta(days=months * 30)
-            start_date = start_dt.strftime("%Y-%m-%d")
-        elif start_date.endswith("d"):
-            days = int(start_date[:-1])
-            start_dt = today - timedelta(days=days)
-            start_date = start_dt.strftime("%Y-%m-%d")
+        start_date, end_date = resolve_relative_date(start_date, end_date)
 
         try:
-            server_context = get_server_context(server, container_path)
-
-            result = labkey.query.select_rows(
-                server_context=server_context,
-                schema_name=TESTRESULTS_SCHEMA,
-                query_name="leakcheck_stats",
-                max_rows=10000,
-                parameters={"StartDate": start_date, "EndDate": end_date},
+            # Per-run pass-1 data from the local store (fetches only the delta),
+            # aggregated per test like the leakcheck_stats query
+            rows, sync_info = await metrics_store.get_leakcheck_stats(
+                server, container_path, start_date, end_date
             )
 
-            if not result or not result.get("rows"):
+            if not rows:
                 return f"No pass-1 leak check data found in {folder_name} from {start_date} to {end_date}"
 
-            rows = result["rows"]
-
             # Build markdown report
             lines = [
                 f"# Leak Check Stats: {folder_name}",
@@ -2022,6 +2408,7 @@ def register_tools(mcp):
                 f"**{folder_name}**: {start_date} to {end_date}",
                 f"  Tests with pass-1 data: {len(rows)}",
                 f"  Total pass-1 time: {round(total_time_min)} min ({round(total_time_min / 60, 1)} hrs)",
+                f"  Fetched: {sync_info['fetched']} new run/test rows in {sync_info['requests']} request(s)",
                 "",
                 "**Top 10 by avg iterations per run** (24 = max/leaking, 8 = fast stabilize):",
             ]
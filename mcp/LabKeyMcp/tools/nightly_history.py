@@ -9,15 +9,14 @@ Modeled after exceptions.py - stores fingerprinted failures with fix tracking.
 import logging
 from datetime import datetime, timedelta
 
-import labkey
 from labkey.query import QueryFilter
 
 from .common import (
-    get_server_context,
+    aiter_select_pages,
     get_daily_history_dir,
     DEFAULT_SERVER,
 )
-from .stacktrace import normalize_stack_trace
+from .stacktrace import normalize_stack_traces
 
 logger = logging.getLogger("labkey_mcp")
 
@@ -31,9 +30,9 @@ TEST_FOLDERS = [
     "/home/development/Nightly x64",
     "/home/development/Release Branch",
     "/home/development/Performance Tests",
-    "/home/development/Release Branch Perf",
+    "/home/development/Release Branch Performance Tests",
     "/home/development/Integration",
-    "/home/development/Integration with Perf",
+    "/home/development/Integration with Perf Tests",
 ]
 
 
@@ -192,62 +191,61 @@ def register_tools(mcp):
             # Query each test folder
             for container_path in TEST_FOLDERS:
                 try:
-                    server_context = get_server_context(server, container_path)
                     folder_name = container_path.split("/")[-1]
 
                     # Query failures
-                    failures_result = labkey.query.select_rows(
-                        server_context=server_context,
+                    folder_failures = 0
+                    async for rows in aiter_select_pages(
+                        server,
+                        container_path,
                         schema_name="testresults",
                         query_name="failures_history",
-                        max_rows=100000,
                         parameters={
                             "StartDate": start_ts,
                             "EndDate": end_ts,
                         },
-                    )
-
-                    if failures_result and failures_result.get("rows"):
-                        rows = failures_result["rows"]
-                        total_failures += len(rows)
+                        sort="run_id,passnum,testname,language",
+                    ):
+                        folder_failures += len(rows)
                         _process_failure_rows(history, rows, folder_name)
-                        logger.info(f"{folder_name}: {len(rows)} failures")
+                    total_failures += folder_failures
+                    logger.info(f"{folder_name}: {folder_failures} failures")
 
                     # Query leaks
-                    leaks_result = labkey.query.select_rows(
-                        server_context=server_context,
+                    folder_leaks = 0
+                    async for rows in aiter_select_pages(
+                        server,
+                        container_path,
                         schema_name="testresults",
                         query_name="leaks_history",
-                        max_rows=100000,
                         parameters={
                             "StartDate": start_ts,
                             "EndDate": end_ts,
                         },
-                    )
-
-                    if leaks_result and leaks_result.get("rows"):
-                        rows = leaks_result["rows"]
-                        total_leaks += len(rows)
+                        sort="run_id,testname,leak_type,leak_bytes,leak_handles",
+                    ):
+                        folder_leaks += len(rows)
                         _process_leak_rows(history, rows, folder_name)
-                        logger.info(f"{folder_name}: {len(rows)} leaks")
+                    total_leaks += folder_leaks
+                    logger.info(f"{folder_name}: {folder_leaks} leaks")
 
                     # Query hangs
-                    hangs_result = labkey.query.select_rows(
-                        server_context=server_context,
+                    folder_hangs = 0
+                    async for rows in aiter_select_pages(
+                        server,
+                        container_path,
                         schema_name="testresults",
                         query_name="hangs_history",
-                        max_rows=100000,
                         parameters={
                             "StartDate": start_ts,
                             "EndDate": end_ts,
                         },
-                    )
-
-                    if hangs_result and hangs_result.get("rows"):
-                        rows = hangs_result["rows"]
-                        total_hangs += len(rows)
+                        sort="run_id,passnum,testname",
+                    ):
+                        folder_hangs += len(rows)
                         _process_hang_rows(history, rows, folder_name)
-                        logger.info(f"{folder_name}: {len(rows)} hangs")
+                    total_hangs += folder_hangs
+                    logger.info(f"{folder_name}: {folder_hangs} hangs")
 
                     folders_queried += 1
 
@@ -577,7 +575,10 @@ def _process_failure_rows(history: dict, rows: list, folder_name: str):
     failures_db = history['test_failures']
     machine_health = history['machine_health']
 
-    for row in rows:
+    # Normalize all traces in one batch (repeats across machines are cached)
+    norms = normalize_stack_traces([row.get('stacktrace', '') for row in rows])
+
+    for row, norm in zip(rows, norms):
         test_name = row.get('testname')
         computer = row.get('computer')
         run_id = row.get('run_id')
@@ -594,8 +595,6 @@ def _process_failure_rows(history: dict, rows: list, folder_name: str):
         elif isinstance(run_date, str) and 'T' in run_date:
             run_date = run_date.split('T')[0]
 
-        # Normalize stack trace and get fingerprint
-        norm = normalize_stack_trace(stacktrace)
         fp = norm.fingerprint
         sig_frames = norm.signature_frames
 
@@ -0,0 +1,517 @@
+"""Streaming, sectioned access to SkylineTester nightly run logs.
+
+This module fetches testresults-viewLog.view and serves one section of the
+log at a time. NOT exposed as MCP tools - used internally by nightly.py
+(save_run_log, get_run_toolsets).
+
+The view returns the whole log as one JSON string ({"log": "..."}); logs
+from hung runs are tens of MB. Instead of buffering and decoding the full
+response, the body is decoded incrementally as it arrives, written straight
+to a local file (line endings normalized to LF) and scanned line by line
+for section markers. The download stops as soon as the requested section is
+complete, so asking for the git or build section of a 40 MB log reads only
+its first few hundred KB.
+
+Each run's log is kept under ai/.tmp/cache/runlogs/ next to a small JSON
+index of the byte offsets of every marker found. Later requests for any
+section already covered read just that byte range from the local file; a
+section past the end of an early-stopped download fetches the log again.
+Logs of posted runs never change, so entries never expire. The directory is
+bounded by LABKEY_MCP_LOG_CACHE_MB (least recently read logs are evicted
+first); LABKEY_MCP_CACHE=0 bypasses it.
+
+Sections (markers use the first matching line):
+- git: start of log up to "# Building Skyline"
+- build: "# Building Skyline" through "# Build done"
+- testrunner: first 'TestRunner.exe" status=' line through "# Stopped ...",
+  excluding the 'TestRunner.exe" report=' line and anything after it
+- failures: everything after the report line, "# " prefixes stripped
+- full: the whole log
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+from . import tracing
+from .common import (
+    get_basic_auth_header,
+    get_tmp_dir,
+    http_open,
+    run_blocking,
+    _server_url,
+    HTTP_BLOCK_SIZE,
+)
+from .cache import CACHE_ENABLED
+
+logger = logging.getLogger("labkey_mcp")
+
+MAX_LOG_CACHE_BYTES = int(os.environ.get("LABKEY_MCP_LOG_CACHE_MB", "1024")) * 1024 * 1024
+LOG_VIEW = "testresults-viewLog.view"
+
+SECTIONS = ("full", "git", "build", "testrunner", "failures")
+
+# marker -> test on a complete line (bytes, LF stripped)
+_MARKERS = {
+    "build_start": lambda line: line.startswith(b"# Building Skyline"),
+    "build_end": lambda line: line.startswith(b"# Build done"),
+    "testrunner_start": lambda line: b'TestRunner.exe" status=' in line,
+    "testrunner_end": lambda line: line.startswith(b"# Stopped "),
+    "report": lambda line: b'TestRunner.exe" report=' in line,
+}
+
+_run_locks = {}  # Local log file name -> asyncio.Lock
+
+
+# =============================================================================
+# Incremental JSON Decoding
+# =============================================================================
+
+_JSON_ESCAPES = {
+    ord('"'): b'"', ord("\\"): b"\\", ord("/"): b"/",
+    ord("b"): b"\b", ord("f"): b"\f", ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t",
+}
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+
+class _JsonStringField:
+    """Decode one top-level string field of a JSON object fed in chunks.
+
+    feed() returns the UTF-8 bytes of the field value decoded so far (JSON
+    escapes resolved) and can be called with arbitrarily split input. Other
+    fields are skipped without being buffered. ``found`` becomes True at the
+    opening quote of the value and ``done`` once its closing quote has been seen.
+    """
+
+    def __init__(self, key: str):
+        self._key = key.encode()
+        self._state = "seek"  # seek -> value_start -> value
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._token = bytearray()  # Current string while seeking, capped at len(key) + 1
+        self._last_string = None
+        self._pending = b""  # Escape sequence split across chunks
+        self._high_surrogate = None
+        self.found = False
+        self.done = False
+
+    def feed(self, data: bytes) -> bytes:
+        out = bytearray()
+        if self._pending:
+            data = self._pending + data
+            self._pending = b""
+        i = 0
+        while i < len(data) and not self.done:
+            if self._state == "value":
+                i = self._decode(data, i, out)
+            else:
+                i = self._seek(data, i)
+        return bytes(out)
+
+    def _seek(self, data: bytes, i: int) -> int:
+        """Scan structure until the opening quote of the wanted value."""
+        while i < len(data):
+            c = data[i]
+            i += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == 0x5C:  # backslash
+                    self._escape = True
+                elif c == 0x22:  # closing quote
+                    self._in_string = False
+                    self._last_string = bytes(self._token)
+                    continue
+                if len(self._token) <= len(self._key):
+                    self._token.append(c)
+                continue
+            if c in b" \t\r\n":
+                continue
+            if self._state == "value_start":
+                if c == 0x22:
+                    self._state = "value"
+                    self.found = True
+                    return i
+                self._state = "seek"  # Not a string value; keep scanning
+            if c == 0x22:
+                self._in_string = True
+                self._token.clear()
+                continue
+            if c == 0x3A and self._depth == 1 and self._last_string == self._key:
+                self._state = "value_start"
+            elif c in b"{[":
+                self._depth += 1
+            elif c in b"}]":
+                self._depth -= 1
+            self._last_string = None
+        return i
+
+    def _decode(self, data: bytes, i: int, out: bytearray) -> int:
+        """Decode string content from data[i:] into out; returns the next index."""
+        n = len(data)
+        while i < n:
+            match = _STRING_SPECIAL.search(data, i)
+            if match is None:
+                self._emit(out, data[i:])
+                return n
+            k = match.start()
+            self._emit(out, data[i:k])
+            if data[k] == 0x22:
+                self._flush_surrogate(out)
+                self.done = True
+                return n
+            if k + 1 >= n:
+                self._pending = data[k:]
+                return n
+            escape = data[k + 1]
+            if escape == ord("u"):
+                if k + 6 > n:
+                    self._pending = data[k:]
+                    return n
+                self._emit_code_point(out, int(data[k + 2:k + 6], 16))
+                i = k + 6
+            else:
+                self._flush_surrogate(out)
+                out += _JSON_ESCAPES.get(escape, bytes([escape]))
+                i = k + 2
+        return n
+
+    def _emit(self, out: bytearray, raw: bytes):
+        if raw:
+            self._flush_surrogate(out)
+            out += raw
+
+    def _emit_code_point(self, out: bytearray, code: int):
+        if 0xD800 <= code < 0xDC00:
+            self._flush_surrogate(out)
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+        else:
+            self._flush_surrogate(out)
+        out += chr(code).encode("utf-8", errors="replace")
+
+    def _flush_surrogate(self, out: bytearray):
+        """A high surrogate not followed by a low one becomes U+FFFD."""
+        if self._high_surrogate is not None:
+            self._high_surrogate = None
+            out += "�".encode()
+
+
+# =============================================================================
+# Section Index
+# =============================================================================
+
+class _SectionScanner:
+    """Track line numbers and byte offsets of section markers as text streams in.
+
+    Offsets refer to the LF-normalized log file. Each marker records
+    [line index, start byte, end byte (excluding its newline)] for its first
+    match.
+    """
+
+    def __init__(self):
+        self.markers = {}
+        self.lines = 0
+        self.bytes = 0
+        self._partial = bytearray()
+
+    def feed(self, text: bytes):
+        start = 0
+        while True:
+            end = text.find(b"\n", start)
+            if end < 0:
+                self._partial += text[start:]
+                return
+            self._partial += text[start:end]
+            self._end_line(newline=True)
+            start = end + 1
+
+    def finish(self):
+        """Count the final line (empty if the log ends with a newline)."""
+        self._end_line(newline=False)
+
+    def _end_line(self, newline: bool):
+        line = bytes(self._partial)
+        for name, test in _MARKERS.items():
+            if name not in self.markers and test(line):
+                self.markers[name] = [self.lines, self.bytes, self.bytes + len(line)]
+        self.lines += 1
+        self.bytes += len(line) + newline
+        self._partial.clear()
+
+
+def _section_range(index: dict, part: str):
+    """Byte range and description of a section, or None if not yet known.
+
+    Returns (start_byte, end_byte, info), or (None, None, info) when the log
+    is complete and the section does not exist. A section that stops at a
+    marker excludes the newline ending its last line, matching the text the
+    old split/join extraction produced.
+    """
+    markers = index["markers"]
+    complete = index["complete"]
+    total_bytes, total_lines = index["bytes"], index["lines"]
+
+    def start_of(name):
+        return markers[name][1] if name in markers else 0
+
+    def line_of(name):
+        return markers[name][0] if name in markers else 0
+
+    if part == "full":
+        if not complete:
+            return None
+        return 0, total_bytes, f"Full log ({total_lines} lines)"
+
+    if part == "git":
+        if line_of("build_start") > 0:
+            end_line = markers["build_start"][0]
+            return 0, markers["build_start"][1] - 1, f"Git section (lines 1-{end_line})"
+        if not complete:
+            return None
+        return 0, total_bytes, f"Git section (lines 1-{total_lines})"
+
+    if part == "build":
+        start_line = line_of("build_start")
+        if "build_end" in markers and markers["build_end"][0] > start_line:
+            end_line, end_byte = markers["build_end"][0] + 1, markers["build_end"][2]
+        elif complete:
+            end_line, end_byte = total_lines, total_bytes
+        else:
+            return None
+        return start_of("build_start"), end_byte, f"Build section (lines {start_line + 1}-{end_line})"
+
+    if part == "testrunner":
+        start_line = line_of("testrunner_start")
+        if "report" in markers and markers["report"][0] >= start_line:
+            # The report line and the failures after it are not part of this section
+            end_line, end_byte = markers["report"][0], max(markers["report"][1] - 1, 0)
+            if "testrunner_end" in markers and start_line < markers["testrunner_end"][0] < end_line:
+                end_line, end_byte = markers["testrunner_end"][0] + 1, markers["testrunner_end"][2]
+        elif "testrunner_end" in markers and markers["testrunner_end"][0] > start_line:
+            end_line, end_byte = markers["testrunner_end"][0] + 1, markers["testrunner_end"][2]
+        elif complete:
+            end_line, end_byte = total_lines, total_bytes
+        else:
+            return None
+        return start_of("testrunner_start"), end_byte, f"TestRunner section (lines {start_line + 1}-{end_line})"
+
+    if part == "failures":
+        if not complete:
+            return None
+        if "report" not in markers:
+            return None, None, "No failures section found"
+        start_line = markers["report"][0] + 1
+        return (
+            markers["report"][2] + 1, total_bytes,
+            f"Failures section (lines {start_line + 1}-{total_lines}, # prefix stripped)",
+        )
+
+    raise ValueError(f"Unknown log section '{part}'. Valid: {', '.join(SECTIONS)}")
+
+
+# =============================================================================
+# Local Log Files
+# =============================================================================
+
+def get_log_cache_dir() -> Path:
+    """Get the ai/.tmp/cache/runlogs directory (created if needed)."""
+    log_dir = get_tmp_dir() / "cache" / "runlogs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    return log_dir
+
+
+def _paths(server: str, run_id: int) -> tuple[Path, Path]:
+    host = urlsplit(_server_url(server)).netloc.lower().replace(":", "_")
+    log_dir = get_log_cache_dir()
+    return log_dir / f"{host}-{run_id}.log", log_dir / f"{host}-{run_id}.json"
+
+
+def _load_index(index_path: Path):
+    try:
+        return json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _read_range(log_path: Path, start: int, end: int) -> str:
+    with open(log_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    os.utime(log_path)
+    return data.decode("utf-8", errors="replace")
+
+
+def _evict():
+    """Delete least recently read logs until under 90% of the bound."""
+    entries = []
+    for path in get_log_cache_dir().glob("*.log"):
+        try:
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            continue
+    total = sum(size for _, size, _ in entries)
+    if total <= MAX_LOG_CACHE_BYTES:
+        return
+    for _, size, path in sorted(entries):
+        if total <= MAX_LOG_CACHE_BYTES * 0.9:
+            break
+        path.with_suffix(".json").unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def _stream_log(server: str, url: str, run_id: int, part: str, log_path: Path, index_path: Path) -> dict:
+    """Download the log into log_path until ``part`` is complete; returns the index."""
+    decoder = _JsonStringField("log")
+    scanner = _SectionScanner()
+    tmp_path = log_path.with_name(f"{log_path.name}.{threading.get_ident()}.tmp")
+    received = 0
+    head = b""  # Start of the response, quoted if it holds no log
+    stopped_early = False
+
+    headers = {"Authorization": get_basic_auth_header(server)}
+    try:
+        with http_open(url, headers=headers, timeout=120) as response, open(tmp_path, "wb") as out:
+            while True:
+                chunk = response.read(HTTP_BLOCK_SIZE)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if len(head) < 200:
+                    head += chunk[:200 - len(head)]
+                text = decoder.feed(chunk).replace(b"\r", b"")
+                out.write(text)
+                scanner.feed(text)
+                if decoder.done:
+                    break
+                index = {"markers": scanner.markers, "complete": False,
+                         "bytes": scanner.bytes, "lines": scanner.lines}
+                if _section_range(index, part) is not None:
+                    stopped_early = True
+                    break
+        if not decoder.found:
+            # Error JSON or an HTML page; caching it would hide the log for good
+            snippet = head.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"Run {run_id} log response has no log content: {snippet}")
+        if not stopped_early:
+            scanner.finish()
+        os.replace(tmp_path, log_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    index = {
+        "run_id": run_id,
+        "complete": not stopped_early,
+        "markers": scanner.markers,
+        # Early-stopped logs end on a line boundary; the partial line was not written out
+        "bytes": log_path.stat().st_size if not stopped_early else scanner.bytes,
+        "lines": scanner.lines,
+        "response_bytes": received,
+        "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    index_path.write_text(json.dumps(index), encoding="utf-8")
+    if stopped_early:
+        logger.info(f"Run {run_id} log: stopped after {part} section ({received:,} response bytes)")
+    return index
+
+
+def _strip_failure_prefixes(text: str) -> str:
+    return "\n".join(line[2:] if line.startswith("# ") else line for line in text.split("\n"))
+
+
+async def _ensure_local(server: str, container_path: str, run_id: int, part: str) -> tuple:
+    """Make sure ``part`` is held locally, streaming the log if needed.
+
+    Must be called holding the run's lock. Returns
+    (log path, index, section range from _section_range, "local" or "download").
+    """
+    log_path, index_path = _paths(server, run_id)
+    index = _load_index(index_path) if CACHE_ENABLED and log_path.exists() else None
+    section = _section_range(index, part) if index else None
+    if section is not None:
+        return log_path, index, section, "local"
+
+    tracing.record_cache(LOG_VIEW, False)
+    encoded_path = quote(container_path, safe="/")
+    url = f"{_server_url(server)}{encoded_path}/{LOG_VIEW}?runId={run_id}"
+    logger.info(f"Streaming log from: {url}")
+    index = await run_blocking(server, _stream_log, server, url, run_id, part, log_path, index_path)
+    await run_blocking(server, _evict)
+    return log_path, index, _section_range(index, part), "download"
+
+
+async def get_log_section(server: str, container_path: str, run_id: int, part: str = "full") -> tuple[str, str, dict]:
+    """Get one section of a run's log, downloading only as much as needed.
+
+    Args:
+        server: LabKey server
+        container_path: Test folder containing the run
+        run_id: Test run ID
+        part: One of SECTIONS
+
+    Returns:
+        (section text, section description, stats) where stats has
+        "source" ("local" or "download"), "bytes_read" (section size),
+        "log_bytes" (log bytes held locally) and "complete" (whole log held)
+    """
+    if part not in SECTIONS:
+        raise ValueError(f"Unknown log section '{part}'. Valid: {', '.join(SECTIONS)}")
+
+    log_path, _ = _paths(server, run_id)
+    async with _run_locks.setdefault(log_path.name, asyncio.Lock()):
+        started = time.perf_counter()
+        log_path, index, section, source = await _ensure_local(server, container_path, run_id, part)
+
+        start, end, info = section
+        if index["complete"] and index["bytes"] == 0:
+            return "", "No log content", {}
+        text = "" if start is None else await run_blocking(server, _read_range, log_path, start, end)
+        if source == "local":
+            tracing.record_cache(LOG_VIEW, True, (time.perf_counter() - started) * 1000, len(text))
+
+    if part == "failures":
+        text = _strip_failure_prefixes(text)
+    stats = {
+        "source": source,
+        "bytes_read": 0 if start is None else end - start,
+        "log_bytes": index["bytes"],
+        "complete": index["complete"],
+    }
+    return text, info, stats
+
+
+async def fetch_full_log(server: str, container_path: str, run_id: int) -> tuple[Path, dict, str]:
+    """Make sure a run's whole log is held locally without reading it into memory.
+
+    For callers that scan the file themselves (logindex.py). The file can be
+    evicted later, so read it promptly.
+
+    Returns:
+        (local log path, offsets index, "local" or "download")
+    """
+    log_path, _ = _paths(server, run_id)
+    async with _run_locks.setdefault(log_path.name, asyncio.Lock()):
+        log_path, index, _, source = await _ensure_local(server, container_path, run_id, "full")
+    if source == "local":
+        tracing.record_cache(LOG_VIEW, True, 0.0, 0)
+    return log_path, index, source
+
+
+def get_local_log_path(server: str, run_id: int):
+    """Path of a run's complete local log, or None if it is not held."""
+    log_path, index_path = _paths(server, run_id)
+    index = _load_index(index_path) if log_path.exists() else None
+    return log_path if index and index.get("complete") else None
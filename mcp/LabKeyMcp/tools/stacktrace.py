@@ -18,11 +18,25 @@ Path normalization uses `pwiz_tools` as anchor - all project code lives there:
 - `C:\\proj\\skyline_25_1\\pwiz_tools\\Skyline\\Model\\Foo.cs:line 123`
 - `D:\\Nightly\\trunk\\pwiz\\pwiz_tools\\Skyline\\Model\\Foo.cs:line 456`
 Both normalize to: `pwiz_tools/Skyline/Model/Foo.cs`
+
+The same traces recur constantly (one bug reported by many users, one test
+failing on many machines), so work is memoized at two levels:
+- Whole traces: an LRU keyed by a hash of the trace text and options
+  (TRACE_CACHE_SIZE entries), so re-normalizing a seen trace is one hash.
+- Frames: per-method classification and name normalization, and per-file
+  path normalization, in bounded functools LRUs (FRAME_CACHE_SIZE), so a
+  new trace made of known frames skips the per-frame regex work.
+Frame filters are compiled once: the noise patterns into one alternation
+regex, the prefix lists into tuples for a single str.startswith call.
+normalize_stack_traces() is the batch entry point.
 """
 
 import hashlib
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 
@@ -162,7 +176,23 @@ MIN_PROJECT_FRAMES_FOR_ENTRY_POINT_FILTERING = 3
 # Project namespace prefix - frames from our codebase
 PROJECT_NAMESPACE = 'pwiz.'
 
+# Compiled forms of the filter lists above (one regex search / one startswith per frame)
+_NOISE_RE = re.compile('|'.join(ASYNC_NOISE_PATTERNS))
+_FRAMEWORK_PREFIXES = tuple(FRAMEWORK_PREFIXES)
+_ENTRY_POINT_PREFIXES = tuple(CONDITIONAL_ENTRY_POINT_PREFIXES)
+_ASYNC_MOVE_NEXT_PATTERN = re.compile(r'<(\w+)>d__\d+\.MoveNext')
+_DOUBLE_DOT_PATTERN = re.compile(r'\.\.+')
+
+# Memoization bounds: distinct methods/files, and distinct (trace, options) results
+FRAME_CACHE_SIZE = 65536
+TRACE_CACHE_SIZE = 8192
+
+_trace_cache: "OrderedDict[bytes, NormalizedTrace]" = OrderedDict()
+_trace_cache_lock = threading.Lock()
+_trace_stats = {"hits": 0, "misses": 0}
 
+
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
 def _normalize_file_path(file_path: Optional[str]) -> Optional[str]:
     """Normalize a file path to project-relative form.
 
@@ -196,26 +226,17 @@ def _normalize_file_path(file_path: Optional[str]) -> Optional[str]:
 
 def _is_noise_frame(method: str) -> bool:
     """Check if a frame is async/threading noise that should be filtered."""
-    for pattern in ASYNC_NOISE_PATTERNS:
-        if re.search(pattern, method):
-            return True
-    return False
+    return _NOISE_RE.search(method) is not None
 
 
 def _is_framework_frame(method: str) -> bool:
     """Check if a frame is low-value framework plumbing (always filtered)."""
-    for prefix in FRAMEWORK_PREFIXES:
-        if method.startswith(prefix):
-            return True
-    return False
+    return method.startswith(_FRAMEWORK_PREFIXES)
 
 
 def _is_entry_point_frame(method: str) -> bool:
     """Check if a frame is an entry-point (conditionally filtered if enough project frames)."""
-    for prefix in CONDITIONAL_ENTRY_POINT_PREFIXES:
-        if method.startswith(prefix):
-            return True
-    return False
+    return method.startswith(_ENTRY_POINT_PREFIXES)
 
 
 def _is_project_frame(method: str) -> bool:
@@ -239,10 +260,10 @@ def _normalize_method_name(method: str) -> str:
 
     # Handle async state machine: <Method>d__5.MoveNext -> Method
     # But we filter these out anyway, so this is just for completeness
-    normalized = re.sub(r'<(\w+)>d__\d+\.MoveNext', r'\1', normalized)
+    normalized = _ASYNC_MOVE_NEXT_PATTERN.sub(r'\1', normalized)
 
     # Clean up any double dots from removals
-    normalized = re.sub(r'\.\.+', '.', normalized)
+    normalized = _DOUBLE_DOT_PATTERN.sub('.', normalized)
 
     # Remove leading/trailing dots
     normalized = normalized.strip('.')
@@ -250,6 +271,18 @@ def _normalize_method_name(method: str) -> str:
     return normalized
 
 
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
+def _classify_frame(method: str) -> tuple[str, bool, bool, bool, bool]:
+    """(normalized method, is_noise, is_framework, is_entry_point, is_project) for a raw method name."""
+    return (
+        _normalize_method_name(method),
+        _is_noise_frame(method),
+        _is_framework_frame(method),
+        _is_entry_point_frame(method),
+        _is_project_frame(method),
+    )
+
+
 def _extract_class_method(full_method: str) -> str:
     """Extract just the Class.Method from a fully qualified name.
 
@@ -269,6 +302,10 @@ def normalize_stack_trace(
 ) -> NormalizedTrace:
     """Normalize a C# stack trace for pattern matching.
 
+    Results are memoized by a hash of the trace text and options, so callers
+    may normalize the same trace repeatedly at little cost. Each call returns
+    its own NormalizedTrace (the signature_frames list is not shared).
+
     Args:
         raw_trace: Raw stack trace text (C# format)
         max_signature_frames: Number of top frames for signature (default: 5)
@@ -299,6 +336,36 @@ def normalize_stack_trace(
             frame_count=2
         )
     """
+    key = hashlib.blake2b(
+        f"{max_signature_frames}|{int(include_framework)}|{raw_trace or ''}".encode('utf-8', 'surrogatepass'),
+        digest_size=16,
+    ).digest()
+    with _trace_cache_lock:
+        cached = _trace_cache.get(key)
+        if cached is not None:
+            _trace_cache.move_to_end(key)
+            _trace_stats["hits"] += 1
+    if cached is None:
+        cached = _normalize_uncached(raw_trace, max_signature_frames, include_framework)
+        with _trace_cache_lock:
+            _trace_stats["misses"] += 1
+            _trace_cache[key] = cached
+            if len(_trace_cache) > TRACE_CACHE_SIZE:
+                _trace_cache.popitem(last=False)
+    return NormalizedTrace(
+        fingerprint=cached.fingerprint,
+        signature_frames=list(cached.signature_frames),
+        normalized=cached.normalized,
+        frame_count=cached.frame_count,
+    )
+
+
+def _normalize_uncached(
+    raw_trace: str,
+    max_signature_frames: int,
+    include_framework: bool,
+) -> NormalizedTrace:
+    """normalize_stack_trace() without the whole-trace cache."""
     if not raw_trace or not raw_trace.strip():
         return NormalizedTrace(
             fingerprint=hashlib.sha256(b'').hexdigest()[:16],
@@ -317,28 +384,25 @@ def normalize_stack_trace(
     parsed_frames: list[tuple[str, Optional[str], bool]] = []  # (method, file, is_entry_point)
     project_frame_count = 0
 
-    # Pass 1: Parse and categorize all frames
+    # Pass 1: Parse and categorize all frames (classification is memoized per method)
     for match in FRAME_PATTERN.finditer(trace_to_parse):
         method = match.group('method').strip()
         file_path = match.group('file')
+        normalized_method, is_noise, is_framework, is_entry_point, is_project = _classify_frame(method)
 
         # Skip async/threading noise (always)
-        if _is_noise_frame(method):
+        if is_noise:
             continue
 
         # Skip framework frames (always, unless include_framework=True)
-        if not include_framework and _is_framework_frame(method):
+        if not include_framework and is_framework:
             continue
 
-        # Normalize the method name (collapse lambdas, etc.)
-        normalized_method = _normalize_method_name(method)
-
         if normalized_method:
-            is_entry_point = _is_entry_point_frame(method)
             parsed_frames.append((normalized_method, file_path, is_entry_point))
 
             # Count project frames for the filtering decision
-            if _is_project_frame(method):
+            if is_project:
                 project_frame_count += 1
 
     # Decide whether to filter entry points
@@ -388,6 +452,61 @@ def normalize_stack_trace(
     )
 
 
+def normalize_stack_traces(
+    traces: list[str],
+    max_signature_frames: int = 5,
+    include_framework: bool = False,
+) -> list[NormalizedTrace]:
+    """Normalize many stack traces; results are in input order.
+
+    Identical traces in the batch are normalized once. Traces seen in earlier
+    calls come from the whole-trace cache, and new traces built from known
+    frames reuse the per-frame caches.
+    """
+    unique: dict[str, NormalizedTrace] = {}
+    results = []
+    for trace in traces:
+        trace = trace or ''
+        norm = unique.get(trace)
+        if norm is None:
+            norm = unique[trace] = normalize_stack_trace(trace, max_signature_frames, include_framework)
+            results.append(norm)
+        else:
+            results.append(NormalizedTrace(
+                fingerprint=norm.fingerprint,
+                signature_frames=list(norm.signature_frames),
+                normalized=norm.normalized,
+                frame_count=norm.frame_count,
+            ))
+    return results
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counts and sizes of the whole-trace and per-frame caches."""
+    frames = _classify_frame.cache_info()
+    files = _normalize_file_path.cache_info()
+    with _trace_cache_lock:
+        return {
+            "trace_hits": _trace_stats["hits"],
+            "trace_misses": _trace_stats["misses"],
+            "trace_entries": len(_trace_cache),
+            "frame_hits": frames.hits,
+            "frame_misses": frames.misses,
+            "frame_entries": frames.currsize,
+            "file_hits": files.hits,
+            "file_misses": files.misses,
+        }
+
+
+def clear_caches() -> None:
+    """Drop all memoized results (used by bench_stacktrace.py for cold-cache timings)."""
+    with _trace_cache_lock:
+        _trace_cache.clear()
+        _trace_stats.update(hits=0, misses=0)
+    _classify_frame.cache_clear()
+    _normalize_file_path.cache_clear()
+
+
 def fingerprint_matches(trace1: str, trace2: str) -> bool:
     """Check if two stack traces have the same fingerprint.
 
@@ -413,8 +532,7 @@ def group_by_fingerprint(traces: list[str]) -> dict[str, list[int]]:
     """
     groups: dict[str, list[int]] = {}
 
-    for i, trace in enumerate(traces):
-        norm = normalize_stack_trace(trace)
+    for i, norm in enumerate(normalize_stack_traces(traces)):
         if norm.fingerprint not in groups:
             groups[norm.fingerprint] = []
         groups[norm.fingerprint].append(i)
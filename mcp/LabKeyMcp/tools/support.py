@@ -11,6 +11,7 @@ import labkey
 
 from .common import (
     get_server_context,
+    run_blocking,
     get_tmp_dir,
     DEFAULT_SERVER,
     DEFAULT_SUPPORT_CONTAINER,
@@ -34,7 +35,9 @@ def register_tools(mcp):
         try:
             server_context = get_server_context(server, container_path)
 
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=ANNOUNCEMENT_SCHEMA_SUPPORT,
                 query_name="announcement_threads_recent",
@@ -83,7 +86,9 @@ def register_tools(mcp):
         try:
             server_context = get_server_context(server, container_path)
 
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=ANNOUNCEMENT_SCHEMA_SUPPORT,
                 query_name="announcement_thread_posts",
@@ -181,7 +186,9 @@ def register_tools(mcp):
             server_context = get_server_context(server, container_path)
 
             # Query recent threads
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=ANNOUNCEMENT_SCHEMA_SUPPORT,
                 query_name="announcement_threads_recent",
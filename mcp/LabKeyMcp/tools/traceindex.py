@@ -0,0 +1,214 @@
+"""Near-duplicate fingerprint lookup with MinHash/LSH over stack frames.
+
+NOT exposed as MCP tools - used internally by exceptions.py
+(save_exceptions_report).
+
+A fingerprint hashes the top signature frames exactly, so one bug splits
+into several fingerprints when a frame is inlined, renamed or shifted by a
+refactoring. TraceIndex finds those relatives without comparing every pair
+of history entries:
+
+- Each fingerprint's frames (Class.Method, up to MAX_FRAMES) become shingles:
+  every frame plus every adjacent frame pair, so both shared methods and
+  shared call order count.
+- A MinHash signature of NUM_PERM values estimates Jaccard similarity, and is
+  split into bands of BAND_ROWS values. Fingerprints that agree on any whole
+  band share a bucket and become candidates, so a query only looks at its
+  buckets instead of the whole history.
+- Candidates are then scored by exact Jaccard similarity of their shingles
+  and kept if they reach the threshold.
+
+With 32 bands of 4 rows, pairs at 0.6 similarity are found ~99% of the time
+and pairs at 0.3 only become candidates ~23% of the time.
+
+History entries written before frames were stored fall back to their
+signature (top SIGNATURE_FRAMES frames). Comparing those five frames with
+another entry's twenty would score an identical trace around 0.2, so when
+either side has only its signature both are compared on their top
+SIGNATURE_FRAMES frames, looked up in a second set of bands built from
+every entry's prefix.
+"""
+
+import hashlib
+from array import array
+from functools import lru_cache
+from typing import Optional
+
+from .stacktrace import NormalizedTrace
+
+# Frames kept per fingerprint in exception-history.json and shingled here
+MAX_FRAMES = 20
+# Frames in a signature (stacktrace.normalize_stack_trace default)
+SIGNATURE_FRAMES = 5
+# Default Jaccard similarity for suggesting a merge
+SIMILARITY_THRESHOLD = 0.6
+NUM_PERM = 128
+BAND_ROWS = 4
+BANDS = NUM_PERM // BAND_ROWS
+
+
+def trace_frames(norm: NormalizedTrace, max_frames: int = MAX_FRAMES) -> list[str]:
+    """Class.Method frames of a normalized trace, in the signature's short form."""
+    frames = []
+    for line in norm.normalized.splitlines():
+        method = line.split(' [', 1)[0]
+        frames.append('.'.join(method.split('.')[-2:]))
+        if len(frames) >= max_frames:
+            break
+    return frames
+
+
+def has_frames(entry: dict) -> bool:
+    """True unless the entry predates stored frames and only has its signature."""
+    return bool(entry.get('frames'))
+
+
+def entry_frames(entry: dict) -> list[str]:
+    """Frames of an exception-history entry (its signature for older entries)."""
+    frames = entry.get('frames')
+    if frames:
+        return frames
+    signature = entry.get('signature') or ''
+    if not signature or signature == '(unknown)':
+        return []
+    return signature.split(' → ')
+
+
+def _shingles(frames: list[str]) -> frozenset:
+    pairs = (f"{a}>{b}" for a, b in zip(frames, frames[1:]))
+    return frozenset(frames).union(pairs)
+
+
+@lru_cache(maxsize=65536)
+def _shingle_hashes(shingle: str) -> array:
+    # NUM_PERM independent 32-bit hashes from one extendable-output digest
+    return array('I', hashlib.shake_128(shingle.encode('utf-8')).digest(4 * NUM_PERM))
+
+
+@lru_cache(maxsize=65536)
+def _minhash(shingles: frozenset) -> tuple:
+    return tuple(map(min, zip(*map(_shingle_hashes, shingles))))
+
+
+def _band_keys(signature: tuple):
+    for band in range(BANDS):
+        yield signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class TraceIndex:
+    """LSH index answering "which fingerprints look like these frames"."""
+
+    def __init__(self):
+        self._shingles = {}  # fingerprint -> frozenset of shingles
+        self._prefix_shingles = {}  # fingerprint -> shingles of the top SIGNATURE_FRAMES frames
+        self._signature_only = set()  # fingerprints indexed from their signature
+        self._buckets = [{} for _ in range(BANDS)]  # band key -> [fingerprint], full frames
+        self._prefix_buckets = [{} for _ in range(BANDS)]  # band key -> [fingerprint], prefixes
+
+    def __len__(self) -> int:
+        return len(self._shingles)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._shingles
+
+    @classmethod
+    def from_entries(cls, entries: dict) -> 'TraceIndex':
+        """Index fingerprint -> entry dicts (history entries or exception_store.get_index_entries())."""
+        index = cls()
+        for fp, entry in entries.items():
+            index.add(fp, entry_frames(entry), signature_only=not has_frames(entry))
+        return index
+
+    @classmethod
+    def from_history(cls, history: dict) -> 'TraceIndex':
+        """Index every fingerprint in an exception history dict."""
+        return cls.from_entries(history.get('exceptions', {}))
+
+    def add(self, fingerprint: str, frames: list[str], signature_only: bool = False):
+        """Index a fingerprint's frames. Fingerprints without frames are skipped.
+
+        ``signature_only`` marks frames that are only a signature, which are
+        matched on prefixes alone.
+        """
+        if not frames or fingerprint in self._shingles:
+            return
+        shingles = _shingles(frames)
+        prefix = _shingles(frames[:SIGNATURE_FRAMES])
+        self._shingles[fingerprint] = shingles
+        self._prefix_shingles[fingerprint] = prefix
+        if signature_only:
+            self._signature_only.add(fingerprint)
+        else:
+            self._bucket(self._buckets, fingerprint, shingles)
+        self._bucket(self._prefix_buckets, fingerprint, prefix)
+
+    @staticmethod
+    def _bucket(bands: list, fingerprint: str, shingles: frozenset):
+        for buckets, key in zip(bands, _band_keys(_minhash(shingles))):
+            buckets.setdefault(key, []).append(fingerprint)
+
+    def query(
+        self,
+        frames: list[str],
+        threshold: float = SIMILARITY_THRESHOLD,
+        exclude: Optional[str] = None,
+        signature_only: bool = False,
+    ) -> list[tuple[str, float]]:
+        """Indexed fingerprints within ``threshold`` Jaccard similarity of ``frames``.
+
+        Args:
+            frames: Class.Method frames (see trace_frames / entry_frames)
+            threshold: Minimum similarity (0-1)
+            exclude: Fingerprint to leave out, e.g. the query's own
+            signature_only: ``frames`` is only a signature (see has_frames)
+
+        Returns:
+            (fingerprint, similarity) pairs, most similar first
+        """
+        if not frames:
+            return []
+        shingles = None if signature_only else _shingles(frames)
+        return self._matches(shingles, _shingles(frames[:SIGNATURE_FRAMES]), threshold, exclude)
+
+    def similar_to(self, fingerprint: str, threshold: float = SIMILARITY_THRESHOLD) -> list[tuple[str, float]]:
+        """Other indexed fingerprints similar to an indexed one."""
+        if fingerprint not in self._shingles:
+            return []
+        shingles = None if fingerprint in self._signature_only else self._shingles[fingerprint]
+        return self._matches(shingles, self._prefix_shingles[fingerprint], threshold, fingerprint)
+
+    def _matches(
+        self,
+        shingles: Optional[frozenset],
+        prefix: frozenset,
+        threshold: float,
+        exclude: Optional[str],
+    ) -> list[tuple[str, float]]:
+        """Score candidates on full frames, or on prefixes if either side is signature-only.
+
+        ``shingles`` is None for a signature-only query.
+        """
+        scores = {}
+        if shingles is not None:
+            # Full-frame entries only; signature-only ones are not in these bands
+            for fp in self._candidates(self._buckets, shingles):
+                scores[fp] = jaccard(shingles, self._shingles[fp])
+        for fp in self._candidates(self._prefix_buckets, prefix):
+            if shingles is None or fp in self._signature_only:
+                scores[fp] = jaccard(prefix, self._prefix_shingles[fp])
+        scores.pop(exclude, None)
+
+        matches = [(fp, similarity) for fp, similarity in scores.items() if similarity >= threshold]
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches
+
+    @staticmethod
+    def _candidates(bands: list, shingles: frozenset) -> set:
+        candidates = set()
+        for buckets, key in zip(bands, _band_keys(_minhash(shingles))):
+            candidates.update(buckets.get(key, ()))
+        return candidates
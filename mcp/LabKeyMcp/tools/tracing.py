@@ -0,0 +1,362 @@
+"""Request and tool-call tracing for the LabKey MCP server.
+
+Every outbound HTTP call and every MCP tool invocation is recorded twice:
+- Appended as one JSON line to ai/.tmp/traces/labkey-trace.jsonl
+  (rotated by size, see MCP_TRACE_MAX_MB / MCP_TRACE_BACKUPS)
+- Folded into in-memory latency samples served by get_server_metrics
+
+The LabKey, TeamCity and MailChimp servers each ship a copy of this module
+(differing only in server names and the tool docstring), so their trace
+files share one format:
+
+    {"ts": "...", "server": "labkey", "kind": "http", "tool": "get_run_failures",
+     "endpoint": "POST query-selectRows.api", "status": 200, "latency_ms": 412.7,
+     "bytes_in": 18231, "bytes_out": 310}
+
+``kind`` is "http", "tool" or "cache"; cache records add
+``"cache": "hit"|"miss"``. ``tool`` names the tool whose
+invocation caused the record (propagated through a ContextVar; LabKey's
+run_blocking copies it into worker threads).
+
+Set MCP_TRACE=0 to disable the trace file; metrics are still collected.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("labkey_mcp")
+
+TRACE_NAME = "labkey"
+TRACE_TITLE = "LabKey"
+TRACE_ENABLED = os.environ.get("MCP_TRACE", "1") != "0"
+TRACE_MAX_BYTES = int(float(os.environ.get("MCP_TRACE_MAX_MB", "10")) * 1024 * 1024)
+TRACE_BACKUPS = int(os.environ.get("MCP_TRACE_BACKUPS", "3"))
+# Latency samples kept per endpoint/tool for percentile estimates
+SAMPLES_PER_KEY = 1000
+
+current_tool = contextvars.ContextVar("current_tool", default=None)
+
+_lock = threading.Lock()
+_metrics = {}  # (kind, name) -> _Series
+_trace_logger = None
+_started_at = datetime.now()
+
+
+class _Series:
+    """Counters plus a bounded window of latency samples for one key."""
+
+    __slots__ = ("count", "errors", "bytes_in", "bytes_out", "hits", "misses", "latencies")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.hits = 0
+        self.misses = 0
+        self.latencies = deque(maxlen=SAMPLES_PER_KEY)
+
+
+# =============================================================================
+# Trace File
+# =============================================================================
+
+def get_trace_path() -> Path:
+    """Get ai/.tmp/traces/<server>-trace.jsonl (directory created if needed)."""
+    # Navigate from tools/ -> <Server>Mcp/ -> mcp/ -> ai/ -> .tmp/
+    trace_dir = Path(__file__).parent.parent.parent.parent / ".tmp" / "traces"
+    trace_dir.mkdir(parents=True, exist_ok=True)
+    return trace_dir / f"{TRACE_NAME}-trace.jsonl"
+
+
+def _get_trace_logger():
+    """Lazily create a non-propagating logger backed by a rotating file."""
+    global _trace_logger
+    if _trace_logger is None:
+        with _lock:
+            if _trace_logger is None:
+                trace_logger = logging.getLogger(f"{TRACE_NAME}_mcp.trace")
+                trace_logger.propagate = False
+                trace_logger.setLevel(logging.INFO)
+                try:
+                    handler = logging.handlers.RotatingFileHandler(
+                        get_trace_path(),
+                        maxBytes=TRACE_MAX_BYTES,
+                        backupCount=TRACE_BACKUPS,
+                        encoding="utf-8",
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    trace_logger.addHandler(handler)
+                except OSError as e:
+                    logger.warning(f"Tracing to file disabled: {e}")
+                _trace_logger = trace_logger
+    return _trace_logger
+
+
+def _emit(record: dict):
+    if TRACE_ENABLED:
+        _get_trace_logger().info(json.dumps(record, default=str))
+
+
+def _observe(kind: str, name: str, latency_ms: float = None, error: bool = False,
+             bytes_in: int = 0, bytes_out: int = 0, cache: str = None):
+    with _lock:
+        series = _metrics.get((kind, name))
+        if series is None:
+            series = _metrics[(kind, name)] = _Series()
+        series.count += 1
+        series.errors += bool(error)
+        series.bytes_in += bytes_in or 0
+        series.bytes_out += bytes_out or 0
+        if cache == "hit":
+            series.hits += 1
+        elif cache == "miss":
+            series.misses += 1
+        if latency_ms is not None:
+            series.latencies.append(latency_ms)
+
+
+# =============================================================================
+# Recording
+# =============================================================================
+
+_ID_SEGMENT = re.compile(r"/(?:\d+|[0-9a-f]{10,})(?=/|$)", re.IGNORECASE)
+_LOCATOR_VALUE = re.compile(r"\b(id|number|build|buildType):[^/,)]+")
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """Collapse a URL to a low-cardinality endpoint name for aggregation.
+
+    Query strings are dropped, LabKey ``controller-action.view|api`` paths
+    reduce to the action (the container varies per call), WebDAV paths reduce
+    to ``_webdav``, and numeric/hex ids or ``id:...`` locators become ``{id}``.
+    """
+    path = urlsplit(url).path or "/"
+    if "/_webdav/" in path:
+        path = "_webdav"
+    else:
+        last = path.rstrip("/").rsplit("/", 1)[-1]
+        if last.endswith((".view", ".api", ".post")):
+            path = last
+        path = _ID_SEGMENT.sub("/{id}", path)
+        path = _LOCATOR_VALUE.sub(r"\1:{id}", path)
+    return f"{method.upper()} {path}"
+
+
+def record_http(method: str, url: str, status: int = None, latency_ms: float = None,
+                bytes_in: int = 0, bytes_out: int = 0, error: str = None):
+    """Record one outbound HTTP exchange.
+
+    Args:
+        method: HTTP method
+        url: Full request URL (reduced via endpoint_key)
+        status: HTTP status, or None if no response was received
+        latency_ms: Time from sending the request to finishing the body
+        bytes_in: Response body bytes read
+        bytes_out: Request body bytes sent
+        error: Exception class name when the exchange failed
+    """
+    endpoint = endpoint_key(method, url)
+    failed = bool(error) or status is None or status >= 400
+    _observe("http", endpoint, latency_ms, failed, bytes_in, bytes_out)
+    record = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "server": TRACE_NAME,
+        "kind": "http",
+        "tool": current_tool.get(),
+        "endpoint": endpoint,
+        "status": status,
+        "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+    }
+    if error:
+        record["error"] = error
+    _emit(record)
+
+
+def record_cache(endpoint: str, hit: bool, latency_ms: float = None, bytes_in: int = 0):
+    """Record a response-cache lookup (``endpoint`` is a query or view name)."""
+    result = "hit" if hit else "miss"
+    _observe("cache", endpoint, latency_ms if hit else None, bytes_in=bytes_in, cache=result)
+    _emit({
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "server": TRACE_NAME,
+        "kind": "cache",
+        "tool": current_tool.get(),
+        "endpoint": endpoint,
+        "cache": result,
+        "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+        "bytes_in": bytes_in,
+    })
+
+
+def trace_tool(func):
+    """Wrap an async tool so each invocation is timed and recorded.
+
+    The wrapper keeps the tool's signature and docstring (functools.wraps),
+    so FastMCP builds the same schema. A tool that raises, or returns a
+    string starting with "Error", counts as an error.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = current_tool.set(name)
+        start = time.perf_counter()
+        status = "ok"
+        size = 0
+        try:
+            result = await func(*args, **kwargs)
+            if isinstance(result, str):
+                size = len(result)
+                if result.startswith("Error"):
+                    status = "error"
+            return result
+        except BaseException as e:
+            status = type(e).__name__
+            raise
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            current_tool.reset(token)
+            _observe("tool", name, latency_ms, status != "ok", bytes_in=size)
+            _emit({
+                "ts": datetime.now().isoformat(timespec="milliseconds"),
+                "server": TRACE_NAME,
+                "kind": "tool",
+                "tool": name,
+                "status": status,
+                "latency_ms": round(latency_ms, 1),
+                "bytes_in": size,
+            })
+
+    return wrapper
+
+
+def instrument_tools(mcp):
+    """Make ``mcp.tool()`` wrap every tool it registers with trace_tool.
+
+    Call before any module's register_tools(mcp).
+    """
+    original_tool = mcp.tool
+
+    def tool(*args, **kwargs):
+        decorator = original_tool(*args, **kwargs)
+
+        def register(func):
+            if inspect.iscoroutinefunction(func):
+                func = trace_tool(func)
+            return decorator(func)
+        return register
+
+    mcp.tool = tool
+
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def get_metrics() -> dict:
+    """Snapshot of all series as {kind: {name: stats}}."""
+    with _lock:
+        items = [(key, series, sorted(series.latencies)) for key, series in _metrics.items()]
+    snapshot = {"http": {}, "tool": {}, "cache": {}}
+    for (kind, name), series, latencies in items:
+        snapshot[kind][name] = {
+            "count": series.count,
+            "errors": series.errors,
+            "bytes_in": series.bytes_in,
+            "bytes_out": series.bytes_out,
+            "hits": series.hits,
+            "misses": series.misses,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+        }
+    return snapshot
+
+
+def reset_metrics():
+    """Clear in-memory metrics (the trace file is left alone)."""
+    with _lock:
+        _metrics.clear()
+
+
+def _format_bytes(num: int) -> str:
+    if num >= 1024 * 1024:
+        return f"{num / (1024 * 1024):.1f} MB"
+    if num >= 1024:
+        return f"{num / 1024:.1f} KB"
+    return f"{num} B"
+
+
+def format_metrics(metrics: dict) -> str:
+    """Render get_metrics() output as markdown tables."""
+    lines = [
+        f"# {TRACE_TITLE} MCP server metrics",
+        "",
+        f"Since: {_started_at.isoformat(timespec='seconds')}",
+        f"Trace file: {get_trace_path() if TRACE_ENABLED else 'disabled (MCP_TRACE=0)'}",
+        f"Percentiles over the last {SAMPLES_PER_KEY} samples per row, in ms.",
+    ]
+
+    def table(title: str, rows: dict, bytes_column: str):
+        lines.extend(["", f"## {title}", ""])
+        if not rows:
+            lines.append("(none recorded)")
+            return
+        lines.append(f"| Name | Count | Errors | p50 | p95 | p99 | {bytes_column} |")
+        lines.append("|------|------:|-------:|----:|----:|----:|------:|")
+        for name, s in sorted(rows.items(), key=lambda kv: -kv[1]["p95"] * kv[1]["count"]):
+            lines.append(
+                f"| {name} | {s['count']} | {s['errors']} | {s['p50']:.0f} | {s['p95']:.0f} "
+                f"| {s['p99']:.0f} | {_format_bytes(s['bytes_in'])} |"
+            )
+
+    table("Tools", metrics["tool"], "Output")
+    table("HTTP endpoints", metrics["http"], "Received")
+
+    if metrics["cache"]:
+        lines.extend([
+            "", "## Response cache", "",
+            "| Name | Hits | Misses | Hit rate | Hit p50 |",
+            "|------|-----:|-------:|---------:|--------:|",
+        ])
+        for name, s in sorted(metrics["cache"].items()):
+            total = s["hits"] + s["misses"]
+            rate = f"{100 * s['hits'] / total:.0f}%" if total else "-"
+            lines.append(f"| {name} | {s['hits']} | {s['misses']} | {rate} | {s['p50']:.1f} |")
+
+    return "\n".join(lines)
+
+
+def register_tools(mcp):
+    """Register the metrics tool."""
+
+    @mcp.tool()
+    async def get_server_metrics(reset: bool = False) -> str:
+        """[?] Latency p50/p95/p99 per HTTP endpoint and per tool since start. Raw records in ai/.tmp/traces/."""
+        text = format_metrics(get_metrics())
+        if reset:
+            reset_metrics()
+        return text
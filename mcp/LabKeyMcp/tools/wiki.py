@@ -4,11 +4,9 @@ This module contains tools for reading and updating wiki pages on skyline.ms,
 including the LabKey tutorial documentation.
 """
 
-import base64
 import logging
 import re
 import urllib.error
-import urllib.request
 from pathlib import Path
 from typing import Optional
 from urllib.parse import quote, urlencode
@@ -17,7 +15,8 @@ import labkey
 
 from .common import (
     get_server_context,
-    get_netrc_credentials,
+    run_blocking,
+    make_authenticated_request,
     get_tmp_dir,
     get_labkey_session,
     encode_waf_body,
@@ -81,11 +80,7 @@ def _get_wiki_page_metadata(
     encoded_name = quote(page_name, safe="")
     url = f"{_server_url(server)}{encoded_path}/wiki-edit.view?name={encoded_name}"
 
-    request = urllib.request.Request(url)
-    request.add_header("Authorization", session.auth_header)
-
-    with session.opener.open(request, timeout=30) as response:
-        html = response.read().decode("utf-8")
+    html = session.get_html(url)
 
     # Debug: Save HTML to temp file for inspection
     tmp_dir = get_tmp_dir()
@@ -128,7 +123,9 @@ def register_tools(mcp):
         try:
             server_context = get_server_context(server, container_path)
 
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=WIKI_SCHEMA,
                 query_name="wiki_page_list",
@@ -169,7 +166,9 @@ def register_tools(mcp):
         try:
             server_context = get_server_context(server, container_path)
 
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name=WIKI_SCHEMA,
                 query_name="wiki_page_content",
@@ -252,7 +251,9 @@ def register_tools(mcp):
 
             # Step 1: Get current page metadata (also returns the session to reuse)
             logger.info(f"Getting metadata for wiki page: {page_name}")
-            metadata, session = _get_wiki_page_metadata(page_name, server, container_path)
+            metadata, session = await run_blocking(
+                server, _get_wiki_page_metadata, page_name, server, container_path
+            )
 
             if not metadata.get("entityId"):
                 return f"Could not find wiki page '{page_name}' in {container_path}"
@@ -301,7 +302,9 @@ def register_tools(mcp):
             }
 
             logger.info(f"Saving wiki page: {page_name}")
-            status_code, result = session.post_json(save_url, payload, headers=headers)
+            status_code, result = await run_blocking(
+                server, session.post_json, save_url, payload, headers=headers
+            )
 
             # Check response
             if status_code == 200:
@@ -340,7 +343,9 @@ def register_tools(mcp):
         """[D] List wiki page attachments. → wiki.md"""
         try:
             # Get entityId from wiki edit page
-            metadata, _ = _get_wiki_page_metadata(page_name, server, container_path)
+            metadata, _ = await run_blocking(
+                server, _get_wiki_page_metadata, page_name, server, container_path
+            )
             entity_id = metadata.get("entityId")
 
             if not entity_id:
@@ -351,7 +356,9 @@ def register_tools(mcp):
             # Query for attachments
             server_context = get_server_context(server, container_path)
 
-            result = labkey.query.select_rows(
+            result = await run_blocking(
+                server,
+                labkey.query.select_rows,
                 server_context=server_context,
                 schema_name="corex",
                 query_name="documents_metadata",
@@ -408,7 +415,9 @@ def register_tools(mcp):
 
         try:
             # Get entityId from wiki edit page
-            metadata, _ = _get_wiki_page_metadata(page_name, server, container_path)
+            metadata, _ = await run_blocking(
+                server, _get_wiki_page_metadata, page_name, server, container_path
+            )
             entity_id = metadata.get("entityId")
 
             if not entity_id:
@@ -417,17 +426,12 @@ def register_tools(mcp):
             logger.info(f"Downloading '{filename}' from wiki page '{page_name}' (entityId: {entity_id})")
 
             # Build download URL (encode filename for spaces and special chars)
-            login, password = get_netrc_credentials(server)
             encoded_filename = quote(filename, safe="")
             download_url = f"{_server_url(server)}{container_path}/wiki-download.view?entityId={entity_id}&name={encoded_filename}"
 
-            # Create authenticated request
-            request = urllib.request.Request(download_url)
-            credentials = base64.b64encode(f"{login}:{password}".encode()).decode()
-            request.add_header("Authorization", f"Basic {credentials}")
-
-            with urllib.request.urlopen(request, timeout=60) as response:
-                content = response.read()
+            content = await run_blocking(
+                server, make_authenticated_request, server, download_url, timeout=60
+            )
 
             # Determine if text or binary based on extension
             text_extensions = {'.bat', '.py', '.txt', '.csv', '.xml', '.json', '.md', '.log', '.tsv', '.ini', '.cfg', '.yaml', '.yml', '.html', '.htm', '.css', '.js', '.sh', '.ps1', '.r', '.sql'}
@@ -6,12 +6,16 @@ Each module exports a `register_tools(mcp)` function to register its tools.
 Modules:
 - common: Shared utilities (config loading, HTTP client)
 - discovery: Read-only tools for listing audiences, templates, campaigns
+- tracing: Per-call HTTP/tool tracing + get_server_metrics
 """
 
 from . import common
 from . import discovery
+from . import tracing
 
 
 def register_all_tools(mcp):
-    """Register all tools from all modules."""
+    """Register all tools from all modules (each one traced)."""
+    tracing.instrument_tools(mcp)
     discovery.register_tools(mcp)
+    tracing.register_tools(mcp)  # get_server_metrics
@@ -2,16 +2,20 @@
 
 This module contains:
 - Config loading from ~/.mailchimp-mcp/config.json
-- HTTP client for MailChimp Marketing API with Basic auth (read-only GET requests)
+- HTTP client for MailChimp Marketing API with Basic auth (read-only GET requests),
+  traced via tracing.record_http
 """
 
 import base64
 import json
 import logging
+import time
 import urllib.error
 import urllib.request
 from pathlib import Path
 
+from . import tracing
+
 logger = logging.getLogger("mailchimp_mcp")
 
 
@@ -90,13 +94,18 @@ def mc_request(endpoint: str, timeout: int = 30) -> dict:
 
     logger.info(f"GET {url}")
 
+    start = time.perf_counter()
     try:
         with urllib.request.urlopen(request, timeout=timeout) as response:
             response_data = response.read()
+            tracing.record_http(
+                "GET", url, response.status, (time.perf_counter() - start) * 1000, len(response_data)
+            )
             if not response_data:
                 return {}
             return json.loads(response_data.decode("utf-8"))
     except urllib.error.HTTPError as e:
+        tracing.record_http("GET", url, e.code, (time.perf_counter() - start) * 1000)
         error_body = ""
         try:
             error_body = e.read().decode("utf-8", errors="replace")[:1000]
@@ -104,3 +113,6 @@ def mc_request(endpoint: str, timeout: int = 30) -> dict:
             pass
         logger.error(f"HTTP {e.code} {e.reason}: {error_body}")
         raise
+    except (urllib.error.URLError, OSError) as e:
+        tracing.record_http("GET", url, None, (time.perf_counter() - start) * 1000, error=type(e).__name__)
+        raise
@@ -8,16 +8,20 @@ Modules:
 - builds: Build search and status tools
 - tests: Test failure retrieval tools
 - inspections: Code inspection result tools
+- tracing: Per-call HTTP/tool tracing + get_server_metrics
 """
 
 from . import common
 from . import builds
 from . import tests
 from . import inspections
+from . import tracing
 
 
 def register_all_tools(mcp):
-    """Register all tools from all modules."""
+    """Register all tools from all modules (each one traced)."""
+    tracing.instrument_tools(mcp)
     builds.register_tools(mcp)
     tests.register_tools(mcp)
     inspections.register_tools(mcp)
+    tracing.register_tools(mcp)  # get_server_metrics
@@ -2,18 +2,22 @@
 
 This module contains:
 - Config loading from ~/.teamcity-mcp/config.json
-- HTTP client for TeamCity REST API with Bearer token auth
+- HTTP client for TeamCity REST API with Bearer token auth, traced via
+  tracing.record_http
 - Build configuration ID reference table
 - XML response parsing helpers
 """
 
 import json
 import logging
+import time
 import urllib.error
 import urllib.request
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
+from . import tracing
+
 logger = logging.getLogger("teamcity_mcp")
 
 
@@ -87,10 +91,14 @@ def tc_request(
 
     logger.info(f"GET {url}")
 
+    start = time.perf_counter()
     try:
         with urllib.request.urlopen(request, timeout=timeout) as response:
-            return response.read()
+            data = response.read()
+            tracing.record_http("GET", url, response.status, (time.perf_counter() - start) * 1000, len(data))
+            return data
     except urllib.error.HTTPError as e:
+        tracing.record_http("GET", url, e.code, (time.perf_counter() - start) * 1000)
         body = ""
         try:
             body = e.read().decode("utf-8", errors="replace")[:500]
@@ -98,6 +106,9 @@ def tc_request(
             pass
         logger.error(f"HTTP {e.code} {e.reason}: {body}")
         raise
+    except (urllib.error.URLError, OSError) as e:
+        tracing.record_http("GET", url, None, (time.perf_counter() - start) * 1000, error=type(e).__name__)
+        raise
 
 
 def tc_post(
@@ -129,10 +140,17 @@ def tc_post(
 
     logger.info(f"POST {url}")
 
+    start = time.perf_counter()
     try:
         with urllib.request.urlopen(request, timeout=timeout) as response:
-            return response.read()
+            data = response.read()
+            tracing.record_http(
+                "POST", url, response.status, (time.perf_counter() - start) * 1000,
+                len(data), len(request.data),
+            )
+            return data
     except urllib.error.HTTPError as e:
+        tracing.record_http("POST", url, e.code, (time.perf_counter() - start) * 1000, 0, len(request.data))
         body_text = ""
         try:
             body_text = e.read().decode("utf-8", errors="replace")[:500]
@@ -140,6 +158,12 @@ def tc_post(
             pass
         logger.error(f"HTTP {e.code} {e.reason}: {body_text}")
         raise
+    except (urllib.error.URLError, OSError) as e:
+        tracing.record_http(
+            "POST", url, None, (time.perf_counter() - start) * 1000, 0, len(request.data),
+            error=type(e).__name__,
+        )
+        raise
 
 
 def tc_request_json(endpoint: str, timeout: int = 30) -> dict: